@@ -0,0 +1,8 @@
+"""
+Benchmarks do scheduler e dos executores.
+
+Uso::
+
+    python -m custom_airflow.benchmarks --output bench/$(git rev-parse --short HEAD).json
+    python -m custom_airflow.benchmarks --compare bench/antes.json bench/depois.json
+"""
@@ -0,0 +1,76 @@
+"""Geradores de DAGs sintéticas para os benchmarks."""
+import random
+from pathlib import Path
+from typing import Optional
+
+from custom_airflow.src.dag_parser import DAG, Task
+
+SHAPES = ('fan_out', 'chain', 'random')
+
+NOOP_SCRIPT = 'pass\n'
+
+
+def noop_script(directory: Path) -> Path:
+    """Script de tarefa que não faz nada (para as execuções com subprocesso real)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    script = directory / 'noop.py'
+    if not script.exists():
+        script.write_text(NOOP_SCRIPT, encoding='utf-8')
+    return script
+
+
+def _task(index: int, script_path: str, dependencies) -> Task:
+    return Task(name=f't{index}', script_path=script_path, dependencies=dependencies, retries=1)
+
+
+def fan_out(n: int, script_path: str = 'noop.py', name: Optional[str] = None) -> DAG:
+    """Uma tarefa raiz da qual dependem todas as outras ``n - 1``."""
+    dag = DAG(name or f'bench_fan_out_{n}', schedule_interval='@daily')
+    dag.add_task(_task(0, script_path, []))
+    for index in range(1, n):
+        dag.add_task(_task(index, script_path, ['t0']))
+    return dag
+
+
+def chain(n: int, script_path: str = 'noop.py', name: Optional[str] = None) -> DAG:
+    """``n`` tarefas em sequência."""
+    dag = DAG(name or f'bench_chain_{n}', schedule_interval='@daily')
+    for index in range(n):
+        dag.add_task(_task(index, script_path, [f't{index - 1}'] if index else []))
+    return dag
+
+
+def random_dag(n: int, script_path: str = 'noop.py', name: Optional[str] = None, max_dependencies: int = 3,
+               window: int = 50, seed: int = 0) -> DAG:
+    """
+    DAG aleatória (reprodutível pelo ``seed``): cada tarefa depende de até
+    ``max_dependencies`` tarefas entre as ``window`` anteriores.
+    """
+    rng = random.Random(seed)
+    dag = DAG(name or f'bench_random_{n}', schedule_interval='@daily')
+    for index in range(n):
+        candidates = range(max(0, index - window), index)
+        count = min(len(candidates), rng.randint(0, max_dependencies))
+        dag.add_task(_task(index, script_path, [f't{d}' for d in rng.sample(candidates, count)]))
+    return dag
+
+
+def build_dag(shape: str, n: int, script_path: str = 'noop.py', name: Optional[str] = None) -> DAG:
+    generators = {'fan_out': fan_out, 'chain': chain, 'random': random_dag}
+    if shape not in generators:
+        raise ValueError(f"Formato de DAG desconhecido: '{shape}' (use {', '.join(SHAPES)}).")
+    return generators[shape](n, script_path, name)
+
+
+def write_dag_files(directory: Path, count: int, tasks_per_dag: int = 10, shape: str = 'chain') -> list:
+    """Grava ``count`` arquivos de DAG importáveis pelo scheduler em ``directory``."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = directory / f'bench_dag_{index}.py'
+        path.write_text(
+            'from custom_airflow.benchmarks.generators import build_dag\n\n'
+            f"dag = build_dag({shape!r}, {tasks_per_dag}, name='bench_file_dag_{index}')\n",
+            encoding='utf-8')
+        paths.append(path)
+    return paths
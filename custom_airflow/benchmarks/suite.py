@@ -0,0 +1,280 @@
+"""
+Suíte de benchmarks: sobrecarga do ``DAG.execute``, varredura da pasta de DAGs,
+gravações por segundo no SQLite e vazão ponta a ponta.
+
+Cada benchmark roda em um diretório de trabalho temporário (banco SQLite, logs,
+venvs e DAGs próprios). O resultado é um JSON com os metadados da máquina e do
+commit, comparável com ``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+from .generators import SHAPES, build_dag, noop_script, write_dag_files
+
+# Campos que identificam um resultado (os demais são medidas)
+KEY_FIELDS = ('benchmark', 'shape', 'tasks', 'task_mode', 'backend', 'files', 'rows', 'phase', 'method')
+
+
+def _prepare_workspace(workdir: Path):
+    """Aponta banco, logs, venvs e arquivos para ``workdir`` antes de usar os módulos do projeto."""
+    os.environ.update({
+        'ENV': 'development',
+        'SQLITE_DB': str(workdir / 'bench.db'),
+        'TASK_LOG_DIR': str(workdir / 'logs'),
+        'VENV_CACHE_DIR': str(workdir / 'venvs'),
+        'ARCHIVE_DIR': str(workdir / 'archive'),
+    })
+    from custom_airflow.src import models
+    models.dispose_engine()
+    models.Base.metadata.create_all(models.get_engine())
+
+
+@contextmanager
+def _task_mode(mode: str, sleep: float):
+    """'noop' e 'sleep' substituem a execução do script; 'subprocess' executa de verdade."""
+    from custom_airflow.src.async_executor import AsyncExecutor
+    from custom_airflow.src.executor import Executor
+
+    if mode == 'subprocess':
+        yield
+        return
+
+    def run(self):
+        if mode == 'sleep':
+            time.sleep(sleep)
+
+    async def run_async(self):
+        if mode == 'sleep':
+            import asyncio
+            await asyncio.sleep(sleep)
+
+    original, original_async = Executor.run, AsyncExecutor.run
+    Executor.run, AsyncExecutor.run = run, run_async
+    try:
+        yield
+    finally:
+        Executor.run, AsyncExecutor.run = original, original_async
+
+
+@contextmanager
+def _env(**values):
+    old = {key: os.environ.get(key) for key in values}
+    os.environ.update({key: str(value) for key, value in values.items()})
+    try:
+        yield
+    finally:
+        for key, value in old.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def bench_execute(workdir: Path, shape: str, n: int, task_mode: str, backend: str, sleep: float,
+                  parallelism: int) -> dict:
+    """Tempo de um run completo; com tarefas 'noop' mede só a sobrecarga do agendamento."""
+    dag = build_dag(shape, n, str(noop_script(workdir)), name=f'bench_{shape}_{n}_{task_mode}_{backend}')
+    dag.parallelism = parallelism
+    with _task_mode(task_mode, sleep), _env(EXECUTOR_BACKEND=backend):
+        started = time.perf_counter()
+        dag.register()
+        registered = time.perf_counter()
+        state = dag.execute()
+        finished = time.perf_counter()
+    seconds = finished - started
+    return {
+        'benchmark': 'dag_execute', 'shape': shape, 'tasks': n, 'task_mode': task_mode, 'backend': backend,
+        'state': state.value if state else None, 'seconds': seconds,
+        'register_seconds': registered - started,
+        'tasks_per_second': n / seconds,
+        'overhead_us_per_task': (finished - registered) / n * 1e6,
+    }
+
+
+def bench_scan(workdir: Path, files: int, tasks_per_dag: int) -> List[dict]:
+    """Varredura da pasta de DAGs: importação inicial, varredura sem mudanças e com um arquivo alterado."""
+    from custom_airflow.src import scheduler
+    from custom_airflow.src.dag_index import DagFileIndex
+
+    dags_dir = workdir / f'dags_{files}'
+    paths = write_dag_files(dags_dir, files, tasks_per_dag)
+    scheduler.dag_file_index = DagFileIndex(dags_dir)
+    scheduler.dags_path = dags_dir
+
+    results = []
+    for phase in ('cold', 'warm', 'one_changed'):
+        if phase == 'one_changed':
+            with open(paths[0], 'a', encoding='utf-8') as f:
+                f.write('# alterado\n')
+        started = time.perf_counter()
+        scheduler.scan_for_new_dags()
+        seconds = time.perf_counter() - started
+        results.append({'benchmark': 'dag_scan', 'files': files, 'tasks': tasks_per_dag, 'phase': phase,
+                        'seconds': seconds, 'files_per_second': files / seconds if phase != 'one_changed' else None})
+    for dag_name in list(scheduler.dag_schedule):
+        scheduler.unschedule_dag(dag_name)
+    return results
+
+
+def bench_db_writes(workdir: Path, rows: int) -> List[dict]:
+    """Execuções gravadas por segundo: ``StateWriter`` em lote vs. um commit por linha."""
+    from custom_airflow.src.models import ExecutionModel, TaskStatus, get_session
+    from custom_airflow.src.state_writer import StateWriter, register_dag
+
+    dag_id, task_ids = register_dag(build_dag('chain', 1, name=f'bench_db_{rows}'))
+    task_id = task_ids['t0']
+    results = []
+
+    writer = StateWriter(flush_interval=0.05)
+    started = time.perf_counter()
+    for _ in range(rows):
+        key = writer.record_execution_start(dag_id, task_id)
+        writer.record_execution_end(key, TaskStatus.success)
+    writer.close()
+    seconds = time.perf_counter() - started
+    results.append({'benchmark': 'db_writes', 'method': 'state_writer', 'rows': rows, 'seconds': seconds,
+                    'rows_per_second': rows / seconds})
+
+    per_row = min(rows, 2000)
+    started = time.perf_counter()
+    for _ in range(per_row):
+        session = get_session()
+        execution = ExecutionModel(dag_id=dag_id, task_id=task_id, start_time=datetime.utcnow(),
+                                   status=TaskStatus.running)
+        session.add(execution)
+        session.commit()
+        execution.status = TaskStatus.success
+        execution.end_time = datetime.utcnow()
+        session.commit()
+        session.close()
+    seconds = time.perf_counter() - started
+    results.append({'benchmark': 'db_writes', 'method': 'commit_per_row', 'rows': per_row, 'seconds': seconds,
+                    'rows_per_second': per_row / seconds})
+    return results
+
+
+def bench_throughput(workdir: Path, n: int, backend: str, parallelism: int) -> dict:
+    """Vazão ponta a ponta: ``n`` tarefas reais (subprocesso Python vazio) em leque."""
+    return {**bench_execute(workdir, 'fan_out', n, 'subprocess', backend, 0.0, parallelism),
+            'benchmark': 'throughput'}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def _metadata() -> dict:
+    return {
+        'git_commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(args) -> dict:
+    suites = set(args.suites.split(','))
+    results = []
+    with tempfile.TemporaryDirectory(prefix='custom_airflow_bench_', dir=args.workdir) as tmp:
+        workdir = Path(tmp)
+        _prepare_workspace(workdir)
+        if 'execute' in suites:
+            for backend in args.backends.split(','):
+                for shape in args.shapes.split(','):
+                    for n in args.sizes:
+                        results.append(bench_execute(workdir, shape, n, args.task_mode, backend, args.sleep,
+                                                     args.parallelism))
+                        _print(results[-1])
+        if 'scan' in suites:
+            for result in bench_scan(workdir, args.scan_files, args.scan_tasks):
+                results.append(result)
+                _print(result)
+        if 'db' in suites:
+            for result in bench_db_writes(workdir, args.db_rows):
+                results.append(result)
+                _print(result)
+        if 'throughput' in suites:
+            for backend in args.backends.split(','):
+                results.append(bench_throughput(workdir, args.throughput_tasks, backend, args.parallelism))
+                _print(results[-1])
+        from custom_airflow.src import models
+        models.dispose_engine()
+    return {'meta': _metadata(), 'results': results}
+
+
+def _key(result: dict) -> tuple:
+    return tuple((field, result[field]) for field in KEY_FIELDS if result.get(field) is not None)
+
+
+def _print(result: dict):
+    key = ' '.join(f'{field}={value}' for field, value in _key(result))
+    print(f"{key:<90} {result['seconds']:10.4f}s", flush=True)
+
+
+def compare(old_path: Path, new_path: Path) -> List[dict]:
+    """Compara dois arquivos de resultado; ``ratio`` < 1 significa que o novo é mais rápido."""
+    old = {_key(r): r for r in json.loads(old_path.read_text(encoding='utf-8'))['results']}
+    new = {_key(r): r for r in json.loads(new_path.read_text(encoding='utf-8'))['results']}
+    rows = []
+    for key in sorted(set(old) & set(new), key=str):
+        ratio = new[key]['seconds'] / old[key]['seconds'] if old[key]['seconds'] else None
+        rows.append({'key': dict(key), 'old_seconds': old[key]['seconds'], 'new_seconds': new[key]['seconds'],
+                     'ratio': ratio})
+        label = ' '.join(f'{field}={value}' for field, value in key)
+        # Tempo anterior zerado (medição abaixo da resolução do relógio): sem razão
+        change = f'x{ratio:.2f}' if ratio is not None else 'n/a'
+        print(f"{label:<90} {old[key]['seconds']:10.4f}s {new[key]['seconds']:10.4f}s  {change}")
+    return rows
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(',') if size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do scheduler e dos executores.")
+    parser.add_argument('--suites', default='execute,scan,db,throughput',
+                        help="Benchmarks a executar: execute, scan, db, throughput.")
+    parser.add_argument('--shapes', default=','.join(SHAPES), help="Formatos de DAG: fan_out, chain, random.")
+    parser.add_argument('--sizes', type=_sizes, default=[10, 100, 1000, 10000],
+                        help="Quantidades de tarefas (até 100000), separadas por vírgula.")
+    parser.add_argument('--task-mode', default='noop', choices=('noop', 'sleep', 'subprocess'),
+                        help="Execução das tarefas no benchmark 'execute'.")
+    parser.add_argument('--sleep', type=float, default=0.01, help="Duração das tarefas no modo 'sleep'.")
+    parser.add_argument('--backends', default='thread,asyncio', help="Backends de execução (EXECUTOR_BACKEND).")
+    parser.add_argument('--parallelism', type=int, default=32, help="Tarefas simultâneas por DAG.")
+    parser.add_argument('--scan-files', type=int, default=200, help="Arquivos de DAG na varredura.")
+    parser.add_argument('--scan-tasks', type=int, default=10, help="Tarefas por arquivo de DAG.")
+    parser.add_argument('--db-rows', type=int, default=20000, help="Execuções gravadas no benchmark 'db'.")
+    parser.add_argument('--throughput-tasks', type=int, default=200, help="Tarefas reais no benchmark 'throughput'.")
+    parser.add_argument('--workdir', default=None, help="Diretório para os arquivos temporários.")
+    parser.add_argument('--output', default=None, help="Arquivo JSON com os resultados.")
+    parser.add_argument('--compare', nargs=2, metavar=('ANTES', 'DEPOIS'), help="Compara dois resultados.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(Path(args.compare[0]), Path(args.compare[1]))
+        return
+    report = run_suite(args)
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"Resultados gravados em {output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
@@ -17,7 +17,9 @@ task1 = Task(
     name='task1',
     script_path=str(TASKS_DIR / 'task1.py'),  # Caminho absoluto
     retries=2,
-    timeout=120
+    timeout=120,
+    cache=True,  # Pula a tarefa se script e ambiente não mudaram na última hora
+    cache_ttl=3600
 )
 
 task2 = Task(
@@ -25,7 +27,9 @@ task2 = Task(
     script_path=str(TASKS_DIR / 'task2.py'),
     dependencies=['task1'],
     retries=3,
-    timeout=90
+    timeout=90,
+    cache=True,  # Pula a tarefa se script e ambiente não mudaram na última hora
+    cache_ttl=3600
 )
 
 task3 = Task(
@@ -33,7 +37,9 @@ task3 = Task(
     script_path=str(TASKS_DIR / 'task3.py'),
     dependencies=['task1'],
     retries=1,
-    timeout=60
+    timeout=60,
+    cache=True,  # Pula a tarefa se script e ambiente não mudaram na última hora
+    cache_ttl=3600
 )
 
 # Adicionando as tarefas na DAG
@@ -0,0 +1,41 @@
+from alembic import context
+
+from custom_airflow.src.models import Base, get_database_url, get_engine
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Gera o SQL das migrações sem conectar ao banco (``alembic upgrade --sql``)."""
+    context.configure(
+        url=config.get_main_option('sqlalchemy.url') or get_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Aplica as migrações usando a conexão recebida de ``migrate.py`` ou o engine compartilhado."""
+    connection = config.attributes.get('connection')
+    if connection is None:
+        with get_engine().connect() as connection:
+            _run(connection)
+    else:
+        _run(connection)
+
+
+def _run(connection):
+    # render_as_batch: no SQLite, ALTERs viram "copiar e recriar a tabela"
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,48 @@
+"""Esquema original: dags, tasks e executions
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2025-02-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TASK_STATUS = ('pending', 'running', 'success', 'failed')
+
+
+def upgrade():
+    op.create_table(
+        'dags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), unique=True),
+    )
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('script_path', sa.String()),
+        sa.Column('dependencies', sa.String()),
+        sa.Column('status', sa.Enum(*TASK_STATUS, name='taskstatus')),
+        sa.Column('dag_id', sa.Integer(), sa.ForeignKey('dags.id')),
+    )
+    op.create_table(
+        'executions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('dag_id', sa.Integer(), sa.ForeignKey('dags.id')),
+        sa.Column('task_id', sa.Integer(), sa.ForeignKey('tasks.id')),
+        sa.Column('start_time', sa.DateTime()),
+        sa.Column('end_time', sa.DateTime()),
+        sa.Column('status', sa.Enum(*TASK_STATUS, name='taskstatus', create_type=False)),
+    )
+
+
+def downgrade():
+    op.drop_table('executions')
+    op.drop_table('tasks')
+    op.drop_table('dags')
+    sa.Enum(name='taskstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,102 @@
+"""Histórico de execuções: dag_runs, tentativas, DAGs serializadas e índices
+
+Revision ID: 0002_execution_history
+Revises: 0001_baseline
+Create Date: 2025-03-01 00:00:00
+
+Bancos criados com ``create_all`` antes das migrações podem já ter parte destas
+colunas e tabelas; por isso cada passo verifica o esquema antes de alterar.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002_execution_history'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+DAG_RUN_STATE = ('queued', 'running', 'success', 'failed')
+
+EXECUTION_INDEXES = {
+    'ix_executions_dag_id_start_time': (['dag_id', 'start_time'], False),
+    'ix_executions_task_id_start_time': (['task_id', 'start_time'], False),
+    'ix_executions_status': (['status'], False),
+    'ix_executions_dag_run_id': (['dag_run_id'], False),
+    'ix_executions_execution_key': (['execution_key'], True),
+}
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _columns(table):
+    return {column['name'] for column in _inspector().get_columns(table)}
+
+
+def _indexes(table):
+    return {index['name'] for index in _inspector().get_indexes(table)}
+
+
+def upgrade():
+    tables = set(_inspector().get_table_names())
+
+    if 'serialized_dags' not in tables:
+        op.create_table(
+            'serialized_dags',
+            sa.Column('dag_id', sa.Integer(), sa.ForeignKey('dags.id'), primary_key=True),
+            sa.Column('fileloc', sa.String()),
+            sa.Column('file_hash', sa.String(64)),
+            sa.Column('dag_hash', sa.String(64)),
+            sa.Column('data', sa.Text()),
+            sa.Column('updated_at', sa.DateTime()),
+        )
+
+    if 'dag_runs' not in tables:
+        op.create_table(
+            'dag_runs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('dag_id', sa.Integer(), sa.ForeignKey('dags.id'), nullable=False),
+            sa.Column('logical_date', sa.DateTime(), nullable=False),
+            sa.Column('run_type', sa.String(16)),
+            sa.Column('state', sa.Enum(*DAG_RUN_STATE, name='dagrunstate')),
+            sa.Column('start_date', sa.DateTime()),
+            sa.Column('end_date', sa.DateTime()),
+            sa.UniqueConstraint('dag_id', 'logical_date', name='uq_dag_runs_dag_id_logical_date'),
+        )
+        op.create_index('ix_dag_runs_dag_id_state', 'dag_runs', ['dag_id', 'state'])
+        op.create_index('ix_dag_runs_state', 'dag_runs', ['state'])
+
+    columns = _columns('executions')
+    with op.batch_alter_table('executions') as batch:
+        if 'attempt' not in columns:
+            batch.add_column(sa.Column('attempt', sa.Integer(), server_default='1'))
+        if 'execution_key' not in columns:
+            batch.add_column(sa.Column('execution_key', sa.String(32)))
+        if 'dag_run_id' not in columns:
+            batch.add_column(sa.Column('dag_run_id', sa.Integer()))
+            batch.create_foreign_key('fk_executions_dag_run_id', 'dag_runs', ['dag_run_id'], ['id'])
+
+    existing = _indexes('executions')
+    for name, (index_columns, unique) in EXECUTION_INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'executions', index_columns, unique=unique)
+
+    if 'ix_tasks_dag_id_name' not in _indexes('tasks'):
+        op.create_index('ix_tasks_dag_id_name', 'tasks', ['dag_id', 'name'])
+
+
+def downgrade():
+    op.drop_index('ix_tasks_dag_id_name', table_name='tasks')
+    for name in EXECUTION_INDEXES:
+        op.drop_index(name, table_name='executions')
+    with op.batch_alter_table('executions') as batch:
+        batch.drop_constraint('fk_executions_dag_run_id', type_='foreignkey')
+        batch.drop_column('dag_run_id')
+        batch.drop_column('execution_key')
+        batch.drop_column('attempt')
+    op.drop_index('ix_dag_runs_state', table_name='dag_runs')
+    op.drop_index('ix_dag_runs_dag_id_state', table_name='dag_runs')
+    op.drop_table('dag_runs')
+    sa.Enum(name='dagrunstate').drop(op.get_bind(), checkfirst=True)
+    op.drop_table('serialized_dags')
@@ -0,0 +1,28 @@
+"""Caminho do log de cada execução
+
+Revision ID: 0003_execution_logs
+Revises: 0002_execution_history
+Create Date: 2025-03-08 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_execution_logs'
+down_revision = '0002_execution_history'
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if 'log_path' not in _columns('executions'):
+        with op.batch_alter_table('executions') as batch_op:
+            batch_op.add_column(sa.Column('log_path', sa.String(512)))
+
+
+def downgrade():
+    with op.batch_alter_table('executions') as batch_op:
+        batch_op.drop_column('log_path')
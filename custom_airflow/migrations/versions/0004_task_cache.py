@@ -0,0 +1,36 @@
+"""Cache de resultados das tarefas e status 'skipped'
+
+Revision ID: 0004_task_cache
+Revises: 0003_execution_logs
+Create Date: 2025-03-15 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_task_cache'
+down_revision = '0003_execution_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # No SQLite o enum é só um VARCHAR; no PostgreSQL é um tipo nativo
+        op.execute("ALTER TYPE taskstatus ADD VALUE IF NOT EXISTS 'skipped'")
+
+    if 'task_cache' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'task_cache',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('task_id', sa.Integer(), sa.ForeignKey('tasks.id'), nullable=False),
+            sa.Column('fingerprint', sa.String(64), nullable=False),
+            sa.Column('execution_key', sa.String(32)),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('task_id', 'fingerprint', name='uq_task_cache_task_id_fingerprint'),
+        )
+
+
+def downgrade():
+    # Valores de enum não podem ser removidos no PostgreSQL; 'skipped' permanece no tipo
+    op.drop_table('task_cache')
@@ -0,0 +1,62 @@
+"""Fila distribuída de tarefas e workers
+
+Revision ID: 0005_task_queue
+Revises: 0004_task_cache
+Create Date: 2025-03-22 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005_task_queue'
+down_revision = '0004_task_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'task_queue' not in tables:
+        op.create_table(
+            'task_queue',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('dag_name', sa.String(), nullable=False),
+            sa.Column('dag_id', sa.Integer(), sa.ForeignKey('dags.id'), nullable=False),
+            sa.Column('task_id', sa.Integer(), sa.ForeignKey('tasks.id'), nullable=False),
+            sa.Column('dag_run_id', sa.Integer(), sa.ForeignKey('dag_runs.id')),
+            sa.Column('attempt', sa.Integer()),
+            sa.Column('execution_key', sa.String(32)),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('priority', sa.Integer()),
+            sa.Column('state', sa.String(16), nullable=False),
+            sa.Column('result', sa.String(16)),
+            sa.Column('worker_id', sa.String(64)),
+            sa.Column('claim_token', sa.String(32)),
+            sa.Column('requeues', sa.Integer()),
+            sa.Column('queued_at', sa.DateTime()),
+            sa.Column('claimed_at', sa.DateTime()),
+            sa.Column('heartbeat_at', sa.DateTime()),
+            sa.Column('finished_at', sa.DateTime()),
+        )
+        op.create_index('ix_task_queue_state_priority', 'task_queue', ['state', 'priority', 'id'])
+        op.create_index('ix_task_queue_worker_id_state', 'task_queue', ['worker_id', 'state'])
+        op.create_index('ix_task_queue_claim_token', 'task_queue', ['claim_token'])
+
+    if 'workers' not in tables:
+        op.create_table(
+            'workers',
+            sa.Column('id', sa.String(64), primary_key=True),
+            sa.Column('hostname', sa.String()),
+            sa.Column('pid', sa.Integer()),
+            sa.Column('state', sa.String(16)),
+            sa.Column('started_at', sa.DateTime()),
+            sa.Column('heartbeat_at', sa.DateTime()),
+        )
+
+
+def downgrade():
+    op.drop_table('workers')
+    op.drop_index('ix_task_queue_claim_token', table_name='task_queue')
+    op.drop_index('ix_task_queue_worker_id_state', table_name='task_queue')
+    op.drop_index('ix_task_queue_state_priority', table_name='task_queue')
+    op.drop_table('task_queue')
@@ -0,0 +1,43 @@
+"""Schedulers em alta disponibilidade e posse das DAGs
+
+Revision ID: 0006_scheduler_ha
+Revises: 0005_task_queue
+Create Date: 2025-03-29 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_scheduler_ha'
+down_revision = '0005_task_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'schedulers' not in tables:
+        op.create_table(
+            'schedulers',
+            sa.Column('id', sa.String(64), primary_key=True),
+            sa.Column('hostname', sa.String()),
+            sa.Column('pid', sa.Integer()),
+            sa.Column('state', sa.String(16)),
+            sa.Column('started_at', sa.DateTime()),
+            sa.Column('heartbeat_at', sa.DateTime()),
+        )
+
+    if 'dag_leases' not in tables:
+        op.create_table(
+            'dag_leases',
+            sa.Column('dag_name', sa.String(), primary_key=True),
+            sa.Column('scheduler_id', sa.String(64)),
+            sa.Column('acquired_at', sa.DateTime()),
+            sa.Column('renewed_at', sa.DateTime()),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table('dag_leases')
+    op.drop_table('schedulers')
@@ -0,0 +1,227 @@
+"""
+Backend de execução com asyncio (``EXECUTOR_BACKEND=asyncio``).
+
+No backend padrão cada tarefa em andamento ocupa uma thread parada em
+``subprocess.run``. Aqui todas as tarefas de todas as DAGs são processos
+acompanhados por um único loop asyncio, em uma thread própria, com
+``asyncio.create_subprocess_exec``; um semáforo global limita os processos
+simultâneos (``ASYNC_EXECUTOR_CONCURRENCY``). A gravação dos logs (rotação e
+compressão gzip incluídas) roda em um pool de threads próprio
+(``ASYNC_LOG_THREADS``), nunca no loop.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Coroutine, Optional
+
+from .executor import VENV_SETUP_SECONDS, kill_process_group
+from .resources import ProcessLimits
+from .task_logs import READ_CHUNK_SIZE, TaskLogWriter, output_grace_seconds
+from .venv_cache import get_venv_cache, venv_python
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskRunner:
+    """Loop asyncio em segundo plano que executa as corrotinas das tarefas."""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max_concurrency or int(os.getenv('ASYNC_EXECUTOR_CONCURRENCY', '256'))
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+        # Escrita, rotação e compressão dos logs das tarefas, fora do loop
+        self.log_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=int(os.getenv('ASYNC_LOG_THREADS', '4')), thread_name_prefix='task-logs')
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(started,), name='async-executor', daemon=True)
+        self._thread.start()
+        started.wait()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        return self._semaphore
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """Agenda a corrotina no loop; cancelar o future cancela a corrotina (e mata o processo)."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def shutdown(self):
+        if not self._loop.is_running():
+            return
+
+        async def cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(cancel_all(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.log_executor.shutdown(wait=True)
+
+    def _run_loop(self, started: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        started.set()
+        self._loop.run_forever()
+
+
+class _ExitProtocol(asyncio.subprocess.SubprocessStreamProtocol):
+    """Protocolo de ``create_subprocess_exec`` que sinaliza o fim do processo.
+
+    ``Process.wait()`` só retorna depois que os pipes fecham: um filho que herdou a
+    saída do script o seguraria enquanto existisse.
+    """
+
+    def __init__(self, loop):
+        super().__init__(limit=READ_CHUNK_SIZE, loop=loop)
+        self.exited = loop.create_future()
+
+    def process_exited(self):
+        super().process_exited()
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+
+class AsyncExecutor:
+    """Equivalente assíncrono do ``Executor``: mesmas exceções (``TimeoutExpired``/``CalledProcessError``)."""
+
+    def __init__(self, task, timeout=60, log_path=None, runner: Optional[AsyncTaskRunner] = None):
+        self.task = task
+        self.timeout = timeout
+        self.log_path = log_path
+        self.runner = runner or get_async_runner()
+        self.limits = ProcessLimits.for_task(task, timeout)
+
+    async def python_executable(self) -> str:
+        # O ambiente normalmente já está pronto (construído quando a DAG foi carregada);
+        # se não estiver, a construção roda fora do loop
+        loop = asyncio.get_running_loop()
+        with VENV_SETUP_SECONDS.time():
+            venv_dir = await loop.run_in_executor(None, get_venv_cache().ensure,
+                                                  getattr(self.task, 'requirements', None))
+        return str(venv_python(venv_dir))
+
+    async def run(self):
+        command = [await self.python_executable(), self.task.script_path]
+        # O ambiente não sai do cache enquanto a tarefa espera a vez ou roda
+        with get_venv_cache().in_use(Path(command[0]).parent.parent):
+            await self._run(command)
+
+    async def _run(self, command):
+        async with self.runner.semaphore:
+            logger.info("Iniciando execução da tarefa '%s'.", self.task.name)
+            self.task.status = 'running'
+            log = TaskLogWriter(self.log_path) if self.log_path else None
+            try:
+                returncode = await self._run_process(command, log)
+            except subprocess.TimeoutExpired:
+                self.task.status = 'failed'
+                logger.error("Erro: A tarefa '%s' excedeu o tempo máximo de execução (%s segundos).",
+                             self.task.name, self.timeout)
+                raise
+            finally:
+                if log is not None:
+                    # Fecha e comprime o último segmento fora do loop
+                    await asyncio.get_running_loop().run_in_executor(self.runner.log_executor, log.close)
+        if returncode:
+            self.task.status = 'failed'
+            error = subprocess.CalledProcessError(returncode, command)
+            logger.error("Erro ao executar a tarefa '%s': %s", self.task.name, error)
+            raise error
+        self.task.status = 'success'
+        logger.info("Tarefa '%s' concluída com sucesso.", self.task.name)
+
+    async def _run_process(self, command, log) -> int:
+        loop = asyncio.get_running_loop()
+        output = subprocess.PIPE if log is not None else None
+        limits = self.limits
+        try:
+            transport, protocol = await loop.subprocess_exec(
+                lambda: _ExitProtocol(loop), *(limits.wrap(command) if limits is not None else command),
+                stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT if log is not None else None,
+                start_new_session=os.name == 'posix')
+        except BaseException:
+            if limits is not None:
+                limits.cleanup()
+            raise
+        process = asyncio.subprocess.Process(transport, protocol, loop)
+        copier = asyncio.ensure_future(self._copy_output(process.stdout, log)) if log is not None else None
+        try:
+            # O timeout vale para o script; filhos que seguram o pipe não o estendem
+            await asyncio.wait_for(asyncio.shield(protocol.exited), self.timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process, protocol)
+            raise subprocess.TimeoutExpired(command, self.timeout)
+        except asyncio.CancelledError:
+            # Cancelamento do run (ou do scheduler): o processo não pode continuar órfão
+            await self._kill(process, protocol)
+            raise
+        finally:
+            # Filhos deixados pelo script morrem com o grupo e liberam o pipe
+            kill_process_group(process.pid)
+            try:
+                if copier is not None:
+                    await self._drain(copier)
+            finally:
+                transport.close()
+                if limits is not None:
+                    limits.cleanup()
+        return process.returncode
+
+    @staticmethod
+    async def _drain(copier: asyncio.Future):
+        """Copia a saída que resta no pipe por até ``TASK_OUTPUT_GRACE_SECONDS``."""
+        await asyncio.wait({copier}, timeout=output_grace_seconds())
+        if not copier.done():
+            # Um processo que escapou do grupo mantém o pipe aberto
+            copier.cancel()
+        try:
+            await copier
+        except asyncio.CancelledError:
+            if not copier.cancelled():
+                raise
+
+    async def _copy_output(self, stream: asyncio.StreamReader, log: TaskLogWriter):
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            # Uma escrita pode rotacionar e comprimir um segmento inteiro
+            write = loop.run_in_executor(self.runner.log_executor, log.write, chunk)
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # O log só pode ser fechado depois da escrita em andamento
+                await write
+                raise
+
+    @staticmethod
+    async def _kill(process, protocol: _ExitProtocol):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await protocol.exited
+
+
+_async_runner = None
+_async_runner_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncTaskRunner:
+    """Loop asyncio compartilhado pelo processo."""
+    global _async_runner
+    if _async_runner is None:
+        with _async_runner_lock:
+            if _async_runner is None:
+                _async_runner = AsyncTaskRunner()
+    return _async_runner
@@ -0,0 +1,162 @@
+"""
+Catchup e backfill de runs das DAGs.
+
+``backfill`` executa os runs de todas as datas lógicas do cron da DAG em um
+intervalo, em paralelo até ``BACKFILL_MAX_ACTIVE_RUNS`` runs (nunca mais que o
+``max_active_runs`` da DAG). Datas que já têm run são puladas (ou reexecutadas
+com ``rerun``); a restrição única em ``dag_runs (dag_id, logical_date)`` garante
+que um backfill e o scheduler nunca disparem o mesmo run duas vezes.
+
+Uso pela linha de comando::
+
+    python -m custom_airflow.src.backfill minha_dag --start 2025-01-01 --end 2025-01-31
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from croniter import croniter
+
+from .dag_processor import load_dag_file
+from .dag_runs import dag_run_states, latest_dag_run, to_utc_naive
+from .dag_store import read_dag
+from .logging_config import configure_logging
+from .models import DagRunState
+
+logger = logging.getLogger(__name__)
+
+
+def logical_dates(schedule_interval: str, start: datetime, end: datetime) -> List[datetime]:
+    """Datas do cron em ``[start, end]``."""
+    cron = croniter(schedule_interval, start - timedelta(seconds=1))
+    dates = []
+    while True:
+        logical_date = cron.get_next(datetime)
+        if logical_date > end:
+            return dates
+        dates.append(logical_date)
+
+
+def missed_logical_dates(dag, now: Optional[datetime] = None, max_runs: Optional[int] = None) -> List[datetime]:
+    """
+    Datas do cron depois do último run da DAG e até ``now``, perdidas com o scheduler parado.
+
+    Sem nenhum run anterior não há o que recuperar. Apenas as ``max_runs``
+    (``CATCHUP_MAX_RUNS``) datas mais recentes são retornadas.
+    """
+    max_runs = max_runs if max_runs is not None else int(os.getenv('CATCHUP_MAX_RUNS', '100'))
+    last_run = latest_dag_run(dag.name)
+    if last_run is None:
+        return []
+    now = now or datetime.now(timezone.utc)
+    last = last_run.logical_date.replace(tzinfo=timezone.utc)
+    dates = logical_dates(dag.schedule_interval, last + timedelta(seconds=1), now)
+    return dates[-max_runs:] if max_runs else dates
+
+
+def backfill(dag, start: datetime, end: datetime, max_active_runs: Optional[int] = None,
+             rerun_failed: bool = False, rerun_all: bool = False, run_type: str = 'backfill',
+             dates: Optional[List[datetime]] = None, dispatcher=None) -> Dict[datetime, Optional[DagRunState]]:
+    """
+    Executa os runs da DAG para as datas do cron em ``[start, end]`` (ou para ``dates``).
+
+    Roda no máximo ``min(max_active_runs, dag.max_active_runs)`` runs ao mesmo tempo.
+
+    :param dispatcher: ``DagRunDispatcher`` do scheduler: cada run ocupa um dos
+        ``max_active_runs`` da DAG junto com os runs agendados.
+    :param rerun_failed: Reexecuta as datas cujo run falhou.
+    :param rerun_all: Reexecuta todas as datas, inclusive as concluídas com sucesso.
+    :return: Data lógica -> estado final do run (None se a data foi pulada).
+    """
+    max_active_runs = min(max_active_runs or int(os.getenv('BACKFILL_MAX_ACTIVE_RUNS', '4')),
+                          max(1, dag.max_active_runs or 1))
+    dates = dates if dates is not None else logical_dates(dag.schedule_interval, start, end)
+    if not dates:
+        return {}
+    dag.register()
+    existing = dag_run_states(dag._dag_id, dates[0], dates[-1])
+
+    results: Dict[datetime, Optional[DagRunState]] = {}
+    pending = []
+    for logical_date in dates:
+        state = existing.get(to_utc_naive(logical_date))
+        if state is None:
+            pending.append((logical_date, False))
+        elif rerun_all or (rerun_failed and state == DagRunState.failed):
+            pending.append((logical_date, True))
+        else:
+            results[logical_date] = None
+
+    logger.info("Backfill da DAG '%s': %s run(s) a executar, %s já existente(s).",
+                dag.name, len(pending), len(results))
+
+    def run(logical_date, rerun):
+        if dispatcher is None:
+            return dag.execute(logical_date=logical_date, run_type=run_type, rerun=rerun)
+        with dispatcher.slot(dag):
+            return dag.execute(logical_date=logical_date, run_type=run_type, rerun=rerun)
+
+    with ThreadPoolExecutor(max_workers=max_active_runs, thread_name_prefix='backfill') as pool:
+        futures = {logical_date: pool.submit(run, logical_date, rerun) for logical_date, rerun in pending}
+        for logical_date, future in futures.items():
+            try:
+                results[logical_date] = future.result()
+            except Exception as e:
+                logger.error("Erro no backfill da DAG '%s' para %s: %s", dag.name, logical_date, e)
+                results[logical_date] = DagRunState.failed
+    return dict(sorted(results.items()))
+
+
+def catchup(dag, now: Optional[datetime] = None, dispatcher=None) -> Dict[datetime, Optional[DagRunState]]:
+    """Executa os intervalos perdidos da DAG (``missed_logical_dates``)."""
+    dates = missed_logical_dates(dag, now)
+    if not dates:
+        return {}
+    logger.info("DAG '%s': %s intervalo(s) perdido(s), de %s a %s.", dag.name, len(dates), dates[0], dates[-1])
+    return backfill(dag, dates[0], dates[-1], run_type='catchup', dates=dates, dispatcher=dispatcher)
+
+
+def _parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _load_dag(dag_name: str, dag_file: Optional[str]):
+    dag = load_dag_file(Path(dag_file)) if dag_file else read_dag(dag_name)
+    if dag is None or dag.name != dag_name:
+        raise SystemExit(f"DAG '{dag_name}' não encontrada (use --file com o arquivo da DAG).")
+    return dag
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa os runs de uma DAG em um intervalo de datas.")
+    parser.add_argument('dag', help="Nome da DAG.")
+    parser.add_argument('--start', required=True, type=_parse_date, help="Data inicial (ISO, UTC se sem fuso).")
+    parser.add_argument('--end', required=True, type=_parse_date, help="Data final, inclusive.")
+    parser.add_argument('--file', default=None, help="Arquivo da DAG (padrão: forma serializada no banco).")
+    parser.add_argument('--max-active-runs', type=int, default=None,
+                        help="Runs simultâneos (até o max_active_runs da DAG).")
+    parser.add_argument('--rerun-failed', action='store_true', help="Reexecuta as datas com run falho.")
+    parser.add_argument('--rerun-all', action='store_true', help="Reexecuta todas as datas do intervalo.")
+    parser.add_argument('--dry-run', action='store_true', help="Apenas lista as datas.")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    dag = _load_dag(args.dag, args.file)
+    if args.dry_run:
+        for logical_date in logical_dates(dag.schedule_interval, args.start, args.end):
+            print(logical_date.isoformat())
+        return
+    results = backfill(dag, args.start, args.end, args.max_active_runs, args.rerun_failed, args.rerun_all)
+    for logical_date, state in results.items():
+        print(f"{logical_date.isoformat()}  {state.value if state else 'pulado'}")
+    if any(state == DagRunState.failed for state in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Forma compilada (somente leitura) do grafo de uma DAG.
+
+As tarefas recebem índices inteiros na ordem de inserção e as arestas
+dependência -> dependente ficam em dois ``array`` no formato CSR: os
+dependentes da tarefa ``i`` são ``downstream[offsets[i]:offsets[i + 1]]``.
+A compilação é O(V + E), detecta ciclos e tarefas que nunca ficariam prontas,
+e pré-calcula os níveis topológicos e o caminho crítico. ``DAG.compile`` guarda
+o resultado até a DAG mudar, e cada run só copia o vetor de graus de entrada.
+"""
+from array import array
+from collections import deque
+from typing import Dict, List
+
+
+class TaskRecord:
+    """Tarefa compilada: índice, nível topológico e prioridade (caminho crítico)."""
+    __slots__ = ('index', 'name', 'task', 'level', 'priority')
+
+    def __init__(self, index: int, name: str, task, level: int, priority: int):
+        self.index = index
+        self.name = name
+        self.task = task
+        self.level = level  # Maior distância (em arestas) desde uma tarefa raiz
+        self.priority = priority  # Tarefas no caminho mais longo até o fim da DAG, incluindo esta
+
+    def __repr__(self):
+        return f'TaskRecord({self.index}, {self.name!r}, level={self.level}, priority={self.priority})'
+
+
+class CompiledDAG:
+    __slots__ = ('records', 'index', 'offsets', 'downstream', 'in_degree', 'roots', 'topological_order')
+
+    def __init__(self, records: List[TaskRecord], index: Dict[str, int], offsets: array, downstream: array,
+                 in_degree: array, roots: array, topological_order: array):
+        self.records = records
+        self.index = index
+        self.offsets = offsets
+        self.downstream = downstream
+        self.in_degree = in_degree
+        self.roots = roots
+        self.topological_order = topological_order
+
+    def __len__(self):
+        return len(self.records)
+
+    def dependents(self, i: int) -> array:
+        """Índices das tarefas que dependem da tarefa ``i``."""
+        return self.downstream[self.offsets[i]:self.offsets[i + 1]]
+
+    def initial_in_degree(self) -> array:
+        """Cópia dos graus de entrada, decrementada pelo run à medida que as tarefas terminam."""
+        return array('i', self.in_degree)
+
+    def levels(self) -> List[List[str]]:
+        """Tarefas agrupadas por nível topológico (cada nível só depende dos anteriores)."""
+        groups: List[List[str]] = []
+        for record in self.records:
+            while len(groups) <= record.level:
+                groups.append([])
+            groups[record.level].append(record.name)
+        return groups
+
+    def critical_path(self) -> List[str]:
+        """Cadeia de dependências mais longa da DAG."""
+        if not self.records:
+            return []
+        current = max(self.roots, key=lambda i: self.records[i].priority)
+        path = [self.records[current].name]
+        while self.offsets[current] != self.offsets[current + 1]:
+            current = max(self.dependents(current), key=lambda i: self.records[i].priority)
+            path.append(self.records[current].name)
+        return path
+
+
+def _find_cycle(names: List[str], index: Dict[str, int], tasks, blocked: array) -> List[str]:
+    """
+    Um ciclo entre as tarefas bloqueadas (grau de entrada restante > 0).
+
+    Toda tarefa bloqueada tem ao menos uma dependência também bloqueada, então
+    seguir essas dependências a partir de qualquer uma delas acaba repetindo uma tarefa.
+    """
+    start = next(i for i in range(len(names)) if blocked[i])
+    position: Dict[int, int] = {}
+    path = []
+    current = start
+    while current not in position:
+        position[current] = len(path)
+        path.append(current)
+        current = next(index[dep] for dep in tasks[names[current]].dependencies if blocked[index[dep]])
+    cycle = path[position[current]:]
+    # Ordem de execução (dependência antes do dependente), fechando o ciclo
+    return [names[i] for i in reversed(cycle)] + [names[cycle[-1]]]
+
+
+def compile_dag(tasks: Dict[str, object]) -> CompiledDAG:
+    """
+    Compila ``{nome: Task}`` (na ordem de inserção) em um ``CompiledDAG``.
+
+    :raises ValueError: Se uma dependência não existir ou houver ciclos; a mensagem
+        traz um dos ciclos e as tarefas que dependem deles (que nunca ficariam prontas).
+    """
+    names = list(tasks)
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+
+    # Graus de entrada e de saída (dependências repetidas contam uma vez)
+    in_degree = array('i', [0]) * n
+    offsets = array('i', [0]) * (n + 1)
+    for i, name in enumerate(names):
+        dependencies = dict.fromkeys(tasks[name].dependencies)
+        for dep in dependencies:
+            if dep not in index:
+                raise ValueError(f"A tarefa '{dep}' referenciada como dependência na tarefa '{name}' não existe.")
+            offsets[index[dep] + 1] += 1
+        in_degree[i] = len(dependencies)
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    downstream = array('i', [0]) * offsets[n]
+    cursor = array('i', offsets[:n])
+    for i, name in enumerate(names):
+        for dep in dict.fromkeys(tasks[name].dependencies):
+            j = index[dep]
+            downstream[cursor[j]] = i
+            cursor[j] += 1
+
+    # Kahn: ordem topológica e nível de cada tarefa
+    remaining = array('i', in_degree)
+    levels = array('i', [0]) * n
+    roots = array('i', (i for i in range(n) if in_degree[i] == 0))
+    topological_order = array('i')
+    ready = deque(roots)
+    while ready:
+        i = ready.popleft()
+        topological_order.append(i)
+        for k in range(offsets[i], offsets[i + 1]):
+            j = downstream[k]
+            levels[j] = max(levels[j], levels[i] + 1)
+            remaining[j] -= 1
+            if remaining[j] == 0:
+                ready.append(j)
+
+    if len(topological_order) < n:
+        cycle = _find_cycle(names, index, tasks, remaining)
+        unreachable = sorted(set(names[i] for i in range(n) if remaining[i]) - set(cycle))
+        message = f"Ciclo de dependências: {' -> '.join(cycle)}."
+        if unreachable:
+            message += f" Tarefas que nunca ficariam prontas: {', '.join(unreachable)}."
+        raise ValueError(message)
+
+    # Caminho crítico: maior cadeia de cada tarefa até o fim, em ordem topológica reversa
+    priorities = array('i', [1]) * n
+    for i in reversed(topological_order):
+        for k in range(offsets[i], offsets[i + 1]):
+            priorities[i] = max(priorities[i], priorities[downstream[k]] + 1)
+
+    records = [TaskRecord(i, name, tasks[name], levels[i], priorities[i]) for i, name in enumerate(names)]
+    return CompiledDAG(records, index, offsets, downstream, in_degree, roots, topological_order)
@@ -0,0 +1,224 @@
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path: Path) -> str:
+    """Hash SHA-256 do conteúdo do arquivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DagFileEntry:
+    """Estado conhecido de um arquivo de DAG: mtime, tamanho, hash e DAG definida."""
+
+    def __init__(self, path: Path, mtime_ns: int, size: int, content_hash: str, dag_name: Optional[str] = None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.content_hash = content_hash
+        self.dag_name = dag_name
+
+
+class DagFileIndex:
+    """Índice dos arquivos do diretório de DAGs, indexado pelo caminho.
+
+    Um arquivo só é considerado alterado quando mtime/tamanho mudam *e* o hash do
+    conteúdo é diferente do último importado; arquivos inalterados nunca são
+    reimportados, então o custo da varredura cresce com o número de arquivos
+    alterados e não com o total.
+    """
+
+    def __init__(self, dags_path: Path):
+        self.dags_path = Path(dags_path)
+        self._entries: Dict[Path, DagFileEntry] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path: Path) -> Optional[DagFileEntry]:
+        return self._entries.get(Path(path))
+
+    def entries(self) -> List[DagFileEntry]:
+        return list(self._entries.values())
+
+    def list_dag_files(self) -> List[Path]:
+        return [f for f in self.dags_path.glob('*.py') if not f.name.startswith('__')]
+
+    def scan(self, paths: Optional[Iterable[Path]] = None) -> Tuple[List[DagFileEntry], List[DagFileEntry]]:
+        """
+        Compara os arquivos com o índice.
+
+        :param paths: Arquivos a verificar (ex.: vindos do watcher). Se None, varre o diretório inteiro.
+        :return: ``(alterados, removidos)``. Os alterados ainda não foram gravados no
+                 índice; chame ``update`` depois de importá-los com sucesso.
+        """
+        full_scan = paths is None
+        candidates = self.list_dag_files() if full_scan else [Path(p) for p in paths]
+        changed, deleted, seen = [], [], set()
+
+        for path in candidates:
+            if path.suffix != '.py' or path.name.startswith('__'):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                entry = self._entries.pop(path, None)
+                if entry is not None:
+                    deleted.append(entry)
+                continue
+            seen.add(path)
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                continue
+            content_hash = file_hash(path)
+            if entry is not None and entry.content_hash == content_hash:
+                # Apenas "touch": atualiza os metadados sem reimportar
+                entry.mtime_ns, entry.size = st.st_mtime_ns, st.st_size
+                continue
+            changed.append(DagFileEntry(path, st.st_mtime_ns, st.st_size, content_hash,
+                                        entry.dag_name if entry else None))
+
+        if full_scan:
+            for path in [p for p in self._entries if p not in seen]:
+                deleted.append(self._entries.pop(path))
+        return changed, deleted
+
+    def update(self, entry: DagFileEntry):
+        """Grava no índice o estado de um arquivo importado."""
+        self._entries[entry.path] = entry
+
+    def remove(self, path: Path) -> Optional[DagFileEntry]:
+        return self._entries.pop(Path(path), None)
+
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MODIFY
+
+
+class InotifyWatcher:
+    """Observa o diretório de DAGs via inotify (somente Linux).
+
+    Acumula os caminhos alterados; o scheduler os consome com ``drain`` e só
+    verifica esses arquivos. ``on_change`` é chamado a cada evento (ex.: para
+    acordar o loop do scheduler).
+    """
+
+    def __init__(self, directory: Path, on_change=None):
+        self.directory = Path(directory)
+        self.on_change = on_change
+        self._dirty: Set[Path] = set()
+        self._overflow = False
+        self._lock = threading.Lock()
+        self._fd = None
+        self._wakeup = None
+        self._thread = None
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def start(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 falhou')
+        if libc.inotify_add_watch(fd, os.fsencode(str(self.directory)), _WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f'inotify_add_watch falhou para {self.directory}')
+        self._fd = fd
+        # Self-pipe: ``stop`` acorda o leitor bloqueado no select sem fechar o fd por baixo dele
+        wakeup_r, self._wakeup = os.pipe()
+        self._thread = threading.Thread(target=self._read_loop, args=(fd, wakeup_r), name='dag-watcher',
+                                        daemon=True)
+        self._thread.start()
+        logger.info("Observando alterações em %s via inotify.", self.directory)
+
+    def stop(self):
+        """Acorda e aguarda o leitor, que fecha o fd do inotify ao sair."""
+        if self._thread is None:
+            return
+        self._fd = None
+        if self._thread.is_alive():
+            try:
+                os.write(self._wakeup, b'\0')
+            except OSError:
+                pass  # O leitor saiu nesse meio tempo e já fechou a outra ponta
+            self._thread.join(timeout=5)
+        os.close(self._wakeup)
+        self._wakeup = None
+        self._thread = None
+
+    def alive(self) -> bool:
+        """Se o leitor continua recebendo eventos (falso depois de um erro de leitura)."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def drain(self) -> Tuple[Set[Path], bool]:
+        """Retorna ``(caminhos_alterados, precisa_varredura_completa)`` e limpa o estado."""
+        with self._lock:
+            dirty, overflow = self._dirty, self._overflow
+            self._dirty, self._overflow = set(), False
+        return dirty, overflow
+
+    def _read_loop(self, fd: int, wakeup: int):
+        try:
+            self._read_events(fd, wakeup)
+        finally:
+            os.close(fd)
+            os.close(wakeup)
+
+    def _read_events(self, fd: int, wakeup: int):
+        while True:
+            try:
+                readable, _, _ = select.select([fd, wakeup], [], [])
+                if wakeup in readable:
+                    return
+                data = os.read(fd, 64 * 1024)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                logger.error("Erro ao ler eventos do inotify: %s", e)
+                # Eventos podem ter se perdido: o próximo ``drain`` pede uma varredura completa
+                with self._lock:
+                    self._overflow = True
+                if self.on_change is not None:
+                    self.on_change()
+                return
+            offset = 0
+            with self._lock:
+                while offset + _EVENT_HEADER.size <= len(data):
+                    _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                    offset += _EVENT_HEADER.size
+                    name = data[offset:offset + name_len].rstrip(b'\0')
+                    offset += name_len
+                    if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF):
+                        self._overflow = True
+                    elif name:
+                        self._dirty.add(self.directory / os.fsdecode(name))
+            if self.on_change is not None:
+                self.on_change()
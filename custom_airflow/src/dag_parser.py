@@ -1,160 +1,581 @@
+import asyncio
+import heapq
 import logging
-from collections import defaultdict
+import os
+import queue
+import random
+import time
+from contextlib import contextmanager
 from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo  # Alternativa ao pytz
 from .executor import Executor
-from .models import DAGModel, TaskModel, ExecutionModel, get_session, TaskStatus
-
-# Configuração do Logging
-logging.basicConfig(
-    level=logging.INFO,  # Ajuste para DEBUG para mais detalhes
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("scheduler.log"),
-        logging.StreamHandler()
-    ]
-)
+from .dag_graph import CompiledDAG, compile_dag
+from .async_executor import AsyncExecutor, get_async_runner
+from .models import DagRunState, TaskStatus
+from .dag_runs import create_dag_run, finish_dag_run
+from .state_writer import get_state_writer, new_execution_key, register_dag
+from .task_logs import task_log_path
+from .task_queue import cancel_jobs, enqueue_task, get_queue_watcher
+from .task_cache import (lookup_cached_result, store_cached_result, task_cache_enabled, task_cache_ttl,
+                         task_fingerprint)
+from .logging_config import log_context
+from .resources import get_resource_manager
+from .triggers import build_trigger, get_trigger_service
+from .metrics import counter, histogram
 
 logger = logging.getLogger(__name__)
 
+TASK_QUEUE_WAIT_SECONDS = histogram('task_queue_wait_seconds',
+                                    'Espera entre a submissão da tentativa e o início da execução.', ('dag',))
+TASK_RUN_SECONDS = histogram('task_run_duration_seconds', 'Duração de cada tentativa de tarefa.', ('dag', 'status'))
+DAG_RUN_SECONDS = histogram('dag_run_duration_seconds', 'Duração dos runs das DAGs.', ('dag', 'state'))
+DAG_RUNS = counter('dag_runs_total', 'Runs de DAG concluídos.', ('dag', 'state'))
+TASK_CACHE_LOOKUPS = counter('task_cache_lookups_total', 'Consultas ao cache de resultados das tarefas.',
+                             ('dag', 'result'))
+
 class Task:
     def __init__(self, name: str, 
-                 script_path: str, 
-                 dependencies: List[str] = [],
+                 script_path: str = None, 
+                 dependencies: List[str] = None,
                  #status: str = 'pending',
                  retries: int = 3, 
-                 timeout: int = 60):
+                 timeout: int = 60,
+                 requirements: List[str] = None,
+                 retry_delay: float = 5.0,
+                 retry_exponential_backoff: bool = True,
+                 max_retry_delay: float = 300.0,
+                 cache: bool = False,
+                 inputs: List[str] = None,
+                 params: dict = None,
+                 cache_ttl: float = None,
+                 pool: str = None,
+                 pool_slots: int = 1,
+                 cpus: float = None,
+                 memory_mb: int = None,
+                 priority_weight: int = 1,
+                 trigger: dict = None,
+                 poke_interval: float = None,
+                 trigger_timeout: float = None):
+        if script_path is None and trigger is None:
+            raise ValueError(f"A tarefa '{name}' precisa de um script_path ou de um trigger.")
+        if trigger is not None:
+            build_trigger(trigger)  # Valida a condição já na definição da DAG
         self.name = name
         self.script_path = script_path
-        self.dependencies = dependencies
+        self.dependencies = list(dependencies or [])
         #self.status = 'pending'  # Pode ser 'pending', 'running', 'success', 'failed'
-        self.retries = retries
+        self.retries = retries  # Número total de tentativas
         self.timeout = timeout
+        self.requirements = requirements or []  # Pacotes pip do ambiente virtual da tarefa
+        self.retry_delay = retry_delay  # Espera (segundos) antes da 2ª tentativa
+        self.retry_exponential_backoff = retry_exponential_backoff
+        self.max_retry_delay = max_retry_delay
+        # Cache de resultados (task_cache): pula a tarefa se script, entradas, parâmetros e
+        # ambiente forem os mesmos de uma execução bem-sucedida dentro de cache_ttl segundos
+        self.cache = cache
+        self.inputs = list(inputs or [])  # Arquivos ou diretórios lidos pela tarefa
+        self.params = dict(params or {})  # Parâmetros que influenciam o resultado (serializáveis em JSON)
+        self.cache_ttl = cache_ttl  # None usa TASK_CACHE_TTL
+        # Recursos (resources): slots de um pool nomeado (TASK_POOLS), CPUs e memória (MB)
+        # reservados durante a execução e aplicados como limites do processo
+        self.pool = pool
+        self.pool_slots = pool_slots
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.priority_weight = priority_weight  # Prioridade na fila de recursos (maior sai antes)
+        # Tarefa adiável (triggers): espera a condição no serviço de triggers, sem ocupar
+        # slot nem processo, e só então roda o script (se houver)
+        self.trigger = dict(trigger) if trigger is not None else None
+        self.poke_interval = poke_interval  # None usa TRIGGER_POKE_INTERVAL
+        self.trigger_timeout = trigger_timeout  # None usa TRIGGER_TIMEOUT; 0 = sem limite
+
+    def get_retry_delay(self, attempt: int) -> float:
+        """
+        Espera antes da próxima tentativa, após a tentativa ``attempt`` falhar.
+
+        Com backoff exponencial o atraso dobra a cada tentativa (limitado a
+        ``max_retry_delay``) e recebe jitter, para que tarefas que falharam juntas
+        não voltem todas ao mesmo tempo.
+        """
+        if not self.retry_exponential_backoff:
+            return self.retry_delay
+        delay = min(self.max_retry_delay, self.retry_delay * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def to_dict(self) -> dict:
+        """Representação leve e serializável da tarefa."""
+        return {
+            'name': self.name,
+            'script_path': self.script_path,
+            'dependencies': list(self.dependencies),
+            'retries': self.retries,
+            'timeout': self.timeout,
+            'requirements': list(self.requirements),
+            'retry_delay': self.retry_delay,
+            'retry_exponential_backoff': self.retry_exponential_backoff,
+            'max_retry_delay': self.max_retry_delay,
+            'cache': self.cache,
+            'inputs': list(self.inputs),
+            'params': dict(self.params),
+            'cache_ttl': self.cache_ttl,
+            'pool': self.pool,
+            'pool_slots': self.pool_slots,
+            'cpus': self.cpus,
+            'memory_mb': self.memory_mb,
+            'priority_weight': self.priority_weight,
+            'trigger': dict(self.trigger) if self.trigger is not None else None,
+            'poke_interval': self.poke_interval,
+            'trigger_timeout': self.trigger_timeout,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Task':
+        return cls(**data)
+
+class Sensor(Task):
+    """
+    Tarefa que apenas aguarda uma condição (arquivo, horário, comando...).
+
+    Bem-sucedida quando a condição dispara; falha se ela não disparar em
+    ``trigger_timeout`` segundos. Com ``script_path``, o script roda depois do disparo.
+    """
+    def __init__(self, name: str, trigger: dict, script_path: str = None, retries: int = 1, **kwargs):
+        super().__init__(name, script_path, retries=retries, trigger=trigger, **kwargs)
 
 class DAG:
-    def __init__(self, name: str, schedule_interval: str):
+    def __init__(self, name: str, schedule_interval: str, max_active_runs: int = 1,
+                 parallelism: int = None, catchup: bool = None):
         self.name = name
         self.schedule_interval = schedule_interval  # Expressão cron
+        self.max_active_runs = max_active_runs  # Runs simultâneos permitidos para esta DAG
+        self.parallelism = parallelism  # Tarefas simultâneas; None usa DAG_PARALLELISM
+        self.catchup = catchup  # Executar os intervalos perdidos ao iniciar; None usa DAG_CATCHUP
         self.tasks: Dict[str, Task] = {}
         self.timezone = ZoneInfo("UTC")  # Defina o fuso horário conforme necessário
+        # IDs no banco, preenchidos por register() e descartados quando a DAG muda
+        self._dag_id = None
+        self._task_ids: Dict[str, int] = None
+        # Grafo compilado (compile()), descartado quando a DAG muda
+        self._compiled: CompiledDAG = None
+
+    def to_dict(self) -> dict:
+        """Representação leve e serializável da DAG (tarefas na ordem de inserção)."""
+        return {
+            'name': self.name,
+            'schedule_interval': self.schedule_interval,
+            'max_active_runs': self.max_active_runs,
+            'parallelism': self.parallelism,
+            'catchup': self.catchup,
+            'tasks': [task.to_dict() for task in self.tasks.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DAG':
+        dag = cls(data['name'], data['schedule_interval'], max_active_runs=data.get('max_active_runs', 1),
+                  parallelism=data.get('parallelism'), catchup=data.get('catchup'))
+        for task_data in data['tasks']:
+            dag.add_task(Task.from_dict(task_data))
+        return dag
 
     def add_task(self, task: Task):
         # Validar se as dependências referenciadas existem
         for dep in task.dependencies:
             if dep not in self.tasks:
-                logger.error(f"A tarefa '{dep}' referenciada como dependência na tarefa '{task.name}' não existe.")
+                logger.error("A tarefa '%s' referenciada como dependência na tarefa '%s' não existe.",
+                             dep, task.name)
                 raise ValueError(f"A tarefa '{dep}' referenciada como dependência na tarefa '{task.name}' não existe.")
         self.tasks[task.name] = task
-        logger.info(f"Tarefa '{task.name}' adicionada à DAG '{self.name}' com dependências: {task.dependencies}")
-
-    def execute_task(self, task: Task, dag_record):
-        session = get_session()
-        executor = Executor(task, retries=task.retries, timeout=task.timeout)
-        
-        # Verificar se a tarefa já está registrada no banco de dados
-        task_record = session.query(TaskModel).filter_by(name=task.name, dag_id=dag_record.id).first()
-        if not task_record:
-            # Registrar a tarefa na tabela 'tasks'
-            task_record = TaskModel(
-                name=task.name,
-                script_path=task.script_path,
-                dependencies=','.join(task.dependencies) if task.dependencies else '',
-                status=TaskStatus.pending,
-                dag_id=dag_record.id
-            )
-            session.add(task_record)
-            session.commit()
-            logger.info(f"Tarefa '{task.name}' registrada no banco de dados com ID {task_record.id}.")
-        
-        # Registrar a execução
-        execution_record = ExecutionModel(
-            dag_id=dag_record.id,
-            task_id=task_record.id,  # Associa a execução à tarefa
-            start_time=datetime.utcnow(),
-            status=TaskStatus.running
-        )
-        session.add(execution_record)
-        session.commit()
-        logger.info(f"Execução iniciada para tarefa '{task.name}' da DAG '{self.name}' (Exec ID: {execution_record.id}).")
-
-        attempt = 0
-        while attempt < task.retries:
+        self._task_ids = None
+        self._compiled = None
+        logger.info("Tarefa '%s' adicionada à DAG '%s' com dependências: %s",
+                    task.name, self.name, task.dependencies)
+
+    def compile(self) -> CompiledDAG:
+        """
+        Grafo da DAG em arrays indexados (``dag_graph.compile_dag``), calculado uma vez por versão da DAG.
+
+        :raises ValueError: Se a DAG tiver ciclos ou dependências inexistentes.
+        """
+        if self._compiled is None:
+            self._compiled = compile_dag(self.tasks)
+        return self._compiled
+
+    def critical_path(self) -> List[str]:
+        """Cadeia de dependências mais longa da DAG."""
+        return self.compile().critical_path()
+
+    def register(self) -> Dict[str, int]:
+        """
+        Registra a DAG e suas tarefas no banco e retorna ``{nome: task_id}``.
+
+        O registro é feito uma vez por versão da DAG (em lote) e reaproveitado
+        pelos próximos runs.
+        """
+        if self._task_ids is None:
+            self._dag_id, self._task_ids = register_dag(self)
+        return self._task_ids
+
+    def _new_execution(self, task: Task, execution_key: str = None):
+        """``(task_id, execution_key, caminho do log)`` de uma nova tentativa da tarefa."""
+        task_id = self.register()[task.name]
+        execution_key = execution_key or new_execution_key()
+        # stdout/stderr da tentativa vão para um log próprio, ligado à linha da execução
+        log_path = None
+        if os.getenv('TASK_LOG_CAPTURE', 'true').lower() == 'true':
+            log_path = task_log_path(self.name, task.name, execution_key)
+        return task_id, execution_key, log_path
+
+    def _record_execution_start(self, task: Task, task_id: int, attempt: int, dag_run_id: int,
+                                execution_key: str, log_path):
+        get_state_writer().record_execution_start(self._dag_id, task_id, attempt, dag_run_id=dag_run_id,
+                                                  execution_key=execution_key,
+                                                  log_path=str(log_path) if log_path else None)
+        logger.info("Execução iniciada para tarefa '%s' da DAG '%s' (Exec: %s, tentativa %s).",
+                    task.name, self.name, execution_key, attempt)
+
+    def _check_cache(self, task: Task, task_id: int, attempt: int, dag_run_id: int, execution_key: str):
+        """
+        ``(impressão digital, pulada)`` da tentativa; a impressão digital é None sem cache.
+
+        Com um resultado válido no cache a tentativa é gravada como ``skipped`` sem rodar o script.
+        """
+        if not task_cache_enabled(task):
+            return None, False
+        fingerprint = task_fingerprint(task)
+        entry = lookup_cached_result(task_id, fingerprint, task_cache_ttl(task))
+        TASK_CACHE_LOOKUPS.inc(dag=self.name, result='hit' if entry else 'miss')
+        if entry is None:
+            return fingerprint, False
+        self._record_execution_start(task, task_id, attempt, dag_run_id, execution_key, None)
+        get_state_writer().record_execution_end(execution_key, TaskStatus.skipped)
+        logger.info("Tarefa '%s' pulada (cache): mesmas entradas da execução %s de %s.",
+                    task.name, entry.execution_key, entry.created_at)
+        return fingerprint, True
+
+    def execute_task(self, task: Task, attempt: int = 1, dag_run_id: int = None,
+                     execution_key: str = None) -> TaskStatus:
+        """
+        Executa uma única tentativa da tarefa, registrada como uma linha própria em 'executions'.
+
+        As novas tentativas são agendadas por ``execute``, sem ocupar um slot durante a espera.
+        As mudanças de estado são enfileiradas no ``StateWriter`` e gravadas em lote.
+
+        :param execution_key: Chave da execução (gerada se omitida; os workers usam a do job da fila).
+        :return: Status final da tentativa (success, failed ou skipped, se veio do cache).
+        """
+        task_id, execution_key, log_path = self._new_execution(task, execution_key)
+        executor = Executor(task, timeout=task.timeout, log_path=log_path)
+
+        with log_context(dag=self.name, dag_id=self._dag_id, dag_run_id=dag_run_id, task=task.name,
+                         task_id=task_id, execution_key=execution_key, attempt=attempt):
+            fingerprint, cached = self._check_cache(task, task_id, attempt, dag_run_id, execution_key)
+            if cached:
+                return TaskStatus.skipped
+
+            # Registrar a execução
+            self._record_execution_start(task, task_id, attempt, dag_run_id, execution_key, log_path)
+
             try:
-                executor.run()
-                # Atualizar execução
-                execution_record.end_time = datetime.utcnow()
-                execution_record.status = TaskStatus.success
-                session.commit()
-                logger.info(f"Tarefa '{task.name}' concluída com sucesso.")
-                break  # Saia do loop se a tarefa for bem-sucedida
+                # Aguarda os recursos da tarefa (pool, CPU, memória, limite global)
+                with get_resource_manager().lease(task, dag=self.name):
+                    executor.run()
+                status = TaskStatus.success
+                logger.info("Tarefa '%s' concluída com sucesso.", task.name)
             except Exception as e:
-                attempt += 1
-                logger.warning(f"Tentativa {attempt} para tarefa '{task.name}' falhou com erro: {e}")
-                if attempt >= task.retries:
-                    # Atualizar execução com falha
-                    execution_record.end_time = datetime.utcnow()
-                    execution_record.status = TaskStatus.failed
-                    session.commit()
-                    logger.error(f"Tarefa '{task.name}' falhou após {task.retries} tentativas.")
-        session.close()
-
-    def execute(self):
+                status = TaskStatus.failed
+                logger.warning("Tentativa %s para tarefa '%s' falhou com erro: %s", attempt, task.name, e)
+
+            # Atualizar execução
+            get_state_writer().record_execution_end(execution_key, status)
+            if fingerprint and status == TaskStatus.success:
+                store_cached_result(task_id, fingerprint, execution_key)
+            return status
+
+    async def execute_task_async(self, task: Task, attempt: int = 1, dag_run_id: int = None) -> TaskStatus:
+        """Como ``execute_task``, mas com o ``AsyncExecutor`` (``EXECUTOR_BACKEND=asyncio``)."""
+        task_id, execution_key, log_path = self._new_execution(task)
+        executor = AsyncExecutor(task, timeout=task.timeout, log_path=log_path)
+
+        with log_context(dag=self.name, dag_id=self._dag_id, dag_run_id=dag_run_id, task=task.name,
+                         task_id=task_id, execution_key=execution_key, attempt=attempt):
+            # Hash dos arquivos e consulta ao banco fora do loop (to_thread preserva o log_context)
+            fingerprint, cached = await asyncio.to_thread(self._check_cache, task, task_id, attempt, dag_run_id,
+                                                          execution_key)
+            if cached:
+                return TaskStatus.skipped
+
+            self._record_execution_start(task, task_id, attempt, dag_run_id, execution_key, log_path)
+            try:
+                async with get_resource_manager().lease_async(task, dag=self.name):
+                    await executor.run()
+                status = TaskStatus.success
+                logger.info("Tarefa '%s' concluída com sucesso.", task.name)
+            except asyncio.CancelledError:
+                get_state_writer().record_execution_end(execution_key, TaskStatus.failed)
+                logger.warning("Tentativa %s para tarefa '%s' cancelada.", attempt, task.name)
+                raise
+            except Exception as e:
+                status = TaskStatus.failed
+                logger.warning("Tentativa %s para tarefa '%s' falhou com erro: %s", attempt, task.name, e)
+
+            get_state_writer().record_execution_end(execution_key, status)
+            if fingerprint and status == TaskStatus.success:
+                await asyncio.to_thread(store_cached_result, task_id, fingerprint, execution_key)
+            return status
+
+    def _defer(self, task: Task, index: int, attempt: int, completed: queue.SimpleQueue) -> Future:
+        """Entrega a condição da tarefa ao serviço de triggers; o fim da espera chega em ``completed``."""
+        deferred_at = datetime.utcnow()
+        future = get_trigger_service().defer(task.trigger, task.poke_interval, task.trigger_timeout)
+        future.add_done_callback(lambda f: completed.put((index, attempt, f, deferred_at)))
+        logger.info("Tarefa '%s' adiada até a condição %s (tentativa %s).", task.name, task.trigger, attempt)
+        return future
+
+    def _finish_deferral(self, task: Task, attempt: int, dag_run_id: int, deferred_at: datetime,
+                         future: Future) -> TaskStatus:
+        """
+        Status da tentativa ao fim da espera, ou None se a condição disparou e o script ainda vai rodar.
+
+        Sem script (ou se a espera falhou), a espera é gravada como a execução da tentativa.
+        """
         try:
-            # Construir o gráfico de dependências e contagem de graus de entrada
-            in_degree = defaultdict(int)
-            graph = defaultdict(list)
-
-            for task in self.tasks.values():
-                for dep in task.dependencies:
-                    graph[dep].append(task.name)
-                    in_degree[task.name] += 1
-
-            # Inicializar tarefas com grau de entrada zero (sem dependências)
-            ready_tasks = [task_name for task_name in self.tasks if in_degree[task_name] == 0]
-
-            session = get_session()
-            dag_record = session.query(DAGModel).filter_by(name=self.name).first()
-
-            if not dag_record:
-                dag_record = DAGModel(name=self.name)
-                session.add(dag_record)
-                session.commit()
-                logger.info(f"DAG '{self.name}' registrada no banco de dados.")
-
-            with ThreadPoolExecutor(max_workers=5) as executor_pool:
-                futures = {}
-                # Submeter tarefas prontas para execução
-                for task_name in ready_tasks:
-                    task = self.tasks[task_name]
-                    future = executor_pool.submit(self.execute_task, task, dag_record)
-                    futures[future] = task_name
-                    logger.info(f"Tarefa '{task_name}' submetida para execução.")
-
-                while futures:
-                    # Aguarda a conclusão de qualquer tarefa
-                    for future in as_completed(futures):
-                        task_name = futures.pop(future)
+            future.result()
+            status = TaskStatus.success
+            logger.info("Condição da tarefa '%s' atendida.", task.name)
+        except Exception as e:
+            status = TaskStatus.failed
+            logger.warning("Tentativa %s para tarefa '%s' falhou aguardando a condição: %s", attempt, task.name, e)
+        if status == TaskStatus.success and task.script_path:
+            return None
+        writer = get_state_writer()
+        execution_key = writer.record_execution_start(self._dag_id, self.register()[task.name], attempt,
+                                                      start_time=deferred_at, dag_run_id=dag_run_id)
+        writer.record_execution_end(execution_key, status)
+        return status
+
+    @contextmanager
+    def _deferrals(self):
+        """Esperas em andamento no serviço de triggers (índice -> future), canceladas se o run for interrompido."""
+        deferred: Dict[int, Future] = {}
+        try:
+            yield deferred
+        finally:
+            for future in deferred.values():
+                future.cancel()
+
+    @contextmanager
+    def _task_submitter(self, parallelism: int, dag_run_id: int):
+        """
+        Função ``submit(tarefa, tentativa) -> Future`` do backend de execução.
+
+        ``EXECUTOR_BACKEND=thread`` (padrão): uma thread por tarefa em andamento.
+        ``EXECUTOR_BACKEND=asyncio``: processos acompanhados pelo loop asyncio
+        compartilhado; se o run for interrompido, as tentativas em andamento são
+        canceladas (e seus processos encerrados).
+        ``EXECUTOR_BACKEND=queue``: as tentativas vão para a fila no banco
+        (``task_queue``) e são executadas pelos workers; se o run for
+        interrompido, as que nenhum worker pegou são canceladas.
+        """
+        backend = os.getenv('EXECUTOR_BACKEND', 'thread')
+        if backend == 'queue':
+            watcher = get_queue_watcher()
+            jobs = {}
+
+            def submit(task, attempt):
+                job_id = enqueue_task(self.name, self._dag_id, self.register()[task.name], dag_run_id, task,
+                                      attempt, priority=task.priority_weight)
+                future = watcher.watch(job_id)
+                jobs[job_id] = future
+                future.add_done_callback(lambda f, job_id=job_id: jobs.pop(job_id, None))
+                return future
+
+            try:
+                yield submit
+            finally:
+                pending = [job_id for job_id, future in list(jobs.items()) if not future.done()]
+                if pending:
+                    watcher.forget(pending)
+                    cancel_jobs(pending)
+        elif backend == 'asyncio':
+            runner = get_async_runner()
+            futures = set()
+
+            def submit(task, attempt):
+                future = runner.submit(self._timed_attempt_async(time.monotonic(), task, attempt, dag_run_id))
+                futures.add(future)
+                future.add_done_callback(futures.discard)
+                return future
+
+            try:
+                yield submit
+            finally:
+                for future in list(futures):
+                    future.cancel()
+        else:
+            with ThreadPoolExecutor(max_workers=parallelism) as executor_pool:
+                yield lambda task, attempt: executor_pool.submit(self._timed_attempt, time.monotonic(), task,
+                                                                 attempt, dag_run_id)
+
+    def _timed_attempt(self, queued_at: float, task: Task, attempt: int, dag_run_id: int) -> TaskStatus:
+        """Executa a tentativa registrando a espera na fila e a duração."""
+        started = time.monotonic()
+        TASK_QUEUE_WAIT_SECONDS.observe(started - queued_at, dag=self.name)
+        status = TaskStatus.failed
+        try:
+            status = self.execute_task(task, attempt, dag_run_id)
+            return status
+        finally:
+            TASK_RUN_SECONDS.observe(time.monotonic() - started, dag=self.name, status=status.value)
+
+    async def _timed_attempt_async(self, queued_at: float, task: Task, attempt: int, dag_run_id: int) -> TaskStatus:
+        started = time.monotonic()
+        TASK_QUEUE_WAIT_SECONDS.observe(started - queued_at, dag=self.name)
+        status = TaskStatus.failed
+        try:
+            status = await self.execute_task_async(task, attempt, dag_run_id)
+            return status
+        finally:
+            TASK_RUN_SECONDS.observe(time.monotonic() - started, dag=self.name, status=status.value)
+
+    def get_parallelism(self) -> int:
+        """Número máximo de tarefas simultâneas desta DAG."""
+        return self.parallelism or int(os.getenv('DAG_PARALLELISM', '5'))
+
+    def get_catchup(self) -> bool:
+        """Se os intervalos perdidos enquanto o scheduler estava parado devem ser executados."""
+        if self.catchup is not None:
+            return self.catchup
+        return os.getenv('DAG_CATCHUP', 'false').lower() == 'true'
+
+    def execute(self, logical_date: datetime = None, run_type: str = 'scheduled',
+                rerun: bool = False) -> DagRunState:
+        """
+        Executa um run da DAG para ``logical_date`` (agora, se omitida).
+
+        :param rerun: Reexecuta um run já concluído para essa data (backfill).
+        :return: Estado final do run, ou None se já existia um run para essa data.
+        """
+        with log_context(dag=self.name):
+            return self._execute_run(logical_date, run_type, rerun)
+
+    def _execute_run(self, logical_date: datetime, run_type: str, rerun: bool = False) -> DagRunState:
+        dag_run_id = None
+        run_state = DagRunState.failed
+        started = time.monotonic()
+        try:
+            # Grafo compilado (em cache) e graus de entrada deste run, por índice de tarefa
+            graph = self.compile()
+            records = graph.records
+            in_degree = graph.initial_in_degree()
+
+            # Fila de prontas (grau de entrada zero), ordenada pelo caminho crítico
+            ready_tasks = []
+            order = 0
+
+            # Registrar a DAG e as tarefas (em lote, só na primeira execução desta versão)
+            self.register()
+
+            logical_date = logical_date or datetime.now(self.timezone)
+            dag_run_id = create_dag_run(self._dag_id, logical_date, run_type, rerun=rerun)
+            if dag_run_id is None:
+                logger.warning("DAG '%s' já possui um run para %s. Run ignorado.", self.name, logical_date)
+                return None
+            failed_tasks = []
+
+            parallelism = self.get_parallelism()
+            # Cada tentativa concluída é entregue aqui pelo callback do future
+            completed = queue.SimpleQueue()
+            running = 0
+            # Novas tentativas aguardando o backoff: (horário monotônico, ordem, tarefa, tentativa)
+            retry_queue = []
+            # Tarefas adiáveis cuja condição já disparou neste run (novas tentativas só rodam o script)
+            fired = set()
+
+            def make_ready(index, attempt):
+                nonlocal order
+                task = records[index].task
+                if task.trigger is not None and index not in fired:
+                    # A espera vai para o serviço de triggers, sem ocupar slot
+                    deferred[index] = self._defer(task, index, attempt, completed)
+                else:
+                    heapq.heappush(ready_tasks, (-records[index].priority, order, index, attempt))
+                    order += 1
+
+            with self._task_submitter(parallelism, dag_run_id) as submit, self._deferrals() as deferred:
+                for index in graph.roots:
+                    make_ready(index, 1)
+                while ready_tasks or running or retry_queue or deferred:
+                    # Devolver à fila de prontas as tentativas cujo backoff terminou
+                    now = time.monotonic()
+                    while retry_queue and retry_queue[0][0] <= now:
+                        _, _, index, attempt = heapq.heappop(retry_queue)
+                        make_ready(index, attempt)
+
+                    # Ocupar todos os slots livres com as tarefas prontas de maior prioridade
+                    while ready_tasks and running < parallelism:
+                        _, _, index, attempt = heapq.heappop(ready_tasks)
+                        future = submit(records[index].task, attempt)
+                        future.add_done_callback(lambda f, i=index, n=attempt: completed.put((i, n, f, None)))
+                        running += 1
+                        logger.info("Tarefa '%s' submetida para execução (tentativa %s).",
+                                    records[index].name, attempt)
+
+                    # Aguarda a conclusão de qualquer tentativa ou o fim do próximo backoff
+                    timeout = max(0.0, retry_queue[0][0] - time.monotonic()) if retry_queue else None
+                    try:
+                        index, attempt, future, deferred_at = completed.get(timeout=timeout)
+                    except queue.Empty:
+                        continue
+                    task_name = records[index].name
+                    task = records[index].task
+                    if deferred_at is not None:
+                        # Fim da espera de uma tarefa adiável
+                        del deferred[index]
+                        status = self._finish_deferral(task, attempt, dag_run_id, deferred_at, future)
+                        if status is None:
+                            fired.add(index)
+                            make_ready(index, attempt)
+                            continue
+                    else:
+                        running -= 1
                         try:
-                            future.result()
-                            logger.info(f"Tarefa '{task_name}' concluída.")
-                            # Atualizar o grau de entrada das tarefas dependentes
-                            for dependent_task_name in graph.get(task_name, []):
-                                in_degree[dependent_task_name] -= 1
-                                if in_degree[dependent_task_name] == 0:
-                                    # Submeter a tarefa dependente para execução
-                                    dependent_task = self.tasks[dependent_task_name]
-                                    future_dep = executor_pool.submit(self.execute_task, dependent_task, dag_record)
-                                    futures[future_dep] = dependent_task_name
-                                    logger.info(f"Tarefa '{dependent_task_name}' submetida para execução.")
+                            status = future.result()
                         except Exception as e:
-                            logger.error(f"Tarefa '{task_name}' falhou com erro: {e}")
-                        break  # Sair do loop para verificar os próximos futures
+                            logger.error("Tarefa '%s' falhou com erro: %s", task_name, e)
+                            status = TaskStatus.failed
+
+                    if status == TaskStatus.failed:
+                        if attempt < task.retries:
+                            # Reagendar com backoff; o slot fica livre durante a espera
+                            delay = task.get_retry_delay(attempt)
+                            heapq.heappush(retry_queue, (time.monotonic() + delay, order, index, attempt + 1))
+                            order += 1
+                            logger.info("Tarefa '%s' será tentada novamente em %.1fs (tentativa %s de %s).",
+                                        task_name, delay, attempt + 1, task.retries)
+                            continue
+                        logger.error("Tarefa '%s' falhou após %s tentativa(s).", task_name, attempt)
+                        failed_tasks.append(task_name)
+                    else:
+                        logger.info("Tarefa '%s' concluída.", task_name)
+
+                    # Atualizar o grau de entrada das tarefas dependentes
+                    for dependent in graph.dependents(index):
+                        in_degree[dependent] -= 1
+                        if in_degree[dependent] == 0:
+                            make_ready(dependent, 1)
 
-            logger.info(f"Execução da DAG '{self.name}' concluída.")
+            run_state = DagRunState.failed if failed_tasks else DagRunState.success
+            logger.info("Execução da DAG '%s' concluída (%s).", self.name, run_state.value)
 
         except Exception as e:
-            logger.critical(f"Erro ao executar a DAG '{self.name}': {e}")
+            logger.critical("Erro ao executar a DAG '%s': %s", self.name, e)
         finally:
-            session.close()
+            # Garante que o estado do run esteja gravado quando execute() retornar
+            get_state_writer().flush()
+            if dag_run_id is not None:
+                finish_dag_run(dag_run_id, run_state)
+                DAG_RUNS.inc(dag=self.name, state=run_state.value)
+                DAG_RUN_SECONDS.observe(time.monotonic() - started, dag=self.name, state=run_state.value)
+        return run_state
@@ -0,0 +1,125 @@
+import importlib.util
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def load_dag_file(dag_file: Path):
+    """
+    Executa o arquivo Python da DAG e retorna a variável ``dag`` definida nele.
+
+    :param dag_file: Caminho para o arquivo Python da DAG.
+    :return: Instância da DAG ou None se o arquivo não definir ``dag``.
+    :raises ValueError: Se a DAG tiver ciclos de dependências.
+    """
+    spec = importlib.util.spec_from_file_location(dag_file.stem, dag_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    dag = getattr(module, 'dag', None)
+    if dag is not None:
+        # Ciclos e dependências inválidas aparecem como erro de importação, não no primeiro run
+        dag.compile()
+    return dag
+
+
+def _parse_dag_file(path: str, conn):
+    """Ponto de entrada do processo filho: importa o arquivo e devolve a DAG serializada."""
+    try:
+        dag = load_dag_file(Path(path))
+        conn.send(('ok', dag.to_dict() if dag is not None else None))
+    except BaseException as e:  # inclui SystemExit disparado pelo arquivo da DAG
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class DagParseResult:
+    """Resultado do processamento de um arquivo de DAG."""
+
+    def __init__(self, path: Path, dag_data: Optional[dict] = None, error: Optional[str] = None,
+                 duration: float = 0.0, timed_out: bool = False):
+        self.path = path
+        self.dag_data = dag_data
+        self.error = error
+        self.duration = duration
+        self.timed_out = timed_out
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class DagProcessor:
+    """Importa arquivos de DAG em processos separados, em paralelo e com timeout.
+
+    Cada arquivo roda em um processo próprio (no máximo ``max_processes`` ao mesmo
+    tempo) e devolve apenas a estrutura serializada da DAG (``DAG.to_dict``). Um
+    arquivo lento ou travado é encerrado ao exceder ``timeout`` sem afetar o
+    scheduler nem os demais arquivos.
+
+    Em Linux/macOS o padrão é ``forkserver``: os filhos nascem de um servidor
+    single-thread com o ``dag_parser`` pré-carregado, em vez de um fork do
+    scheduler (que tem threads e conexões abertas).
+    """
+
+    def __init__(self, max_processes: Optional[int] = None, timeout: Optional[float] = None,
+                 start_method: Optional[str] = None):
+        self.max_processes = max_processes or int(os.getenv('DAG_PROCESSOR_PROCESSES', '0')) or os.cpu_count() or 1
+        self.timeout = timeout or float(os.getenv('DAG_FILE_PROCESS_TIMEOUT', '30'))
+        start_method = start_method or os.getenv('DAG_PROCESSOR_START_METHOD')
+        if not start_method:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            self._ctx.set_forkserver_preload(['custom_airflow.src.dag_parser'])
+
+    def process_files(self, paths: Iterable[Path]) -> Dict[Path, DagParseResult]:
+        """Processa os arquivos e retorna um resultado por caminho."""
+        pending = [Path(p) for p in paths]
+        pending.reverse()
+        running = {}  # conn -> (processo, caminho, início)
+        results: Dict[Path, DagParseResult] = {}
+
+        while pending or running:
+            while pending and len(running) < self.max_processes:
+                path = pending.pop()
+                parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+                process = self._ctx.Process(target=_parse_dag_file, args=(str(path), child_conn),
+                                            name=f'dag-processor-{path.stem}', daemon=True)
+                process.start()
+                child_conn.close()
+                running[parent_conn] = (process, path, time.monotonic())
+
+            now = time.monotonic()
+            nearest_deadline = min(started + self.timeout for _, _, started in running.values())
+            for conn in wait(list(running), timeout=max(0.0, nearest_deadline - now)):
+                process, path, started = running.pop(conn)
+                try:
+                    status, payload = conn.recv()
+                except EOFError:
+                    status, payload = 'error', f'processo terminou com código {process.exitcode}'
+                conn.close()
+                process.join()
+                duration = time.monotonic() - started
+                if status == 'ok':
+                    results[path] = DagParseResult(path, dag_data=payload, duration=duration)
+                else:
+                    results[path] = DagParseResult(path, error=payload, duration=duration)
+
+            now = time.monotonic()
+            for conn, (process, path, started) in list(running.items()):
+                if now - started >= self.timeout:
+                    process.kill()
+                    process.join()
+                    conn.close()
+                    del running[conn]
+                    results[path] = DagParseResult(
+                        path, error=f'tempo limite de {self.timeout} segundos excedido',
+                        duration=now - started, timed_out=True)
+        return results
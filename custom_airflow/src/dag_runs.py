@@ -0,0 +1,101 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from .models import DAGModel, DagRunModel, DagRunState, ExecutionModel, TaskStatus, get_session
+
+logger = logging.getLogger(__name__)
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Converte para UTC sem fuso, o formato gravado nas colunas DateTime."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def create_dag_run(dag_id: int, logical_date: datetime, run_type: str = 'scheduled',
+                   rerun: bool = False) -> Optional[int]:
+    """
+    Cria o run da DAG para ``logical_date`` já no estado 'running'.
+
+    :param rerun: Se já existe um run concluído para essa data, reabre o mesmo
+                  run (as novas execuções se somam às anteriores).
+    :return: ID do run, ou None se já existe um run para essa data (a restrição
+             única em ``(dag_id, logical_date)`` impede runs duplicados).
+    """
+    now = datetime.utcnow()
+    session = get_session()
+    try:
+        if rerun:
+            # UPDATE condicional: dois backfills concorrentes não reabrem o mesmo run
+            reopened = (session.query(DagRunModel)
+                        .filter(DagRunModel.dag_id == dag_id,
+                                DagRunModel.logical_date == to_utc_naive(logical_date),
+                                DagRunModel.state.in_([DagRunState.success, DagRunState.failed]))
+                        .update({'state': DagRunState.running, 'run_type': run_type, 'start_date': now,
+                                 'end_date': None}, synchronize_session=False))
+            session.commit()
+            if reopened:
+                return session.query(DagRunModel.id).filter_by(
+                    dag_id=dag_id, logical_date=to_utc_naive(logical_date)).scalar()
+        dag_run = DagRunModel(dag_id=dag_id, logical_date=to_utc_naive(logical_date), run_type=run_type,
+                              state=DagRunState.running, start_date=now)
+        session.add(dag_run)
+        session.commit()
+        return dag_run.id
+    except IntegrityError:
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+
+def finish_dag_run(dag_run_id: int, state: DagRunState):
+    session = get_session()
+    try:
+        session.query(DagRunModel).filter_by(id=dag_run_id).update(
+            {'state': state, 'end_date': datetime.utcnow()})
+        session.commit()
+    finally:
+        session.close()
+
+
+def dag_run_states(dag_id: int, start: datetime, end: datetime) -> Dict[datetime, DagRunState]:
+    """Estado dos runs da DAG com data lógica em ``[start, end]`` (datas em UTC sem fuso)."""
+    session = get_session()
+    try:
+        rows = (session.query(DagRunModel.logical_date, DagRunModel.state)
+                .filter(DagRunModel.dag_id == dag_id,
+                        DagRunModel.logical_date >= to_utc_naive(start),
+                        DagRunModel.logical_date <= to_utc_naive(end)))
+        return {logical_date: state for logical_date, state in rows}
+    finally:
+        session.close()
+
+
+def latest_dag_run(dag_name: str) -> Optional[DagRunModel]:
+    """Run mais recente (pela data lógica) da DAG."""
+    session = get_session()
+    try:
+        return (session.query(DagRunModel)
+                .join(DAGModel, DagRunModel.dag_id == DAGModel.id)
+                .filter(DAGModel.name == dag_name)
+                .order_by(DagRunModel.logical_date.desc())
+                .first())
+    finally:
+        session.close()
+
+
+def running_executions(dag_name: Optional[str] = None) -> List[ExecutionModel]:
+    """Execuções em andamento, de todas as DAGs ou de uma só."""
+    session = get_session()
+    try:
+        query = session.query(ExecutionModel).filter(ExecutionModel.status == TaskStatus.running)
+        if dag_name is not None:
+            query = query.join(DAGModel, ExecutionModel.dag_id == DAGModel.id).filter(DAGModel.name == dag_name)
+        return query.all()
+    finally:
+        session.close()
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from .dag_parser import DAG
+from .models import DAGModel, SerializedDagModel, get_session
+
+logger = logging.getLogger(__name__)
+
+
+class StoredDag:
+    """DAG carregada do banco, com a origem e o hash do arquivo que a gerou."""
+
+    def __init__(self, dag: DAG, fileloc: Optional[str], file_hash: Optional[str], dag_hash: str):
+        self.dag = dag
+        self.fileloc = fileloc
+        self.file_hash = file_hash
+        self.dag_hash = dag_hash
+
+
+def serialize_dag(dag: DAG) -> str:
+    """JSON compacto e canônico da DAG (tarefas, dependências, retries, timeouts, agenda)."""
+    return json.dumps(dag.to_dict(), sort_keys=True, separators=(',', ':'))
+
+
+def compute_dag_hash(data: str) -> str:
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def write_dag(dag: DAG, fileloc: Optional[str] = None, file_hash: Optional[str] = None) -> bool:
+    """
+    Grava (ou atualiza) a forma serializada da DAG.
+
+    :return: True se o conteúdo mudou e foi gravado; False se já estava atualizado.
+    """
+    data = serialize_dag(dag)
+    dag_hash = compute_dag_hash(data)
+    session = get_session()
+    try:
+        dag_record = session.query(DAGModel).filter_by(name=dag.name).first()
+        if not dag_record:
+            dag_record = DAGModel(name=dag.name)
+            session.add(dag_record)
+            session.flush()
+        serialized = session.get(SerializedDagModel, dag_record.id)
+        if serialized and serialized.dag_hash == dag_hash and serialized.file_hash == file_hash \
+                and serialized.fileloc == fileloc:
+            return False
+        if not serialized:
+            serialized = SerializedDagModel(dag_id=dag_record.id)
+            session.add(serialized)
+        serialized.fileloc = fileloc
+        serialized.file_hash = file_hash
+        serialized.dag_hash = dag_hash
+        serialized.data = data
+        serialized.updated_at = datetime.utcnow()
+        session.commit()
+        logger.info("DAG '%s' serializada no banco (hash %s).", dag.name, dag_hash[:12])
+        return True
+    finally:
+        session.close()
+
+
+def read_dag(dag_name: str) -> Optional[DAG]:
+    """Reconstrói a DAG a partir do banco, sem importar o arquivo Python."""
+    session = get_session()
+    try:
+        serialized = (session.query(SerializedDagModel)
+                      .join(DAGModel, SerializedDagModel.dag_id == DAGModel.id)
+                      .filter(DAGModel.name == dag_name)
+                      .first())
+        return DAG.from_dict(json.loads(serialized.data)) if serialized else None
+    finally:
+        session.close()
+
+
+def load_serialized_dags() -> List[StoredDag]:
+    """Todas as DAGs serializadas no banco."""
+    session = get_session()
+    try:
+        stored = []
+        for serialized in session.query(SerializedDagModel).all():
+            try:
+                dag = DAG.from_dict(json.loads(serialized.data))
+            except Exception as e:
+                logger.error("DAG serializada inválida (dag_id=%s): %s", serialized.dag_id, e)
+                continue
+            stored.append(StoredDag(dag, serialized.fileloc, serialized.file_hash, serialized.dag_hash))
+        return stored
+    finally:
+        session.close()
+
+
+def delete_dag(dag_name: str):
+    """Remove a forma serializada da DAG (o histórico em 'dags' é mantido)."""
+    session = get_session()
+    try:
+        dag_record = session.query(DAGModel).filter_by(name=dag_name).first()
+        if dag_record:
+            session.query(SerializedDagModel).filter_by(dag_id=dag_record.id).delete()
+            session.commit()
+    finally:
+        session.close()
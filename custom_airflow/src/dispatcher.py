@@ -0,0 +1,72 @@
+import logging
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DagRunDispatcher:
+    """Executa as DAGs vencidas em paralelo, fora da thread do scheduler.
+
+    O limite global (``MAX_ACTIVE_DAG_RUNS``) é o número de threads do pool: runs
+    excedentes aguardam na fila do pool. O limite por DAG vem de
+    ``dag.max_active_runs`` e conta runs em execução e enfileirados; quando é
+    atingido, o novo run é recusado. Runs executados fora do pool (catchup)
+    ocupam o mesmo limite com ``slot``.
+    """
+
+    def __init__(self, max_active_runs: Optional[int] = None):
+        self.max_active_runs = max_active_runs or int(os.getenv('MAX_ACTIVE_DAG_RUNS', '16'))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_active_runs, thread_name_prefix='dag-run')
+        self._active = defaultdict(int)
+        self._lock = threading.Condition()
+
+    def submit(self, dag, logical_date=None) -> Optional[Future]:
+        """Submete um run da DAG. Retorna None se a DAG já atingiu ``max_active_runs``."""
+        with self._lock:
+            if self._active[dag.name] >= dag.max_active_runs:
+                logger.warning("DAG '%s' já possui %s run(s) ativo(s) (max_active_runs=%s). Run ignorado.",
+                               dag.name, self._active[dag.name], dag.max_active_runs)
+                return None
+            self._active[dag.name] += 1
+        future = self._pool.submit(self._run, dag, logical_date)
+        future.add_done_callback(lambda _: self._release(dag.name))
+        return future
+
+    @contextmanager
+    def slot(self, dag):
+        """Ocupa um dos ``max_active_runs`` da DAG, aguardando um livre, enquanto o bloco executa."""
+        with self._lock:
+            self._lock.wait_for(lambda: self._active[dag.name] < dag.max_active_runs)
+            self._active[dag.name] += 1
+        try:
+            yield
+        finally:
+            self._release(dag.name)
+
+    def active_runs(self, dag_name: Optional[str] = None) -> int:
+        """Quantidade de runs em execução ou enfileirados (de uma DAG ou no total)."""
+        with self._lock:
+            if dag_name is not None:
+                return self._active.get(dag_name, 0)
+            return sum(self._active.values())
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, dag, logical_date):
+        try:
+            return dag.execute(logical_date=logical_date)
+        except Exception as e:
+            logger.error("Erro ao executar DAG '%s': %s", dag.name, e)
+
+    def _release(self, dag_name):
+        with self._lock:
+            self._active[dag_name] -= 1
+            if self._active[dag_name] <= 0:
+                del self._active[dag_name]
+            self._lock.notify_all()
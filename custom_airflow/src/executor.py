@@ -1,50 +1,129 @@
 import os
+import signal
 import subprocess
-import sys
-from pathlib import Path
 import logging
+import threading
+
+from .metrics import histogram
+from .resources import ProcessLimits
+from .task_logs import TaskLogWriter, copy_stream
+from .venv_cache import get_venv_cache, venv_python
+from .worker_pool import WarmWorkerPool, get_warm_worker_pool
 
 logger = logging.getLogger(__name__)
 
+VENV_SETUP_SECONDS = histogram('venv_setup_duration_seconds',
+                               'Tempo para obter o ambiente virtual da tarefa (inclui construção, se necessária).')
+
+def kill_process_group(pid):
+    """
+    Mata o grupo de processos da tarefa (iniciada com ``start_new_session``).
+
+    Processos deixados em segundo plano pelo script não sobrevivem à tentativa:
+    eles segurariam o pipe da saída (e o slot do run) enquanto existissem.
+    """
+    if not hasattr(os, 'killpg'):
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
 class Executor:
-    def __init__(self, task, retries=3, timeout=60):
+    def __init__(self, task, timeout=60, log_path=None):
         self.task = task
-        self.venv_dir = Path('venvs') / self.task.name
-        self.retries = retries
+        self.venv_dir = None  # Definido por setup_venv a partir do cache compartilhado
         self.timeout = timeout  # Tempo máximo em segundos
+        # Prefixo do log da execução (stdout + stderr do script); None herda o stdout do scheduler
+        self.log_path = log_path
+        # 'subprocess': um interpretador novo por execução; 'warm': workers pré-aquecidos
+        self.mode = os.getenv('EXECUTOR_MODE', 'subprocess')
+        if self.mode == 'warm' and not WarmWorkerPool.supported():
+            self.mode = 'subprocess'
+        # Limites de CPU/memória do processo (setrlimit/cgroup); None se a tarefa não pede recursos
+        self.limits = ProcessLimits.for_task(task, timeout)
+        if self.limits is not None and self.mode == 'warm':
+            # Workers pré-aquecidos são compartilhados: os limites só valem com um processo por execução
+            self.mode = 'subprocess'
 
     def setup_venv(self):
-        if not self.venv_dir.exists():
-            logger.info(f"Configurando ambiente virtual para a tarefa '{self.task.name}'.")
-            subprocess.check_call([sys.executable, '-m', 'venv', str(self.venv_dir)])
-            # Instale dependências específicas se necessário
-            # subprocess.check_call([str(self.venv_dir / 'Scripts' / 'pip'), 'install', '-r', 'requirements.txt'])
-            logger.info(f"Ambiente virtual configurado para a tarefa '{self.task.name}'.")
+        # Ambientes são compartilhados entre tarefas com os mesmos requisitos e
+        # normalmente já foram construídos em segundo plano quando a DAG foi carregada
+        with VENV_SETUP_SECONDS.time():
+            self.venv_dir = get_venv_cache().ensure(getattr(self.task, 'requirements', None))
+        logger.info("Tarefa '%s' usando o ambiente virtual '%s'.", self.task.name, self.venv_dir)
 
     def run(self):
         try:
-            logger.info(f"Iniciando execução da tarefa '{self.task.name}'.")
+            logger.info("Iniciando execução da tarefa '%s'.", self.task.name)
             self.task.status = 'running'
             self.setup_venv()
             # Executa o script no venv
-            if os.name == 'nt':
-                python_executable = self.venv_dir / 'Scripts' / 'python.exe'
-            else:
-                python_executable = self.venv_dir / 'bin' / 'python'
-
-            # Iniciar a tarefa com timeout
-            result = subprocess.run(
-                [str(python_executable), self.task.script_path],
-                check=True,
-                timeout=self.timeout
-            )
+            python_executable = venv_python(self.venv_dir)
+
+            # Iniciar a tarefa com timeout; o ambiente não sai do cache enquanto ela roda
+            log = TaskLogWriter(self.log_path) if self.log_path else None
+            try:
+                with get_venv_cache().in_use(self.venv_dir):
+                    if self.mode == 'warm':
+                        get_warm_worker_pool().run(python_executable, self.task.script_path,
+                                                   timeout=self.timeout, log=log)
+                    else:
+                        self._run_process([str(python_executable), self.task.script_path], log)
+            finally:
+                if log is not None:
+                    log.close()
             self.task.status = 'success'
-            logger.info(f"Tarefa '{self.task.name}' concluída com sucesso.")
+            logger.info("Tarefa '%s' concluída com sucesso.", self.task.name)
         except subprocess.TimeoutExpired:
             self.task.status = 'failed'
-            logger.error(f"Erro: A tarefa '{self.task.name}' excedeu o tempo máximo de execução ({self.timeout} segundos).")
+            logger.error("Erro: A tarefa '%s' excedeu o tempo máximo de execução (%s segundos).",
+                         self.task.name, self.timeout)
             raise
         except subprocess.CalledProcessError as e:
             self.task.status = 'failed'
-            logger.error(f"Erro ao executar a tarefa '{self.task.name}': {e}")
+            logger.error("Erro ao executar a tarefa '%s': %s", self.task.name, e)
+            raise
+
+    def _run_process(self, command, log=None):
+        """
+        Como ``subprocess.run(check=True, timeout=...)``, com os limites da tarefa.
+
+        Com ``log`` a saída é copiada para o log em blocos; sem ele, herda o stdout do scheduler.
+        """
+        limits = self.limits
+        try:
+            process = subprocess.Popen(limits.wrap(command) if limits is not None else command,
+                                       stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE if log is not None else None,
+                                       stderr=subprocess.STDOUT if log is not None else None,
+                                       start_new_session=os.name == 'posix')
+        except BaseException:
+            if limits is not None:
+                limits.cleanup()
+            raise
+        pump = None
+        stop = threading.Event() if os.name == 'posix' else None
+        if log is not None:
+            pump = threading.Thread(target=copy_stream, args=(process.stdout, log, stop), name='task-log',
+                                    daemon=True)
+            pump.start()
+        try:
+            returncode = process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
             raise
+        finally:
+            # Filhos deixados pelo script morrem com o grupo e liberam o pipe
+            kill_process_group(process.pid)
+            if pump is not None:
+                if stop is not None:
+                    stop.set()
+                # O log só é fechado (em ``run``) depois que a cópia terminou
+                pump.join()
+                process.stdout.close()
+            if limits is not None:
+                limits.cleanup()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, command)
@@ -0,0 +1,135 @@
+"""
+Configuração do logging do scheduler.
+
+Os registros são apenas enfileirados pela thread que chama o logger
+(``QueueHandler``); uma thread em segundo plano (``QueueListener``) formata e
+grava no console e em ``LOG_FILE``. A mensagem (``%``-formatação) também é
+montada nessa thread, fora dos laços de agendamento e execução.
+
+``configure_logging`` deve ser chamada uma única vez pelo ponto de entrada
+(por exemplo ``scheduler.main``); importar os módulos não altera o logging.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Campos de contexto copiados para cada registro e incluídos no JSON
+CONTEXT_FIELDS = ('dag', 'dag_id', 'dag_run_id', 'task', 'task_id', 'execution_key', 'attempt', 'worker')
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_log_context: ContextVar[dict] = ContextVar('log_context', default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Anexa os campos (DAG, tarefa, execução...) a todos os registros feitos no bloco."""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copia o contexto atual para o registro, ainda na thread que fez o log."""
+
+    def filter(self, record):
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha, com os campos de contexto presentes no registro."""
+
+    def format(self, record):
+        data = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enfileira o registro sem formatá-lo: a fila é local ao processo, não precisa ser serializável."""
+
+    def prepare(self, record):
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                      fmt: Optional[str] = None) -> QueueListener:
+    """
+    Configura o logger raiz com a fila e inicia a thread de escrita (idempotente).
+
+    :param level: Nível mínimo (padrão: ``LOG_LEVEL`` ou INFO).
+    :param log_file: Arquivo de log (padrão: ``LOG_FILE`` ou scheduler.log; vazio desativa).
+    :param fmt: 'json' ou 'text' (padrão: ``LOG_FORMAT`` ou json).
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return _listener
+        level = level or os.getenv('LOG_LEVEL', 'INFO')
+        log_file = log_file if log_file is not None else os.getenv('LOG_FILE', 'scheduler.log')
+        fmt = fmt or os.getenv('LOG_FORMAT', 'json')
+
+        formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level.upper())
+
+        _queue_handler = queue_handler
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Grava os registros pendentes e encerra a thread de escrita."""
+    global _listener, _queue_handler
+    with _lock:
+        listener, _listener = _listener, None
+        queue_handler, _queue_handler = _queue_handler, None
+    if queue_handler is not None:
+        logging.getLogger().removeHandler(queue_handler)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
@@ -1,10 +1,33 @@
-from .models import Base, get_session
+from pathlib import Path
 
-def run_migrations():
-    """Cria as tabelas no banco de dados se elas não existirem."""
-    engine = get_session().bind
-    print(f"Criando tabelas no banco: {engine.url}")
-    Base.metadata.create_all(engine)
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from .models import get_engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+
+# Revisão que corresponde ao esquema criado por versões antigas com create_all
+BASELINE_REVISION = '0001_baseline'
+
+def get_alembic_config():
+    config = Config()
+    config.set_main_option('script_location', str(MIGRATIONS_DIR))
+    return config
+
+def run_migrations(revision='head'):
+    """Aplica as migrações do Alembic até ``revision``."""
+    engine = get_engine()
+    print(f"Migrando banco: {engine.url}")
+    config = get_alembic_config()
+    with engine.begin() as connection:
+        config.attributes['connection'] = connection
+        tables = inspect(connection).get_table_names()
+        if 'alembic_version' not in tables and 'dags' in tables:
+            # Banco criado antes das migrações: marca o esquema original como aplicado
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
     print("Migração concluída!")
 
 if __name__ == "__main__":
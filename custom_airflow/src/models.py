@@ -1,11 +1,15 @@
 from enum import Enum as PyEnum
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, Index, UniqueConstraint, event
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from .metrics import histogram
 
 
 
@@ -18,6 +22,13 @@ class TaskStatus(PyEnum):
     running = 'running'
     success = 'success'
     failed = 'failed'
+    skipped = 'skipped'  # Não executada: resultado reaproveitado do cache (task_cache)
+
+class DagRunState(PyEnum):
+    queued = 'queued'
+    running = 'running'
+    success = 'success'
+    failed = 'failed'
 
 class DAGModel(Base):
     __tablename__ = 'dags'
@@ -26,9 +37,14 @@ class DAGModel(Base):
     name = Column(String, unique=True)
     tasks = relationship('TaskModel', back_populates='dag')
     executions = relationship('ExecutionModel', back_populates='dag')
+    serialized = relationship('SerializedDagModel', back_populates='dag', uselist=False)
+    dag_runs = relationship('DagRunModel', back_populates='dag')
 
 class TaskModel(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_dag_id_name', 'dag_id', 'name'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String)
@@ -39,25 +55,149 @@ class TaskModel(Base):
     dag = relationship('DAGModel', back_populates='tasks')
     executions = relationship('ExecutionModel', back_populates='task')
 
+class DagRunModel(Base):
+    """Um run agendado (ou manual/backfill) da DAG, agrupando as execuções das tarefas."""
+    __tablename__ = 'dag_runs'
+    __table_args__ = (
+        UniqueConstraint('dag_id', 'logical_date', name='uq_dag_runs_dag_id_logical_date'),
+        Index('ix_dag_runs_dag_id_state', 'dag_id', 'state'),
+        Index('ix_dag_runs_state', 'state'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    dag_id = Column(Integer, ForeignKey('dags.id'), nullable=False)
+    logical_date = Column(DateTime, nullable=False)  # Horário (UTC) do intervalo agendado
+    run_type = Column(String(16), default='scheduled')  # 'scheduled', 'manual' ou 'backfill'
+    state = Column(Enum(DagRunState), default=DagRunState.queued)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    dag = relationship('DAGModel', back_populates='dag_runs')
+    executions = relationship('ExecutionModel', back_populates='dag_run')
+
 class ExecutionModel(Base):
     __tablename__ = 'executions'
+    __table_args__ = (
+        Index('ix_executions_dag_id_start_time', 'dag_id', 'start_time'),
+        Index('ix_executions_task_id_start_time', 'task_id', 'start_time'),
+        Index('ix_executions_status', 'status'),
+        Index('ix_executions_dag_run_id', 'dag_run_id'),
+        Index('ix_executions_execution_key', 'execution_key', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     dag_id = Column(Integer, ForeignKey('dags.id'))
     task_id = Column(Integer, ForeignKey('tasks.id'))
+    dag_run_id = Column(Integer, ForeignKey('dag_runs.id'))
     start_time = Column(DateTime)
     end_time = Column(DateTime)
     status = Column(Enum(TaskStatus))
+    attempt = Column(Integer, default=1)  # Número da tentativa (1 = primeira)
+    execution_key = Column(String(32))  # Identificador gerado no cliente (StateWriter)
+    log_path = Column(String(512))  # Prefixo dos arquivos de log da execução (task_logs)
     dag = relationship('DAGModel', back_populates='executions')
     task = relationship('TaskModel', back_populates='executions')
+    dag_run = relationship('DagRunModel', back_populates='executions')
 
+class TaskCacheModel(Base):
+    """Execução bem-sucedida de referência para cada impressão digital de tarefa (task_cache)."""
+    __tablename__ = 'task_cache'
+    __table_args__ = (
+        UniqueConstraint('task_id', 'fingerprint', name='uq_task_cache_task_id_fingerprint'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey('tasks.id'), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # Script, entradas, parâmetros e ambiente
+    execution_key = Column(String(32))  # Execução que produziu o resultado
+    created_at = Column(DateTime, nullable=False)
+
+class TaskQueueModel(Base):
+    """Tentativa de tarefa na fila distribuída, executada por um worker (task_queue/worker)."""
+    __tablename__ = 'task_queue'
+    __table_args__ = (
+        Index('ix_task_queue_state_priority', 'state', 'priority', 'id'),
+        Index('ix_task_queue_worker_id_state', 'worker_id', 'state'),
+        Index('ix_task_queue_claim_token', 'claim_token'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    dag_name = Column(String, nullable=False)
+    dag_id = Column(Integer, ForeignKey('dags.id'), nullable=False)
+    task_id = Column(Integer, ForeignKey('tasks.id'), nullable=False)
+    dag_run_id = Column(Integer, ForeignKey('dag_runs.id'))
+    attempt = Column(Integer, default=1)
+    execution_key = Column(String(32))  # Execução (linha em 'executions') da posse atual
+    payload = Column(Text, nullable=False)  # Task.to_dict() em JSON
+    priority = Column(Integer, default=0)
+    state = Column(String(16), nullable=False)  # 'queued', 'running', 'done' ou 'cancelled'
+    result = Column(String(16))  # TaskStatus final (state 'done')
+    worker_id = Column(String(64))
+    claim_token = Column(String(32))
+    requeues = Column(Integer, default=0)  # Vezes que voltou à fila por falha do worker
+    queued_at = Column(DateTime)
+    claimed_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+class WorkerModel(Base):
+    """Worker da fila distribuída e seu último heartbeat."""
+    __tablename__ = 'workers'
+
+    id = Column(String(64), primary_key=True)
+    hostname = Column(String)
+    pid = Column(Integer)
+    state = Column(String(16))  # 'running' ou 'stopped'
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+
+class SchedulerModel(Base):
+    """Processo do scheduler em alta disponibilidade (SCHEDULER_HA) e seu último heartbeat."""
+    __tablename__ = 'schedulers'
+
+    id = Column(String(64), primary_key=True)
+    hostname = Column(String)
+    pid = Column(Integer)
+    state = Column(String(16))  # 'running' ou 'stopped'
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+
+class DagLeaseModel(Base):
+    """Posse temporária de uma DAG por um scheduler: só o dono dispara os runs dela."""
+    __tablename__ = 'dag_leases'
+
+    dag_name = Column(String, primary_key=True)
+    scheduler_id = Column(String(64))  # None: liberada pelo último dono
+    acquired_at = Column(DateTime)
+    renewed_at = Column(DateTime)  # Último instante em que o dono certamente disparava os runs
+    expires_at = Column(DateTime, nullable=False)
+
+class SerializedDagModel(Base):
+    """Forma serializada (JSON) da DAG, usada sem reimportar o arquivo Python."""
+    __tablename__ = 'serialized_dags'
+
+    dag_id = Column(Integer, ForeignKey('dags.id'), primary_key=True)
+    fileloc = Column(String)
+    file_hash = Column(String(64))  # Hash do arquivo .py de origem
+    dag_hash = Column(String(64))  # Hash do conteúdo serializado
+    data = Column(Text)
+    updated_at = Column(DateTime)
+    dag = relationship('DAGModel', back_populates='serialized')
+
+
+# Engine e fábrica de sessões compartilhadas pelo processo inteiro. São criadas
+# sob demanda na primeira chamada e reaproveitadas por todas as execuções, de
+# modo que cada tarefa não pague uma nova conexão/handshake com o banco.
+_engine = None
+_session_factory = None
+_scoped_session = None
+_engine_lock = threading.Lock()
+
+
+def get_database_url():
+    """Monta a URL do banco, escolhendo entre SQLite (dev) e PostgreSQL (produção)."""
 
-def get_session():
-    """Retorna a sessão do banco de dados, escolhendo entre SQLite (dev) e
-       PostgreSQL (produção)."""
-    
     env = os.getenv("ENV", "development")  # Padrão é "development" se a variável não estiver definida
-    
+
     if env == "production":
         # Configuração para PostgreSQL (produção)
         db_user = os.getenv('POSTGRES_USER', 'postgres')
@@ -66,15 +206,118 @@ def get_session():
         db_port = os.getenv('POSTGRES_PORT', '5432')
         db_name = os.getenv('POSTGRES_DB', 'dag-flow')
 
-        DATABASE_URL = f'postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}'
+        return f'postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}'
+
+    # Configuração para SQLite (desenvolvimento)
+    db_name = os.getenv('SQLITE_DB', 'dev.db')  # Nome do banco SQLite
+    return f'sqlite:///{db_name}'  # Caminho local do banco
+
+
+def _engine_options(database_url):
+    """Opções do pool de conexões, configuráveis por variáveis de ambiente."""
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    }
+    if database_url.startswith('sqlite'):
+        options['connect_args'] = {"check_same_thread": False}
+        if database_url in ('sqlite://', 'sqlite:///:memory:'):
+            # Banco em memória não suporta pool com várias conexões
+            return options
+    options['pool_size'] = int(os.getenv('DB_POOL_SIZE', '5'))
+    options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    options['pool_timeout'] = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    return options
+
+
+DB_COMMIT_SECONDS = histogram('db_commit_duration_seconds', 'Duração dos commits das sessões (flush + COMMIT).')
+
+
+def _instrument_session_factory(factory):
+    """Mede a latência de cada commit das sessões criadas pela fábrica."""
+    @event.listens_for(factory, 'before_commit')
+    def _before_commit(session):
+        session.info['commit_started'] = time.perf_counter()
+
+    @event.listens_for(factory, 'after_commit')
+    def _after_commit(session):
+        started = session.info.pop('commit_started', None)
+        if started is not None:
+            DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+    @event.listens_for(factory, 'after_rollback')
+    def _after_rollback(session):
+        session.info.pop('commit_started', None)
+
+
+def get_engine():
+    """Retorna o engine compartilhado do processo, criando-o na primeira chamada."""
+    global _engine, _session_factory, _scoped_session
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                database_url = get_database_url()
+                engine = create_engine(database_url, **_engine_options(database_url))
+                _session_factory = sessionmaker(bind=engine)
+                _instrument_session_factory(_session_factory)
+                _scoped_session = scoped_session(_session_factory)
+                _engine = engine
+    return _engine
+
+
+def get_session():
+    """Retorna uma nova sessão ligada ao engine (e pool) compartilhado do processo."""
+    get_engine()
+    return _session_factory()
+
+
+def get_scoped_session():
+    """Retorna a sessão associada à thread atual.
+
+    Chamadas repetidas na mesma thread devolvem a mesma sessão; use
+    ``remove_scoped_session`` ao final do trabalho da thread.
+    """
+    get_engine()
+    return _scoped_session()
+
+
+def remove_scoped_session():
+    """Fecha e descarta a sessão associada à thread atual, se houver."""
+    if _scoped_session is not None:
+        _scoped_session.remove()
+
+
+def dispose_engine():
+    """Fecha todas as conexões do pool e descarta o engine compartilhado.
+
+    A próxima chamada a ``get_engine``/``get_session`` cria um engine novo, lendo
+    novamente as variáveis de ambiente.
+    """
+    global _engine, _session_factory, _scoped_session
+    with _engine_lock:
+        if _scoped_session is not None:
+            _scoped_session.remove()
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+        _scoped_session = None
+
+
+def reset_engine_after_fork():
+    """Descarta o pool herdado do processo pai sem fechar as conexões dele.
+
+    Conexões abertas pelo pai não podem ser usadas pelo filho; ``close=False``
+    apenas abandona as referências, deixando o socket para o processo pai.
+    """
+    global _engine, _session_factory, _scoped_session, _engine_lock
+    _engine_lock = threading.Lock()
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+    _session_factory = None
+    _scoped_session = None
 
-    else:
-        # Configuração para SQLite (desenvolvimento)
-        db_name = os.getenv('SQLITE_DB', 'dev.db')  # Nome do banco SQLite
-        DATABASE_URL = f'sqlite:///{db_name}'  # Caminho local do banco
 
-    # Criar engine e sessão
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
-    Session = sessionmaker(bind=engine)
-    
-    return Session()
\ No newline at end of file
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_engine_after_fork)
@@ -0,0 +1,344 @@
+"""
+Pools de recursos, admissão das tarefas e limites dos processos.
+
+Antes de rodar o script, cada tentativa obtém do ``ResourceManager`` do
+processo (compartilhado por todas as DAGs) os recursos que declara:
+
+- ``pool``/``pool_slots``: slots de um pool nomeado (``TASK_POOLS=db_heavy=2,api=5``);
+- ``cpus``/``memory_mb``: parte da capacidade da máquina (``RESOURCE_CPUS``,
+  ``RESOURCE_MEMORY_MB``; por padrão, CPUs e memória física);
+- uma vaga no limite global ``MAX_ACTIVE_TASKS`` (0 = sem limite).
+
+A fila de espera é ordenada pelo ``priority_weight`` da tarefa, que cresce com
+o tempo de espera (``RESOURCE_AGING_SECONDS``), e, no empate, favorece a DAG
+com menos tarefas em andamento. Uma tarefa que não cabe reserva os recursos de
+que precisa: as de menor prioridade não passam à frente dela nesses recursos.
+
+Os pedidos de CPU e memória também limitam o processo da tarefa
+(``ProcessLimits``): ``setrlimit`` de memória (RLIMIT_AS) e de tempo de CPU
+(``cpus × timeout``) e, com ``TASK_CGROUP_ROOT`` apontando para um diretório
+cgroup v2 com permissão de escrita, ``memory.max`` e ``cpu.max`` em um cgroup
+por execução. Ambos são aplicados pelo ``task_launcher`` antes do ``exec`` do script.
+
+Todos esses limites valem por processo: com ``EXECUTOR_BACKEND=queue`` cada
+worker tem o seu ``ResourceManager``, então ``db_heavy=2`` com três workers
+permite até seis tarefas do pool ao mesmo tempo (``warn_per_process_limits``).
+"""
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .metrics import gauge
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+TASK_LAUNCHER_SCRIPT = Path(__file__).resolve().parent / 'task_launcher.py'
+
+POOL_SLOTS_USED = gauge('pool_slots_used', 'Slots em uso em cada pool de recursos.', ('pool',))
+TASKS_WAITING_RESOURCES = gauge('tasks_waiting_resources', 'Tentativas aguardando recursos para iniciar.')
+
+
+def parse_pools(value: str) -> Dict[str, int]:
+    """``'db_heavy=2,api=5'`` -> ``{'db_heavy': 2, 'api': 5}``."""
+    pools = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, slots = item.partition('=')
+        if not slots.strip().isdigit():
+            raise ValueError(f"Pool inválido em TASK_POOLS: '{item}' (use nome=slots).")
+        pools[name.strip()] = int(slots)
+    return pools
+
+
+def _physical_memory_mb() -> int:
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+class ResourceRequest:
+    """Recursos pedidos por uma tentativa."""
+    __slots__ = ('pool', 'pool_slots', 'cpus', 'memory_mb')
+
+    def __init__(self, pool: Optional[str] = None, pool_slots: int = 1, cpus: float = 0.0, memory_mb: int = 0):
+        self.pool = pool
+        self.pool_slots = pool_slots
+        self.cpus = cpus or 0.0
+        self.memory_mb = memory_mb or 0
+
+    @classmethod
+    def for_task(cls, task) -> 'ResourceRequest':
+        return cls(getattr(task, 'pool', None), getattr(task, 'pool_slots', 1), getattr(task, 'cpus', None),
+                   getattr(task, 'memory_mb', None))
+
+
+class _Waiter:
+    __slots__ = ('request', 'priority', 'dag', 'seq', 'enqueued', 'notify', 'granted')
+
+    def __init__(self, request: ResourceRequest, priority: float, dag: str, seq: int, notify: Callable[[], None]):
+        self.request = request
+        self.priority = priority
+        self.dag = dag
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.notify = notify
+        self.granted = False
+
+
+class ResourceManager:
+    """Admissão das tentativas de todas as DAGs do processo (pools, CPU, memória e limite global)."""
+
+    def __init__(self, pools: Optional[Dict[str, int]] = None, max_active_tasks: Optional[int] = None,
+                 cpus: Optional[float] = None, memory_mb: Optional[int] = None,
+                 aging_seconds: Optional[float] = None):
+        self.pools = pools if pools is not None else parse_pools(os.getenv('TASK_POOLS', ''))
+        self.max_active_tasks = (max_active_tasks if max_active_tasks is not None
+                                 else int(os.getenv('MAX_ACTIVE_TASKS', '0')))
+        self.cpus = cpus or float(os.getenv('RESOURCE_CPUS', '0')) or float(os.cpu_count() or 1)
+        self.memory_mb = memory_mb or int(os.getenv('RESOURCE_MEMORY_MB', '0')) or _physical_memory_mb()
+        # A cada aging_seconds de espera a prioridade efetiva aumenta 1
+        self.aging_seconds = aging_seconds or float(os.getenv('RESOURCE_AGING_SECONDS', '60'))
+        self._lock = threading.Lock()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._pool_used: Dict[str, int] = {name: 0 for name in self.pools}
+        self._cpus_used = 0.0
+        self._memory_used = 0
+        self._active = 0
+        self._active_by_dag: Dict[str, int] = {}
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {'active': self._active, 'waiting': len(self._waiters), 'cpus': self._cpus_used,
+                    'memory_mb': self._memory_used, 'pools': dict(self._pool_used)}
+
+    def _validate(self, request: ResourceRequest):
+        if request.pool is not None:
+            if request.pool not in self.pools:
+                raise ValueError(f"Pool '{request.pool}' não configurado (TASK_POOLS).")
+            if request.pool_slots > self.pools[request.pool]:
+                raise ValueError(f"A tarefa pede {request.pool_slots} slot(s) do pool '{request.pool}', "
+                                 f"que tem {self.pools[request.pool]}.")
+        if request.cpus > self.cpus:
+            raise ValueError(f"A tarefa pede {request.cpus} CPU(s); a capacidade é {self.cpus}.")
+        if self.memory_mb and request.memory_mb > self.memory_mb:
+            raise ValueError(f"A tarefa pede {request.memory_mb} MB; a capacidade é {self.memory_mb} MB.")
+
+    def _blockers(self, request: ResourceRequest) -> set:
+        """Recursos que impedem o pedido de ser atendido agora (vazio se cabe)."""
+        blockers = set()
+        if self.max_active_tasks and self._active >= self.max_active_tasks:
+            blockers.add('tasks')
+        if request.pool is not None and self._pool_used[request.pool] + request.pool_slots > self.pools[request.pool]:
+            blockers.add(f'pool:{request.pool}')
+        if request.cpus and self._cpus_used + request.cpus > self.cpus + 1e-9:
+            blockers.add('cpus')
+        if request.memory_mb and self.memory_mb and self._memory_used + request.memory_mb > self.memory_mb:
+            blockers.add('memory')
+        return blockers
+
+    @staticmethod
+    def _needs(request: ResourceRequest) -> set:
+        needs = {'tasks'}
+        if request.pool is not None:
+            needs.add(f'pool:{request.pool}')
+        if request.cpus:
+            needs.add('cpus')
+        if request.memory_mb:
+            needs.add('memory')
+        return needs
+
+    def _grant(self, waiter: _Waiter):
+        request = waiter.request
+        if request.pool is not None:
+            self._pool_used[request.pool] += request.pool_slots
+            POOL_SLOTS_USED.set(self._pool_used[request.pool], pool=request.pool)
+        self._cpus_used += request.cpus
+        self._memory_used += request.memory_mb
+        self._active += 1
+        self._active_by_dag[waiter.dag] = self._active_by_dag.get(waiter.dag, 0) + 1
+        waiter.granted = True
+
+    def _dispatch(self) -> List[_Waiter]:
+        """Atende os pedidos que cabem, em ordem de prioridade (com o lock). Retorna os atendidos."""
+        if not self._waiters:
+            return []
+        now = time.monotonic()
+        ordered = sorted(self._waiters, key=lambda w: (-(w.priority + (now - w.enqueued) / self.aging_seconds),
+                                                       self._active_by_dag.get(w.dag, 0), w.seq))
+        reserved, granted = set(), []
+        for waiter in ordered:
+            blockers = self._blockers(waiter.request)
+            needs = self._needs(waiter.request)
+            if blockers or needs & reserved:
+                # Os de menor prioridade não passam à frente nos recursos que este espera
+                reserved |= blockers
+                continue
+            self._grant(waiter)
+            granted.append(waiter)
+        if granted:
+            granted_ids = {id(w) for w in granted}
+            self._waiters = [w for w in self._waiters if id(w) not in granted_ids]
+        TASKS_WAITING_RESOURCES.set(len(self._waiters))
+        return granted
+
+    def _enqueue(self, request: ResourceRequest, priority: float, dag: str, notify: Callable[[], None]) -> _Waiter:
+        self._validate(request)
+        with self._lock:
+            waiter = _Waiter(request, priority, dag, next(self._seq), notify)
+            self._waiters.append(waiter)
+            granted = self._dispatch()
+        for w in granted:
+            w.notify()
+        return waiter
+
+    def _release(self, waiter: _Waiter):
+        """Devolve os recursos (ou retira o pedido da fila, se ainda não foi atendido)."""
+        with self._lock:
+            if not waiter.granted:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    TASKS_WAITING_RESOURCES.set(len(self._waiters))
+                return
+            waiter.granted = False
+            request = waiter.request
+            if request.pool is not None:
+                self._pool_used[request.pool] -= request.pool_slots
+                POOL_SLOTS_USED.set(self._pool_used[request.pool], pool=request.pool)
+            self._cpus_used -= request.cpus
+            self._memory_used -= request.memory_mb
+            self._active -= 1
+            self._active_by_dag[waiter.dag] -= 1
+            if not self._active_by_dag[waiter.dag]:
+                del self._active_by_dag[waiter.dag]
+            granted = self._dispatch()
+        for w in granted:
+            w.notify()
+
+    @contextmanager
+    def lease(self, task, dag: str = ''):
+        """Bloqueia até os recursos da tarefa estarem disponíveis e os devolve ao sair do bloco."""
+        event = threading.Event()
+        waiter = self._enqueue(ResourceRequest.for_task(task), getattr(task, 'priority_weight', 1), dag, event.set)
+        if not event.is_set():
+            logger.info("Tarefa '%s' aguardando recursos.", task.name)
+            event.wait()
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    @asynccontextmanager
+    async def lease_async(self, task, dag: str = ''):
+        """Como ``lease``, sem bloquear o loop; cancelar a espera retira o pedido da fila."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(ResourceRequest.for_task(task), getattr(task, 'priority_weight', 1), dag, notify)
+        try:
+            await future
+            yield
+        finally:
+            self._release(waiter)
+
+
+_resource_manager = None
+_resource_manager_lock = threading.Lock()
+
+
+def get_resource_manager() -> ResourceManager:
+    """Gerenciador de recursos compartilhado pelo processo."""
+    global _resource_manager
+    if _resource_manager is None:
+        with _resource_manager_lock:
+            if _resource_manager is None:
+                _resource_manager = ResourceManager()
+    return _resource_manager
+
+
+def warn_per_process_limits(process: str):
+    """Avisa que pools e ``MAX_ACTIVE_TASKS`` não são compartilhados entre os workers da fila."""
+    limits = [name for name in ('TASK_POOLS', 'MAX_ACTIVE_TASKS') if os.getenv(name, '').strip() not in ('', '0')]
+    if limits:
+        logger.warning("%s: %s são aplicados por cada worker da fila separadamente; o total no cluster é a "
+                       "soma dos limites de todos os workers.", process, ', '.join(limits))
+
+
+class ProcessLimits:
+    """Limites de CPU e memória aplicados ao processo de uma tentativa."""
+
+    def __init__(self, cpus: float = 0.0, memory_mb: int = 0, timeout: Optional[float] = None,
+                 cgroup_root: Optional[str] = None):
+        self.cpus = cpus or 0.0
+        self.memory_mb = memory_mb or 0
+        self.timeout = timeout
+        self.cgroup_root = cgroup_root if cgroup_root is not None else os.getenv('TASK_CGROUP_ROOT', '')
+        self.cgroup: Optional[Path] = None
+
+    @classmethod
+    def for_task(cls, task, timeout: Optional[float] = None) -> Optional['ProcessLimits']:
+        """Limites da tarefa, ou None se ela não pede CPU nem memória."""
+        cpus, memory_mb = getattr(task, 'cpus', None), getattr(task, 'memory_mb', None)
+        if not cpus and not memory_mb:
+            return None
+        return cls(cpus, memory_mb, timeout)
+
+    def wrap(self, command: List[str]) -> List[str]:
+        """
+        Comando que roda ``command`` (``[python, script, ...]``) sob os limites.
+
+        O ``task_launcher`` entra no cgroup (preparado aqui, se ``TASK_CGROUP_ROOT``)
+        e aplica os ``setrlimit`` antes do ``exec`` do script, então nada do que o
+        script aloca ou dispara escapa dos limites.
+        """
+        options = []
+        if resource is not None:
+            if self.memory_mb:
+                options += ['--memory-bytes', str(self.memory_mb * 1024 * 1024)]
+            # Tempo de CPU: a tarefa não pode usar mais que ``cpus`` núcleos durante todo o timeout
+            if self.cpus and self.timeout:
+                options += ['--cpu-seconds', str(int(self.cpus * self.timeout) + 1)]
+        cgroup = self._prepare_cgroup()
+        if cgroup is not None:
+            options += ['--cgroup', str(cgroup)]
+        return [command[0], str(TASK_LAUNCHER_SCRIPT), *options, '--', *command[1:]]
+
+    def _prepare_cgroup(self) -> Optional[Path]:
+        """Cria o cgroup da execução com ``memory.max``/``cpu.max`` (se configurado)."""
+        if not self.cgroup_root:
+            return None
+        try:
+            cgroup = Path(self.cgroup_root) / f'task-{uuid.uuid4().hex[:12]}'
+            cgroup.mkdir()
+            self.cgroup = cgroup
+            if self.memory_mb:
+                (cgroup / 'memory.max').write_text(str(self.memory_mb * 1024 * 1024))
+            if self.cpus:
+                (cgroup / 'cpu.max').write_text(f'{int(self.cpus * 100000)} 100000')
+        except OSError as e:
+            logger.warning("Não foi possível aplicar o cgroup em %s: %s", self.cgroup_root, e)
+            self.cleanup()
+        return self.cgroup
+
+    def cleanup(self):
+        if self.cgroup is not None:
+            try:
+                self.cgroup.rmdir()
+            except OSError as e:
+                logger.debug("Cgroup %s não removido: %s", self.cgroup, e)
+            self.cgroup = None
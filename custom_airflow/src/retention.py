@@ -0,0 +1,273 @@
+"""
+Retenção do histórico de execuções.
+
+Execuções mais antigas que ``RETENTION_DAYS`` são copiadas para arquivos JSONL
+comprimidos (gzip), particionados por dia de início, e então apagadas da tabela
+``executions`` em lotes de tamanho limitado. Os arquivos continuam consultáveis
+com ``read_archived_executions``/``query_executions``. Os logs das execuções
+arquivadas (``log_path``) são apagados junto, a menos que
+``RETENTION_DELETE_LOGS=false``.
+
+Layout: ``<ARCHIVE_DIR>/executions/dt=AAAA-MM-DD/part-<id>.jsonl.gz``
+
+Uso pela linha de comando::
+
+    python -m custom_airflow.src.retention --days 30
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, select, text
+
+from .logging_config import configure_logging
+from .models import ExecutionModel, TaskStatus, get_engine, get_session
+from .task_logs import delete_log
+from .task_queue import purge_finished_jobs
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = ('id', 'dag_id', 'task_id', 'dag_run_id', 'execution_key', 'attempt',
+                   'start_time', 'end_time', 'status', 'log_path')
+DATETIME_COLUMNS = ('start_time', 'end_time')
+
+
+def get_archive_dir() -> Path:
+    return Path(os.getenv('ARCHIVE_DIR', 'archive'))
+
+
+def _partition_dir(archive_dir: Path, day: date) -> Path:
+    return archive_dir / 'executions' / f'dt={day.isoformat()}'
+
+
+def _to_record(row) -> dict:
+    record = {column: getattr(row, column) for column in ARCHIVE_COLUMNS}
+    for column in DATETIME_COLUMNS:
+        if record[column] is not None:
+            record[column] = record[column].isoformat()
+    if isinstance(record['status'], TaskStatus):
+        record['status'] = record['status'].value
+    return record
+
+
+def _from_record(record: dict) -> dict:
+    for column in DATETIME_COLUMNS:
+        if record.get(column):
+            record[column] = datetime.fromisoformat(record[column])
+    return record
+
+
+def _write_part(partition: Path, records: List[dict]):
+    """Grava um arquivo de partição de forma atômica (temporário + rename)."""
+    partition.mkdir(parents=True, exist_ok=True)
+    name = f'part-{uuid.uuid4().hex}.jsonl.gz'
+    tmp_path = partition / f'.{name}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    os.replace(tmp_path, partition / name)
+
+
+def archive_executions(older_than_days: Optional[float] = None, archive_dir: Optional[Path] = None,
+                       batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """
+    Arquiva e apaga as execuções com ``start_time`` anterior ao limite de retenção.
+
+    Cada lote é gravado no arquivo antes de ser apagado do banco; se o processo
+    cair entre os dois passos, o lote pode aparecer duplicado no arquivo, e a
+    leitura descarta as duplicatas pelo ``id``.
+
+    :return: Quantidade de execuções arquivadas.
+    """
+    if older_than_days is None:
+        # RETENTION_DAYS=0 apenas desliga o arquivamento automático; aqui vale o padrão
+        older_than_days = float(os.getenv('RETENTION_DAYS', '0') or 0) or 30.0
+    archive_dir = Path(archive_dir or get_archive_dir())
+    batch_size = batch_size or int(os.getenv('RETENTION_BATCH_SIZE', '1000'))
+    delete_logs = os.getenv('RETENTION_DELETE_LOGS', 'true').lower() == 'true'
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    table = ExecutionModel.__table__
+
+    total = 0
+    while True:
+        session = get_session()
+        try:
+            rows = session.execute(
+                select(table).where(table.c.start_time < cutoff).order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            by_day: Dict[date, List[dict]] = defaultdict(list)
+            for row in rows:
+                by_day[row.start_time.date()].append(_to_record(row))
+            for day, records in by_day.items():
+                _write_part(_partition_dir(archive_dir, day), records)
+            session.execute(delete(table).where(table.c.id.in_([row.id for row in rows])))
+            session.commit()
+            total += len(rows)
+        finally:
+            session.close()
+        if delete_logs:
+            # Só depois do commit: uma falha antes disso mantém a execução e o log
+            for row in rows:
+                if row.log_path:
+                    try:
+                        delete_log(row.log_path)
+                    except OSError as e:
+                        logger.warning("Erro ao apagar o log %s: %s", row.log_path, e)
+        if len(rows) < batch_size:
+            break
+
+    if total:
+        logger.info("%s execução(ões) anteriores a %s arquivada(s) em %s.", total, cutoff, archive_dir)
+    return total
+
+
+def read_archived_executions(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             dag_id: Optional[int] = None, status: Optional[str] = None,
+                             archive_dir: Optional[Path] = None) -> Iterator[dict]:
+    """
+    Lê as execuções arquivadas com ``start <= start_time < end``.
+
+    Apenas as partições (dias) dentro do intervalo são abertas.
+    """
+    root = Path(archive_dir or get_archive_dir()) / 'executions'
+    if not root.exists():
+        return
+    status = status.value if isinstance(status, TaskStatus) else status
+    for partition in sorted(root.glob('dt=*')):
+        day = date.fromisoformat(partition.name[3:])
+        if (start and day < start.date()) or (end and day > end.date()):
+            continue
+        seen = set()
+        for part in sorted(partition.glob('part-*.jsonl.gz')):
+            with gzip.open(part, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record['id'] in seen:
+                        continue
+                    seen.add(record['id'])
+                    if dag_id is not None and record['dag_id'] != dag_id:
+                        continue
+                    if status is not None and record['status'] != status:
+                        continue
+                    record = _from_record(record)
+                    if (start and record['start_time'] < start) or (end and record['start_time'] >= end):
+                        continue
+                    yield record
+
+
+def query_executions(start: datetime, end: datetime, dag_id: Optional[int] = None,
+                     include_archive: bool = True) -> List[dict]:
+    """Execuções no intervalo, juntando a tabela ``executions`` e, se pedido, o arquivo."""
+    table = ExecutionModel.__table__
+    query = select(table).where(table.c.start_time >= start, table.c.start_time < end)
+    if dag_id is not None:
+        query = query.where(table.c.dag_id == dag_id)
+    session = get_session()
+    try:
+        records = [_from_record(_to_record(row)) for row in session.execute(query)]
+    finally:
+        session.close()
+    if include_archive:
+        hot_ids = {record['id'] for record in records}
+        records.extend(r for r in read_archived_executions(start, end, dag_id=dag_id) if r['id'] not in hot_ids)
+    records.sort(key=lambda r: r['start_time'])
+    return records
+
+
+def compact_archive(archive_dir: Optional[Path] = None, min_parts: int = 2) -> int:
+    """
+    Junta os vários arquivos ``part-*`` de cada dia em um único arquivo.
+
+    :return: Quantidade de partições compactadas.
+    """
+    root = Path(archive_dir or get_archive_dir()) / 'executions'
+    compacted = 0
+    for partition in sorted(root.glob('dt=*')) if root.exists() else []:
+        parts = sorted(partition.glob('part-*.jsonl.gz'))
+        if len(parts) < min_parts:
+            continue
+        records, seen = [], set()
+        for part in parts:
+            with gzip.open(part, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record['id'] not in seen:
+                        seen.add(record['id'])
+                        records.append(record)
+        records.sort(key=lambda r: r['id'])
+        _write_part(partition, records)
+        for part in parts:
+            part.unlink()
+        compacted += 1
+    return compacted
+
+
+def vacuum_database():
+    """Devolve ao sistema o espaço liberado pelas exclusões (SQLite: VACUUM)."""
+    engine = get_engine()
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+
+
+def run_retention(vacuum: bool = False) -> int:
+    archived = archive_executions()
+    # Jobs concluídos da fila distribuída não têm histórico próprio: o resultado está em 'executions'
+    purge_finished_jobs(timedelta(days=float(os.getenv('RETENTION_DAYS', '0') or 0) or 30.0))
+    compact_archive()
+    if vacuum and archived:
+        vacuum_database()
+    return archived
+
+
+def start_retention_worker(interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """
+    Executa a retenção periodicamente em uma thread daemon.
+
+    Desabilitada (retorna None) quando ``RETENTION_DAYS`` não está definido ou é 0.
+    """
+    if float(os.getenv('RETENTION_DAYS', '0') or 0) <= 0:
+        return None
+    interval = interval or float(os.getenv('RETENTION_INTERVAL', '3600'))
+
+    def loop():
+        stop = threading.Event()
+        while not stop.wait(interval):
+            try:
+                run_retention()
+            except Exception as e:
+                logger.error("Erro na retenção do histórico de execuções: %s", e)
+
+    thread = threading.Thread(target=loop, name='retention', daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arquiva e remove execuções antigas.")
+    parser.add_argument('--days', type=float, default=None, help="Idade mínima (dias) para arquivar.")
+    parser.add_argument('--archive-dir', default=None, help="Diretório dos arquivos (padrão: ARCHIVE_DIR).")
+    parser.add_argument('--batch-size', type=int, default=None, help="Execuções por lote.")
+    parser.add_argument('--vacuum', action='store_true', help="Executa VACUUM no SQLite ao final.")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    archived = archive_executions(args.days, args.archive_dir, args.batch_size)
+    compact_archive(args.archive_dir)
+    if args.vacuum and archived:
+        vacuum_database()
+    print(f"{archived} execução(ões) arquivada(s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class ScheduleQueue:
+    """Fila de prioridade com o próximo horário de execução de cada DAG.
+
+    Mantém um heap ordenado por ``next_run``; o scheduler dorme exatamente até o
+    primeiro vencimento em vez de varrer todas as DAGs a cada ciclo. Entradas
+    reagendadas ou removidas ficam obsoletas no heap e são descartadas na
+    leitura (remoção preguiçosa).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._entries: Dict[str, Tuple[datetime, int]] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._changed = False
+        # Métricas de atraso (lag) entre o horário previsto e o disparo real
+        self._due_count = 0
+        self._lag_last = 0.0
+        self._lag_max = 0.0
+        self._lag_total = 0.0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def __contains__(self, dag_name):
+        with self._cond:
+            return dag_name in self._entries
+
+    def schedule(self, dag_name: str, next_run: datetime):
+        """Agenda (ou reagenda) a DAG para ``next_run`` e acorda quem estiver esperando."""
+        with self._cond:
+            seq = next(self._counter)
+            self._entries[dag_name] = (next_run, seq)
+            heapq.heappush(self._heap, (next_run, seq, dag_name))
+            self._compact_locked()
+            self._changed = True
+            self._cond.notify_all()
+
+    def remove(self, dag_name: str):
+        """Remove a DAG da fila. A entrada no heap é descartada depois."""
+        with self._cond:
+            if self._entries.pop(dag_name, None) is not None:
+                self._compact_locked()
+                self._changed = True
+                self._cond.notify_all()
+
+    def next_run(self, dag_name: str) -> Optional[datetime]:
+        with self._cond:
+            entry = self._entries.get(dag_name)
+            return entry[0] if entry else None
+
+    def peek(self) -> Optional[Tuple[str, datetime]]:
+        """Retorna ``(dag_name, next_run)`` da DAG com vencimento mais próximo."""
+        with self._cond:
+            item = self._peek_locked()
+            return (item[2], item[0]) if item else None
+
+    def pop_due(self, now: datetime) -> List[Tuple[str, datetime]]:
+        """Retira da fila todas as DAGs vencidas até ``now``, em ordem de vencimento.
+
+        O chamador é responsável por reagendar cada DAG retornada.
+        """
+        due = []
+        with self._cond:
+            while True:
+                item = self._peek_locked()
+                if item is None or item[0] > now:
+                    break
+                next_run, _, dag_name = heapq.heappop(self._heap)
+                del self._entries[dag_name]
+                self._record_lag_locked((now - next_run).total_seconds())
+                due.append((dag_name, next_run))
+        return due
+
+    def wait(self, timeout: Optional[float] = None, now: Optional[datetime] = None) -> bool:
+        """Bloqueia até o próximo vencimento, até ``timeout`` segundos ou até a fila mudar.
+
+        :return: True se acordou por alteração na fila (nova DAG ou reagendamento).
+        """
+        with self._cond:
+            if not self._changed:
+                delay = timeout
+                item = self._peek_locked()
+                if item is not None:
+                    current = now or datetime.now(item[0].tzinfo)
+                    until_due = max(0.0, (item[0] - current).total_seconds())
+                    delay = until_due if delay is None else min(delay, until_due)
+                if delay is None or delay > 0:
+                    self._cond.wait(delay)
+            changed = self._changed
+            self._changed = False
+            return changed
+
+    def wake(self):
+        """Acorda imediatamente quem estiver em ``wait``."""
+        with self._cond:
+            self._changed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """Métricas de atraso do agendamento, em segundos."""
+        with self._cond:
+            return {
+                'scheduled_dags': len(self._entries),
+                'due_count': self._due_count,
+                'lag_last_seconds': self._lag_last,
+                'lag_max_seconds': self._lag_max,
+                'lag_avg_seconds': self._lag_total / self._due_count if self._due_count else 0.0,
+            }
+
+    def _peek_locked(self):
+        while self._heap:
+            next_run, seq, dag_name = self._heap[0]
+            entry = self._entries.get(dag_name)
+            if entry is not None and entry[1] == seq:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _compact_locked(self):
+        # Evita que entradas obsoletas façam o heap crescer sem limite
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(run, seq, name) for name, (run, seq) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _record_lag_locked(self, lag):
+        lag = max(0.0, lag)
+        self._due_count += 1
+        self._lag_last = lag
+        self._lag_total += lag
+        if lag > self._lag_max:
+            self._lag_max = lag
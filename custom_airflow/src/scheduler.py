@@ -2,8 +2,8 @@ import os
 import sys
 from pathlib import Path
 import logging
+import threading
 import time
-import importlib.util
 from datetime import datetime
 from zoneinfo import ZoneInfo 
 
@@ -11,24 +11,27 @@ from dotenv import load_dotenv
 
 from croniter import croniter
 
-from .models import DAGModel, get_session  #TaskModel, ExecutionModel,  TaskStatus
+from .schedule_queue import ScheduleQueue
+from .dispatcher import DagRunDispatcher
+from .dag_index import DagFileEntry, DagFileIndex, InotifyWatcher, file_hash
+from .dag_processor import DagProcessor, load_dag_file
+from .dag_parser import DAG
+from .dag_store import delete_dag, load_serialized_dags, write_dag
+from .venv_cache import get_venv_cache, venv_python
+from .worker_pool import get_warm_worker_pool
+from .retention import start_retention_worker
+from .resources import warn_per_process_limits
+from .logging_config import configure_logging
+from .backfill import catchup
+from .metrics import gauge, histogram, start_metrics_server
+from .scheduler_ha import SchedulerCoordinator
 
-#from .dag_parser import DAG
 #import schedule
 
 
 timezone = ZoneInfo("UTC") 
 
-# Configuração do Logging
-logging.basicConfig(
-    level=logging.INFO,  # Ajuste para DEBUG para mais detalhes
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("scheduler.log"),
-        logging.StreamHandler()
-    ]
-)
-
+# O logging é configurado em main() (configure_logging), não na importação
 logger = logging.getLogger(__name__)
 
 # Obtém o diretório do projeto (raiz do repositório)
@@ -47,9 +50,9 @@ print (BASE_DIR)
 print ('================================')
 if dotenv_path.exists():
     load_dotenv(dotenv_path)
-    logger.info(f"Arquivo .env carregado: {dotenv_path}")
+    logger.info("Arquivo .env carregado: %s", dotenv_path)
 else:
-    logger.warning(f"Arquivo .env não encontrado: {dotenv_path}")
+    logger.warning("Arquivo .env não encontrado: %s", dotenv_path)
 
 # Obtém o PYTHONPATH do ambiente
 pythonpath = os.getenv('PYTHONPATH')
@@ -62,21 +65,89 @@ if pythonpath:
     if str(resolved_path) not in sys.path:
         sys.path.append(str(resolved_path))
 
-    logger.info(f"PYTHONPATH resolvido: {resolved_path}")
+    logger.info("PYTHONPATH resolvido: %s", resolved_path)
 
 else:
     logger.warning("PYTHONPATH não definido no .env")
 
 # Depuração: Imprimir sys.path
-logger.info(f"sys.path: {sys.path}")
+logger.info("sys.path: %s", sys.path)
 
 # Diretório das DAGs
 dags_path = BASE_DIR /'custom_airflow'/ 'dags'
-logger.info(f"Caminho 'das DAGs: {dags_path}")
+logger.info("Caminho 'das DAGs: %s", dags_path)
+
+# Intervalo (segundos) entre varreduras do diretório de DAGs
+DAG_SCAN_INTERVAL = float(os.getenv('DAG_SCAN_INTERVAL', '5'))
+
+# Observador de arquivos: 'poll' (varredura periódica) ou 'inotify' (somente Linux)
+DAG_WATCHER = os.getenv('DAG_WATCHER', 'poll')
 
-# Mapeamento de DAGs: nome -> {'dag': DAG, 'next_run': datetime}
+# Com o inotify ativo, varredura completa de segurança a cada N segundos
+DAG_FULL_SCAN_INTERVAL = float(os.getenv('DAG_FULL_SCAN_INTERVAL', '300'))
+
+# Mapeamento de DAGs: nome -> {'dag': DAG, 'next_run': datetime, 'cron': croniter, 'fileloc': Path}
 dag_schedule = {}
 
+# Índice dos arquivos de DAG já importados (caminho -> mtime, tamanho, hash)
+dag_file_index = DagFileIndex(dags_path)
+
+# Modo de execução das tarefas ('subprocess' ou 'warm') e workers pré-aquecidos por ambiente
+EXECUTOR_MODE = os.getenv('EXECUTOR_MODE', 'subprocess')
+WARM_WORKERS_PREWARM = int(os.getenv('WARM_WORKERS_PREWARM', '1'))
+
+# Importação das DAGs em processos separados ('process') ou no próprio scheduler ('inline')
+DAG_PROCESSOR_MODE = os.getenv('DAG_PROCESSOR_MODE', 'process')
+dag_processor = DagProcessor() if DAG_PROCESSOR_MODE == 'process' else None
+
+# Fila de prioridade com o próximo vencimento de cada DAG
+schedule_queue = ScheduleQueue()
+
+# Executa os runs das DAGs em paralelo, sem bloquear o loop do scheduler
+dag_run_dispatcher = DagRunDispatcher()
+
+# Vários schedulers no mesmo banco dividindo as DAGs por hashing consistente e leases
+SCHEDULER_HA = os.getenv('SCHEDULER_HA', 'false').lower() == 'true'
+scheduler_coordinator = SchedulerCoordinator() if SCHEDULER_HA else None
+
+# Métricas (expostas por start_metrics_server em METRICS_PORT)
+SCHEDULER_LOOP_SECONDS = histogram('scheduler_loop_duration_seconds',
+                                   'Trabalho de cada iteração do loop do scheduler (sem a espera).')
+SCHEDULER_LAG_SECONDS = histogram('scheduler_lag_seconds', 'Atraso entre o horário agendado e o disparo do run.')
+DAG_PARSE_SECONDS = histogram('dag_parse_duration_seconds', 'Tempo de importação de cada arquivo de DAG.', ('file',))
+SCHEDULED_DAGS = gauge('scheduled_dags', 'DAGs no agendamento.')
+ACTIVE_DAG_RUNS = gauge('active_dag_runs', 'Runs de DAG em execução ou enfileirados.')
+
+def schedule_dag(dag, fileloc):
+    """
+    Calcula o próximo horário de execução da DAG e a (re)insere na fila.
+
+    O iterador ``croniter`` fica guardado em ``dag_schedule`` e é reaproveitado
+    nos próximos disparos, em vez de ser recriado a cada ciclo.
+    """
+    now = datetime.now(timezone)
+    cron = croniter(dag.schedule_interval, now)
+    next_run = cron.get_next(datetime)
+    dag_schedule[dag.name] = {
+        'dag': dag,
+        'next_run': next_run,
+        'cron': cron,
+        'fileloc': fileloc
+    }
+    schedule_queue.schedule(dag.name, next_run)
+    # Construir em segundo plano os ambientes virtuais das tarefas
+    for future in get_venv_cache().prebuild_for_dag(dag):
+        if EXECUTOR_MODE == 'warm' and WARM_WORKERS_PREWARM > 0:
+            future.add_done_callback(_prewarm_workers)
+    return next_run
+
+def _prewarm_workers(future):
+    """
+    Inicia workers pré-aquecidos assim que o ambiente virtual fica pronto.
+    """
+    if future.exception() is None:
+        get_warm_worker_pool().prewarm(venv_python(future.result()), WARM_WORKERS_PREWARM)
+
 def load_dag(dag_file):
     """
     Carrega uma DAG a partir de um arquivo Python.
@@ -84,151 +155,295 @@ def load_dag(dag_file):
     :param dag_file: Caminho para o arquivo Python da DAG.
     :return: Instância da DAG ou None se não for encontrada.
     """
-    logger.info(f"Carregando DAG a partir de: {dag_file.name}")
-    spec = importlib.util.spec_from_file_location(dag_file.stem, dag_file)
-    module = importlib.util.module_from_spec(spec)
+    logger.info("Carregando DAG a partir de: %s", dag_file.name)
     try:
-        spec.loader.exec_module(module)
-        if hasattr(module, 'dag'):
-            logger.info(f"DAG '{module.dag.name}' carregada com sucesso.")
-            return module.dag
-        else:
-            logger.warning(f"Advertência: {dag_file.name} não define uma variável 'dag'.")
-            return None
+        with DAG_PARSE_SECONDS.time(file=dag_file.name):
+            dag = load_dag_file(dag_file)
     except Exception as e:
-        logger.error(f"Erro ao carregar {dag_file.name}: {e}")
+        logger.error("Erro ao carregar %s: %s", dag_file.name, e)
         return None
+    if dag is None:
+        logger.warning("Advertência: %s não define uma variável 'dag'.", dag_file.name)
+        return None
+    logger.info("DAG '%s' carregada com sucesso.", dag.name)
+    return dag
+
+def load_dags(dag_files):
+    """
+    Carrega várias DAGs, em paralelo no ``dag_processor`` quando habilitado.
+
+    :param dag_files: Caminhos dos arquivos Python das DAGs.
+    :return: Dicionário caminho -> DAG (ou None se o arquivo falhou ou não define 'dag').
+    """
+    if dag_processor is None:
+        return {dag_file: load_dag(dag_file) for dag_file in dag_files}
+
+    dags = {}
+    for dag_file, result in dag_processor.process_files(dag_files).items():
+        DAG_PARSE_SECONDS.observe(result.duration, file=dag_file.name)
+        if not result.ok:
+            logger.error("Erro ao carregar %s: %s", dag_file.name, result.error)
+            dags[dag_file] = None
+        elif result.dag_data is None:
+            logger.warning("Advertência: %s não define uma variável 'dag'.", dag_file.name)
+            dags[dag_file] = None
+        else:
+            dags[dag_file] = DAG.from_dict(result.dag_data)
+            logger.info("DAG '%s' carregada de %s em %.3fs.",
+                        result.dag_data['name'], dag_file.name, result.duration)
+    return dags
+
+def unschedule_dag(dag_name):
+    """
+    Remove a DAG do agendamento e do cache serializado (arquivo apagado ou DAG renomeada).
+    """
+    if dag_schedule.pop(dag_name, None) is not None:
+        schedule_queue.remove(dag_name)
+        delete_dag(dag_name)
+        logger.info("DAG '%s' removida do agendamento.", dag_name)
+
+def sync_dag_file(entry, dag):
+    """
+    Atualiza o agendamento a partir de um arquivo de DAG novo ou alterado.
+
+    :param entry: ``DagFileEntry`` retornado por ``DagFileIndex.scan``.
+    :param dag: DAG carregada do arquivo, ou None se a importação falhou.
+    """
+    if not dag:
+        # Não grava no índice: a próxima varredura tenta de novo, mesmo sem o arquivo
+        # mudar (timeout do DagProcessor sob carga, módulo ainda sendo implantado...)
+        return
+    if entry.dag_name and entry.dag_name != dag.name:
+        # O arquivo passou a definir outra DAG
+        unschedule_dag(entry.dag_name)
+    entry.dag_name = dag.name
+    dag_file_index.update(entry)
+
+    # Atualizar a forma serializada (também registra a DAG no banco se for nova)
+    write_dag(dag, str(entry.path), entry.content_hash)
+
+    if dag.name not in dag_schedule:
+        # Nova DAG encontrada
+        next_run = schedule_dag(dag, entry.path)
+        logger.info("Nova DAG '%s' agendada para próxima execução em %s.", dag.name, next_run)
+    else:
+        logger.info("Detectada modificação na DAG '%s'. Reloading.", dag.name)
+        # Recalcular o próximo run
+        next_run = schedule_dag(dag, entry.path)
+        logger.info("DAG '%s' re-scheduled para próxima execução em %s.", dag.name, next_run)
+
+def restore_serialized_dags():
+    """
+    Agenda as DAGs guardadas no banco cujo arquivo de origem não mudou desde a
+    serialização, sem reimportar o arquivo Python.
+    """
+    restored = 0
+    for stored in load_serialized_dags():
+        if not stored.fileloc:
+            continue
+        path = Path(stored.fileloc)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.parent != dags_path or file_hash(path) != stored.file_hash:
+            continue
+        dag_file_index.update(DagFileEntry(path, st.st_mtime_ns, st.st_size, stored.file_hash, stored.dag.name))
+        schedule_dag(stored.dag, path)
+        restored += 1
+    logger.info("%s DAG(s) restaurada(s) do cache serializado.", restored)
 
 def initialize_dags():
     """
     Inicializa todas as DAGs existentes no diretório 'dags'.
+
+    Primeiro restaura as DAGs do cache serializado no banco; depois importa
+    apenas os arquivos novos ou alterados.
     """
-    for dag_file in dags_path.glob('*.py'):
-        if dag_file.name.startswith('__'):
-            continue
-        dag = load_dag(dag_file)
-        if dag:
-            if dag.name not in dag_schedule:
-                # Registrar a DAG no banco de dados se ainda não estiver
-                session = get_session()
-                dag_record = session.query(DAGModel).filter_by(name=dag.name).first()
-                if not dag_record:
-                    dag_record = DAGModel(name=dag.name)
-                    session.add(dag_record)
-                    session.commit()
-                    logger.info(f"DAG '{dag.name}' registrada no banco de dados.")
-                session.close()
-                
-                # Calcular o próximo horário de execução
-                now = datetime.now(timezone)
-                cron = croniter(dag.schedule_interval, now)
-                next_run = cron.get_next(datetime)
-                
-                # Atualizar o mapeamento
-                dag_schedule[dag.name] = {
-                    'dag': dag,
-                    'next_run': next_run,
-                    'file_mtime': dag_file.stat().st_mtime
-                }
-                logger.info(f"DAG '{dag.name}' agendada para próxima execução em {next_run}.")
-            else:
-                # Verificar se o arquivo da DAG foi modificado
-                current_mtime = dag_file.stat().st_mtime
-                if current_mtime > dag_schedule[dag.name]['file_mtime']:
-                    # Reload a DAG
-                    logger.info(f"Detectada modificação na DAG '{dag.name}'. Reloading.")
-                    dag_schedule[dag.name]['dag'] = dag
-                    dag_schedule[dag.name]['file_mtime'] = current_mtime
-                    # Recalcular o próximo run
-                    now = datetime.now(timezone)
-                    cron = croniter(dag.schedule_interval, now)
-                    next_run = cron.get_next(datetime)
-                    dag_schedule[dag.name]['next_run'] = next_run
-                    logger.info(f"DAG '{dag.name}' re-scheduled para próxima execução em {next_run}.")
+    restore_serialized_dags()
+    scan_for_new_dags()
+
+def catchup_dags():
+    """
+    Executa em segundo plano os intervalos perdidos enquanto o scheduler estava
+    parado, para as DAGs com catchup habilitado (``DAG_CATCHUP`` ou ``catchup=True``).
+
+    Os próximos runs agendados são sempre posteriores ao início do scheduler,
+    então não se sobrepõem às datas recuperadas; os runs do catchup ocupam os
+    ``max_active_runs`` da DAG no dispatcher junto com os agendados. Com
+    ``SCHEDULER_HA``, roda depois da primeira sincronização do cluster e só para
+    as DAGs deste scheduler.
+    """
+    dags = [info['dag'] for info in dag_schedule.values()
+            if info['dag'].get_catchup() and _owns(info['dag'].name)]
+    if not dags:
+        return None
+
+    def run():
+        for dag in dags:
+            if not _owns(dag.name):
+                logger.info("DAG '%s' entregue a outro scheduler; catchup ignorado.", dag.name)
+                continue
+            try:
+                catchup(dag, dispatcher=dag_run_dispatcher)
+            except Exception as e:
+                logger.error("Erro no catchup da DAG '%s': %s", dag.name, e)
+
+    thread = threading.Thread(target=run, name='catchup', daemon=True)
+    thread.start()
+    return thread
+
+def _owns(dag_name):
+    return scheduler_coordinator is None or scheduler_coordinator.owns(dag_name)
 
 def check_and_run_dags():
     """
-    Verifica quais DAGs estão programadas para execução e as executa se necessário.
+    Executa as DAGs vencidas na fila de agendamento e as reagenda.
     """
     now = datetime.now(timezone)
-    for dag_name, info in dag_schedule.items():
+    for dag_name, next_run in schedule_queue.pop_due(now):
+        info = dag_schedule[dag_name]
         dag = info['dag']
-        next_run = info['next_run']
-        if now >= next_run:
-            logger.info(f"Executando DAG '{dag.name}' agendada para {next_run}.")
-            try:
-                dag.execute()
-                # Recalcular o próximo horário de execução
-                cron = croniter(dag.schedule_interval, next_run)
-                new_next_run = cron.get_next(datetime)
-                dag_schedule[dag.name]['next_run'] = new_next_run
-                logger.info(f"DAG '{dag.name}' próxima execução agendada para {new_next_run}.")
-            except Exception as e:
-                logger.error(f"Erro ao executar DAG '{dag.name}': {e}")
-                # Opcional: decidir como lidar com falhas (e.g., retry, alertas)
-    
-def scan_for_new_dags():
+        if scheduler_coordinator is not None and not scheduler_coordinator.owns(dag_name):
+            logger.debug("DAG '%s' pertence a outro scheduler; horário %s ignorado.", dag_name, next_run)
+        else:
+            SCHEDULER_LAG_SECONDS.observe(max(0.0, (now - next_run).total_seconds()))
+            # Despachar o run para o pool; o loop segue livre para as demais DAGs
+            if dag_run_dispatcher.submit(dag, logical_date=next_run) is not None:
+                logger.info("Executando DAG '%s' agendada para %s.", dag.name, next_run)
+        # Recalcular o próximo horário de execução a partir do iterador em cache
+        new_next_run = info['cron'].get_next(datetime)
+        info['next_run'] = new_next_run
+        schedule_queue.schedule(dag.name, new_next_run)
+        logger.info("DAG '%s' próxima execução agendada para %s.", dag.name, new_next_run)
+
+def sync_scheduler_cluster():
     """
-    Scaneia o diretório 'dags' para detectar novos arquivos de DAG ou modificações.
+    Atualiza a participação no cluster de schedulers (``SCHEDULER_HA``).
+
+    Ao assumir uma DAG de outro scheduler, dispara o último horário vencido se
+    ele caiu na janela da troca de dono; se o dono anterior já o disparou, a
+    restrição única de ``dag_runs`` descarta o run duplicado.
     """
-    for dag_file in dags_path.glob('*.py'):
-        if dag_file.name.startswith('__'):
+    try:
+        acquired = scheduler_coordinator.sync(list(dag_schedule))
+    except Exception as e:
+        logger.error("Erro ao sincronizar o cluster de schedulers: %s", e)
+        return
+    now = datetime.now(timezone)
+    for dag_name, since in acquired.items():
+        info = dag_schedule.get(dag_name)
+        if info is None:
             continue
-        dag = load_dag(dag_file)
-        if dag:
-            if dag.name not in dag_schedule:
-                # Nova DAG encontrada
-                session = get_session()
-                dag_record = session.query(DAGModel).filter_by(name=dag.name).first()
-                if not dag_record:
-                    dag_record = DAGModel(name=dag.name)
-                    session.add(dag_record)
-                    session.commit()
-                    logger.info(f"Nova DAG '{dag.name}' registrada no banco de dados.")
-                session.close()
-                
-                # Calcular o próximo horário de execução
-                now = datetime.now(timezone)
-                cron = croniter(dag.schedule_interval, now)
-                next_run = cron.get_next(datetime)
-                
-                # Atualizar o mapeamento
-                dag_schedule[dag.name] = {
-                    'dag': dag,
-                    'next_run': next_run,
-                    'file_mtime': dag_file.stat().st_mtime
-                }
-                logger.info(f"Nova DAG '{dag.name}' agendada para próxima execução em {next_run}.")
-            else:
-                # Verificar se o arquivo da DAG foi modificado
-                current_mtime = dag_file.stat().st_mtime
-                if current_mtime > dag_schedule[dag.name]['file_mtime']:
-                    # Reload a DAG
-                    logger.info(f"Detectada modificação na DAG '{dag.name}'. Reloading.")
-                    dag_schedule[dag.name]['dag'] = dag
-                    dag_schedule[dag.name]['file_mtime'] = current_mtime
-                    # Recalcular o próximo run
-                    now = datetime.now(timezone)
-                    cron = croniter(dag.schedule_interval, now)
-                    next_run = cron.get_next(datetime)
-                    dag_schedule[dag.name]['next_run'] = next_run
-                    logger.info(f"DAG '{dag.name}' re-scheduled para próxima execução em {next_run}.")
+        dag = info['dag']
+        previous_run = croniter(dag.schedule_interval, now).get_prev(datetime)
+        if previous_run >= since.replace(tzinfo=timezone):
+            logger.info("DAG '%s' assumida: disparando o horário %s da troca de dono.", dag_name, previous_run)
+            dag_run_dispatcher.submit(dag, logical_date=previous_run)
+
+def scan_for_new_dags(paths=None):
+    """
+    Detecta arquivos de DAG novos, modificados ou removidos.
+
+    Só os arquivos cujo conteúdo mudou desde a última importação são importados.
+
+    :param paths: Arquivos a verificar (vindos do watcher). Se None, varre o diretório inteiro.
+    """
+    changed, deleted = dag_file_index.scan(paths)
+    for entry in deleted:
+        logger.info("Arquivo de DAG removido: %s", entry.path.name)
+        if entry.dag_name and dag_schedule.get(entry.dag_name, {}).get('fileloc') == entry.path:
+            unschedule_dag(entry.dag_name)
+    if changed:
+        dags = load_dags([entry.path for entry in changed])
+        for entry in changed:
+            sync_dag_file(entry, dags.get(entry.path))
+
+def start_dag_watcher():
+    """
+    Inicia o watcher inotify se configurado e disponível. Retorna None caso contrário.
+    """
+    if DAG_WATCHER != 'inotify':
+        return None
+    if not InotifyWatcher.available():
+        logger.warning("DAG_WATCHER=inotify não é suportado nesta plataforma; usando varredura periódica.")
+        return None
+    watcher = InotifyWatcher(dags_path, on_change=schedule_queue.wake)
+    try:
+        watcher.start()
+    except OSError as e:
+        logger.warning("Não foi possível iniciar o inotify (%s); usando varredura periódica.", e)
+        return None
+    return watcher
 
 def main():
+    configure_logging()
+    logger.info("Configuração: .env em %s, DAGs em %s.", dotenv_path, dags_path)
+
+    if os.getenv('EXECUTOR_BACKEND', 'thread') == 'queue':
+        warn_per_process_limits('scheduler com EXECUTOR_BACKEND=queue')
+
     # Inicializa as DAGs existentes
     initialize_dags()
+    if scheduler_coordinator is not None:
+        scheduler_coordinator.start()
+        sync_scheduler_cluster()
+    # Depois da sincronização: com SCHEDULER_HA, só as DAGs deste scheduler
+    catchup_dags()
     
     logger.info("Scheduler iniciado. Aguardando tarefas...")
     
-    while True:
-        # Escanear e carregar novas DAGs ou atualizações
-        scan_for_new_dags()
-        
-        # Verificar e executar DAGs que estão programadas para rodar
-        check_and_run_dags()
-        
-        # Aguardar 15 segundos antes de próxima verificação
-        time.sleep(5)
+    watcher = start_dag_watcher()
+    # Arquivamento periódico do histórico de execuções (RETENTION_DAYS > 0)
+    start_retention_worker()
+    # Endpoint Prometheus (METRICS_PORT > 0)
+    start_metrics_server()
+    scan_interval = DAG_FULL_SCAN_INTERVAL if watcher else DAG_SCAN_INTERVAL
+    next_scan = time.monotonic() + scan_interval
+    try:
+        while True:
+            loop_started = time.perf_counter()
+            # Escanear e carregar novas DAGs ou atualizações
+            if watcher:
+                dirty, overflow = watcher.drain()
+                if overflow:
+                    next_scan = 0
+                elif dirty:
+                    scan_for_new_dags(dirty)
+                if not watcher.alive():
+                    logger.warning("Observador de DAGs parou; voltando à varredura a cada %ss.", DAG_SCAN_INTERVAL)
+                    watcher.stop()
+                    watcher = None
+                    scan_interval = DAG_SCAN_INTERVAL
+                    next_scan = min(next_scan, time.monotonic() + scan_interval)
+            if time.monotonic() >= next_scan:
+                scan_for_new_dags()
+                next_scan = time.monotonic() + scan_interval
+            
+            if scheduler_coordinator is not None and scheduler_coordinator.due():
+                sync_scheduler_cluster()
+
+            # Verificar e despachar DAGs que estão programadas para rodar
+            check_and_run_dags()
+            SCHEDULER_LOOP_SECONDS.observe(time.perf_counter() - loop_started)
+            SCHEDULED_DAGS.set(len(dag_schedule))
+            ACTIVE_DAG_RUNS.set(dag_run_dispatcher.active_runs())
+            
+            # Dormir até a próxima DAG vencer, a próxima varredura, o próximo heartbeat
+            # do cluster ou uma alteração na fila
+            timeout = max(0.0, next_scan - time.monotonic())
+            if scheduler_coordinator is not None:
+                timeout = min(timeout, scheduler_coordinator.next_sync_in())
+            schedule_queue.wait(timeout=timeout)
+            logger.debug("Métricas de agendamento: %s", schedule_queue.stats())
+    finally:
+        if watcher:
+            watcher.stop()
+        if scheduler_coordinator is not None:
+            # Libera as DAGs para os demais schedulers sem esperar a expiração dos leases
+            scheduler_coordinator.stop()
+        # Aguarda os runs em andamento antes de encerrar
+        dag_run_dispatcher.shutdown(wait=True)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,248 @@
+"""
+Scheduler em alta disponibilidade (``SCHEDULER_HA=true``).
+
+Vários processos ``python -m custom_airflow.src.scheduler`` apontando para o
+mesmo banco dividem as DAGs entre si:
+
+- cada scheduler grava um heartbeat em ``schedulers`` a cada
+  ``SCHEDULER_HEARTBEAT_INTERVAL`` segundos; os que não renovam há mais de
+  ``SCHEDULER_HEARTBEAT_TIMEOUT`` segundos deixam de contar;
+- as DAGs são distribuídas por hashing consistente (anel com
+  ``SCHEDULER_VNODES`` nós virtuais por scheduler), então a entrada ou saída de
+  um scheduler só move as DAGs dele;
+- a posse efetiva é um lease em ``dag_leases`` (``SCHEDULER_LEASE_SECONDS``):
+  o dono anterior libera a DAG no próximo heartbeat ou o lease expira, e só
+  então o novo dono a assume. Só o dono dispara os runs da DAG.
+
+A restrição única de ``dag_runs`` (``dag_id``, ``logical_date``) continua como
+cerca final: mesmo com relógios dessincronizados, o mesmo horário nunca roda
+duas vezes.
+"""
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .metrics import gauge
+from .models import DagLeaseModel, SchedulerModel, get_session
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_PEERS = gauge('scheduler_peers', 'Schedulers vivos no cluster (SCHEDULER_HA).')
+OWNED_DAGS = gauge('scheduler_owned_dags', 'DAGs cujo lease pertence a este scheduler.')
+
+# Limite de nomes por cláusula IN
+_CHUNK_SIZE = 500
+
+
+def _chunks(names: List[str]):
+    for start in range(0, len(names), _CHUNK_SIZE):
+        yield names[start:start + _CHUNK_SIZE]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Anel de hashing consistente: cada chave pertence ao primeiro nó virtual no sentido horário."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        points = sorted((_hash(f'{node}#{i}'), node) for node in set(nodes) for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        return self._nodes[bisect.bisect(self._keys, _hash(key)) % len(self._keys)]
+
+
+def register_scheduler(scheduler_id: str, hostname: str, pid: int, now: Optional[datetime] = None):
+    now = now or datetime.utcnow()
+    session = get_session()
+    try:
+        session.merge(SchedulerModel(id=scheduler_id, hostname=hostname, pid=pid, state='running', started_at=now,
+                                     heartbeat_at=now))
+        session.commit()
+    finally:
+        session.close()
+
+
+def scheduler_heartbeat(scheduler_id: str, now: Optional[datetime] = None):
+    session = get_session()
+    try:
+        session.execute(update(SchedulerModel).where(SchedulerModel.id == scheduler_id)
+                        .values(heartbeat_at=now or datetime.utcnow(), state='running')
+                        .execution_options(synchronize_session=False))
+        session.commit()
+    finally:
+        session.close()
+
+
+def stop_scheduler(scheduler_id: str):
+    session = get_session()
+    try:
+        session.execute(update(SchedulerModel).where(SchedulerModel.id == scheduler_id).values(state='stopped')
+                        .execution_options(synchronize_session=False))
+        session.commit()
+    finally:
+        session.close()
+
+
+def live_schedulers(timeout: float, now: Optional[datetime] = None) -> List[str]:
+    """Ids dos schedulers em execução com heartbeat nos últimos ``timeout`` segundos."""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=timeout)
+    session = get_session()
+    try:
+        return list(session.scalars(select(SchedulerModel.id)
+                                    .where(SchedulerModel.state == 'running', SchedulerModel.heartbeat_at >= cutoff)))
+    finally:
+        session.close()
+
+
+def sync_leases(scheduler_id: str, wanted: Iterable[str], lease_seconds: float,
+                now: Optional[datetime] = None):
+    """
+    Ajusta os leases do scheduler às DAGs em ``wanted``.
+
+    Renova os leases válidos dessas DAGs, libera os das demais, assume os
+    liberados ou expirados e cria os que ainda não existem. Toda troca de dono
+    é um ``UPDATE`` condicional, então dois schedulers nunca assumem a mesma DAG.
+
+    :return: ``(held, acquired)``: DAGs cujo lease o scheduler detém e, para as
+        recém-assumidas, o último instante em que o dono anterior certamente
+        disparava os runs (None se a DAG nunca teve dono).
+    """
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    wanted = set(wanted)
+    table = DagLeaseModel
+    acquired: Dict[str, Optional[datetime]] = {}
+    session = get_session()
+    try:
+        rows = {row.dag_name: row for row in session.execute(
+            select(table.dag_name, table.scheduler_id, table.renewed_at, table.expires_at))}
+        mine = [name for name, row in rows.items() if row.scheduler_id == scheduler_id and row.expires_at > now]
+        for chunk in _chunks([name for name in mine if name not in wanted]):
+            session.execute(update(table).where(table.dag_name.in_(chunk), table.scheduler_id == scheduler_id)
+                            .values(scheduler_id=None, renewed_at=now, expires_at=now)
+                            .execution_options(synchronize_session=False))
+        for chunk in _chunks([name for name in mine if name in wanted]):
+            session.execute(update(table).where(table.dag_name.in_(chunk), table.scheduler_id == scheduler_id)
+                            .values(renewed_at=now, expires_at=expires_at)
+                            .execution_options(synchronize_session=False))
+        for name in sorted(wanted.intersection(rows).difference(mine)):
+            row = rows[name]
+            if row.scheduler_id is not None and row.expires_at > now:
+                continue  # Ainda de outro scheduler: aguarda a liberação ou a expiração
+            # Condicional: outro scheduler pode estar assumindo a mesma DAG
+            if session.execute(update(table)
+                               .where(table.dag_name == name, table.expires_at == row.expires_at,
+                                      or_(table.scheduler_id.is_(None), table.expires_at <= now))
+                               .values(scheduler_id=scheduler_id, acquired_at=now, renewed_at=now,
+                                       expires_at=expires_at)
+                               .execution_options(synchronize_session=False)).rowcount:
+                acquired[name] = row.renewed_at
+        session.commit()
+
+        for name in sorted(wanted.difference(rows)):
+            session.add(table(dag_name=name, scheduler_id=scheduler_id, acquired_at=now, renewed_at=now,
+                              expires_at=expires_at))
+            try:
+                session.commit()
+                acquired[name] = None
+            except IntegrityError:
+                # Outro scheduler criou o lease ao mesmo tempo
+                session.rollback()
+
+        held = set(session.scalars(select(table.dag_name)
+                                   .where(table.scheduler_id == scheduler_id, table.expires_at > now)))
+    finally:
+        session.close()
+    return held, {name: since for name, since in acquired.items() if name in held}
+
+
+class SchedulerCoordinator:
+    """Participação deste processo no cluster de schedulers: heartbeat, anel e leases das DAGs."""
+
+    def __init__(self, scheduler_id: Optional[str] = None, heartbeat_interval: Optional[float] = None,
+                 timeout: Optional[float] = None, lease_seconds: Optional[float] = None,
+                 vnodes: Optional[int] = None):
+        self.heartbeat_interval = heartbeat_interval or float(os.getenv('SCHEDULER_HEARTBEAT_INTERVAL', '2'))
+        self.timeout = timeout or float(os.getenv('SCHEDULER_HEARTBEAT_TIMEOUT', '10'))
+        self.lease_seconds = lease_seconds or float(os.getenv('SCHEDULER_LEASE_SECONDS', str(self.timeout)))
+        self.vnodes = vnodes or int(os.getenv('SCHEDULER_VNODES', '64'))
+        self.hostname = socket.gethostname()
+        self.scheduler_id = scheduler_id or f'{self.hostname}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.peers: List[str] = []
+        self._owned: Set[str] = set()
+        self._valid_until = 0.0
+        self._next_sync = 0.0
+
+    def start(self):
+        register_scheduler(self.scheduler_id, self.hostname, os.getpid())
+        logger.info("Scheduler %s registrado no cluster (heartbeat a cada %ss, timeout de %ss).",
+                    self.scheduler_id, self.heartbeat_interval, self.timeout)
+
+    def sync(self, dag_names: Iterable[str], now: Optional[datetime] = None) -> Dict[str, datetime]:
+        """
+        Heartbeat, recalcula o anel com os schedulers vivos e ajusta os leases.
+
+        :return: DAGs assumidas de outro scheduler nesta rodada -> instante a partir
+            do qual um horário vencido pode ter ficado sem disparo durante a troca.
+        """
+        started = time.monotonic()
+        self._next_sync = started + self.heartbeat_interval
+        now = now or datetime.utcnow()
+        scheduler_heartbeat(self.scheduler_id, now)
+        peers = sorted(set(live_schedulers(self.timeout, now)) | {self.scheduler_id})
+        if peers != self.peers:
+            logger.info("Schedulers vivos: %s.", ', '.join(peers))
+            self.peers = peers
+        ring = HashRing(peers, self.vnodes)
+        wanted = [name for name in dag_names if ring.owner(name) == self.scheduler_id]
+        held, acquired = sync_leases(self.scheduler_id, wanted, self.lease_seconds, now)
+        for name in sorted(self._owned - held):
+            logger.info("DAG '%s' entregue a outro scheduler.", name)
+        for name in sorted(held - self._owned):
+            logger.info("DAG '%s' assumida pelo scheduler %s.", name, self.scheduler_id)
+        self._owned = held
+        # O lease foi gravado depois de ``started``: a posse local nunca dura mais que a do banco
+        self._valid_until = started + self.lease_seconds
+        SCHEDULER_PEERS.set(len(peers))
+        OWNED_DAGS.set(len(held))
+
+        # Trocas recentes (dono liberou ou morreu há pouco); fora disso vale o catchup
+        recent = now - timedelta(seconds=self.lease_seconds + 2 * self.heartbeat_interval)
+        margin = timedelta(seconds=self.heartbeat_interval)
+        return {name: since - margin for name, since in acquired.items() if since is not None and since >= recent}
+
+    def owns(self, dag_name: str) -> bool:
+        """Se este scheduler pode disparar a DAG (lease detido e ainda válido localmente)."""
+        return dag_name in self._owned and time.monotonic() < self._valid_until
+
+    def due(self) -> bool:
+        return time.monotonic() >= self._next_sync
+
+    def next_sync_in(self) -> float:
+        return max(0.0, self._next_sync - time.monotonic())
+
+    def stop(self):
+        """Libera todas as DAGs para os demais schedulers e sai do cluster."""
+        try:
+            sync_leases(self.scheduler_id, (), self.lease_seconds)
+            stop_scheduler(self.scheduler_id)
+        except Exception as e:
+            logger.error("Erro ao sair do cluster de schedulers: %s", e)
+        self._owned = set()
+        OWNED_DAGS.set(0)
+        logger.info("Scheduler %s saiu do cluster.", self.scheduler_id)
@@ -0,0 +1,247 @@
+import atexit
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import OperationalError
+
+from .models import DAGModel, ExecutionModel, TaskModel, TaskStatus, get_session
+
+logger = logging.getLogger(__name__)
+
+
+def register_dag(dag) -> Tuple[int, Dict[str, int]]:
+    """
+    Registra a DAG e todas as suas tarefas em uma única transação.
+
+    Faz um único SELECT das tarefas existentes, insere as novas em lote e
+    atualiza em lote as que mudaram de script ou dependências.
+
+    :return: ``(dag_id, {nome_da_tarefa: task_id})``.
+    """
+    session = get_session()
+    try:
+        dag_record = session.query(DAGModel).filter_by(name=dag.name).first()
+        if not dag_record:
+            dag_record = DAGModel(name=dag.name)
+            session.add(dag_record)
+            session.flush()
+            logger.info("DAG '%s' registrada no banco de dados.", dag.name)
+
+        existing = {row.name: row for row in session.query(TaskModel.id, TaskModel.name, TaskModel.script_path,
+                                                           TaskModel.dependencies)
+                    .filter_by(dag_id=dag_record.id)}
+        new_rows, changed_rows = [], []
+        for task in dag.tasks.values():
+            dependencies = ','.join(task.dependencies) if task.dependencies else ''
+            row = existing.get(task.name)
+            if row is None:
+                new_rows.append({'name': task.name, 'script_path': task.script_path, 'dependencies': dependencies,
+                                 'status': TaskStatus.pending, 'dag_id': dag_record.id})
+            elif row.script_path != task.script_path or row.dependencies != dependencies:
+                changed_rows.append({'id': row.id, 'script_path': task.script_path, 'dependencies': dependencies})
+        if new_rows:
+            session.execute(insert(TaskModel), new_rows)
+        if changed_rows:
+            session.execute(update(TaskModel), changed_rows)
+        session.commit()
+        if new_rows:
+            logger.info("%s tarefa(s) da DAG '%s' registrada(s) no banco de dados.", len(new_rows), dag.name)
+
+        task_ids = dict(session.query(TaskModel.name, TaskModel.id).filter_by(dag_id=dag_record.id))
+        return dag_record.id, task_ids
+    finally:
+        session.close()
+
+
+def new_execution_key() -> str:
+    return uuid.uuid4().hex
+
+
+class StateWriter:
+    """Grava as mudanças de estado das execuções em lote, em segundo plano (write-behind).
+
+    Os chamadores apenas enfileiram o início e o fim de cada tentativa; uma thread
+    grava tudo a cada ``flush_interval`` segundos ou quando ``batch_size`` mudanças
+    se acumulam, com um INSERT e um UPDATE em lote por transação. Se o início e o
+    fim de uma tentativa caem no mesmo lote, a linha já é inserida com o status final.
+    Cada execução é identificada por ``execution_key``, gerada no cliente.
+
+    Erros transitórios do banco (``OperationalError``) devolvem o lote para a
+    próxima gravação, até ``STATE_MAX_RETRIES`` vezes por mudança. Qualquer outro
+    erro (violação de integridade, dado inválido) faz o lote ser gravado linha a
+    linha, e só as linhas rejeitadas são descartadas.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None, batch_size: Optional[int] = None):
+        self.flush_interval = flush_interval or float(os.getenv('STATE_FLUSH_INTERVAL', '0.5'))
+        self.batch_size = batch_size or int(os.getenv('STATE_BATCH_SIZE', '500'))
+        self.max_retries = int(os.getenv('STATE_MAX_RETRIES', '60'))
+        # Falhas transitórias consecutivas por execution_key (acessado só sob _flush_lock)
+        self._retries: Dict[str, int] = {}
+        self._inserts: Dict[str, dict] = {}
+        self._updates: Dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def record_execution_start(self, dag_id: int, task_id: int, attempt: int = 1,
+                               start_time: Optional[datetime] = None, dag_run_id: Optional[int] = None,
+                               execution_key: Optional[str] = None, log_path: Optional[str] = None) -> str:
+        """Enfileira uma nova execução em andamento e retorna sua ``execution_key``."""
+        execution_key = execution_key or new_execution_key()
+        self._enqueue(execution_key, {
+            'execution_key': execution_key,
+            'dag_id': dag_id,
+            'task_id': task_id,
+            'dag_run_id': dag_run_id,
+            'attempt': attempt,
+            'start_time': start_time or datetime.utcnow(),
+            'end_time': None,
+            'status': TaskStatus.running,
+            'log_path': log_path,
+        }, insert_row=True)
+        return execution_key
+
+    def record_execution_end(self, execution_key: str, status: TaskStatus, end_time: Optional[datetime] = None):
+        """Enfileira o status final de uma execução."""
+        self._enqueue(execution_key, {'status': status, 'end_time': end_time or datetime.utcnow()})
+
+    def flush(self):
+        """Grava imediatamente tudo o que está pendente."""
+        with self._flush_lock:
+            with self._cond:
+                inserts, self._inserts = self._inserts, {}
+                updates, self._updates = self._updates, {}
+            if not inserts and not updates:
+                return
+            try:
+                self._write(inserts, updates)
+            except OperationalError as e:
+                logger.error("Erro transitório ao gravar %s mudança(s) de estado; nova tentativa no próximo ciclo: %s",
+                             len(inserts) + len(updates), e)
+                self._retry(inserts, updates)
+                return
+            except Exception as e:
+                logger.error("Erro ao gravar %s mudança(s) de estado em lote; gravando uma a uma: %s",
+                             len(inserts) + len(updates), e)
+                self._write_one_by_one(inserts, updates)
+                return
+            for key in list(inserts) + list(updates):
+                self._retries.pop(key, None)
+
+    def _write(self, inserts: Dict[str, dict], updates: Dict[str, dict]):
+        """Grava as mudanças em uma transação."""
+        session = get_session()
+        try:
+            if inserts:
+                session.execute(insert(ExecutionModel), list(inserts.values()))
+            if updates:
+                table = ExecutionModel.__table__
+                session.execute(
+                    update(table).where(table.c.execution_key == bindparam('b_execution_key'))
+                    .values(status=bindparam('status'), end_time=bindparam('end_time')),
+                    [{'b_execution_key': key, **values} for key, values in updates.items()])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _write_one_by_one(self, inserts: Dict[str, dict], updates: Dict[str, dict]):
+        """Grava cada mudança em sua própria transação, descartando as rejeitadas pelo banco."""
+        retry_inserts, retry_updates = {}, {}
+        for pending, retry, is_insert in ((inserts, retry_inserts, True), (updates, retry_updates, False)):
+            for key, values in pending.items():
+                batch = ({key: values}, {}) if is_insert else ({}, {key: values})
+                try:
+                    self._write(*batch)
+                except OperationalError:
+                    retry[key] = values
+                    continue
+                except Exception as e:
+                    logger.error("Mudança de estado da execução %s descartada: %s", key, e)
+                self._retries.pop(key, None)
+        if retry_inserts or retry_updates:
+            self._retry(retry_inserts, retry_updates)
+
+    def _retry(self, inserts: Dict[str, dict], updates: Dict[str, dict]):
+        """Devolve as mudanças à fila, descartando as que já falharam ``max_retries`` vezes."""
+        for pending in (inserts, updates):
+            for key in list(pending):
+                self._retries[key] = self._retries.get(key, 0) + 1
+                if self._retries[key] > self.max_retries:
+                    logger.error("Mudança de estado da execução %s descartada após %s tentativa(s).",
+                                 key, self.max_retries)
+                    del pending[key]
+                    self._retries.pop(key)
+        self._requeue(inserts, updates)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._inserts) + len(self._updates)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _enqueue(self, execution_key, values, insert_row=False):
+        with self._cond:
+            if insert_row:
+                self._inserts[execution_key] = values
+            elif execution_key in self._inserts:
+                self._inserts[execution_key].update(values)
+            else:
+                self._updates.setdefault(execution_key, {}).update(values)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='state-writer', daemon=True)
+                self._thread.start()
+            if len(self._inserts) + len(self._updates) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _requeue(self, inserts, updates):
+        with self._cond:
+            for key, values in self._inserts.items():
+                inserts.setdefault(key, {}).update(values)
+            self._inserts = inserts
+            for key, values in self._updates.items():
+                if key in self._inserts:
+                    self._inserts[key].update(values)
+                else:
+                    updates.setdefault(key, {}).update(values)
+            self._updates = updates
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._inserts) + len(self._updates) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+
+_state_writer = None
+_state_writer_lock = threading.Lock()
+
+
+def get_state_writer() -> StateWriter:
+    """Writer de estado compartilhado pelo processo."""
+    global _state_writer
+    if _state_writer is None:
+        with _state_writer_lock:
+            if _state_writer is None:
+                _state_writer = StateWriter()
+                atexit.register(_state_writer.close)
+    return _state_writer
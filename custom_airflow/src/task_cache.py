@@ -0,0 +1,150 @@
+"""
+Cache de resultados das tarefas (memoização opcional, ``Task(cache=True)``).
+
+A impressão digital de uma tarefa combina o conteúdo do script, dos arquivos
+de entrada declarados (``inputs``), os parâmetros (``params``) e a chave do
+ambiente virtual (versão do Python e requisitos). Se ela for igual à de uma
+execução bem-sucedida registrada em ``task_cache`` há menos de ``cache_ttl``
+segundos, a tentativa é gravada como ``skipped`` e o script não roda.
+
+Invalidação: qualquer mudança nas entradas gera outra impressão digital; o TTL
+expira as entradas antigas; ``TASK_CACHE=false`` desliga o cache de todas as
+tarefas; e o cache de uma DAG (ou de algumas tarefas) pode ser apagado com::
+
+    python -m custom_airflow.src.task_cache minha_dag --task task1
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from .logging_config import configure_logging
+from .models import DAGModel, TaskCacheModel, TaskModel, get_session
+from .venv_cache import env_key
+
+logger = logging.getLogger(__name__)
+
+# Hash do conteúdo por arquivo, reaproveitado enquanto mtime e tamanho não mudam
+_file_hashes: Dict[str, Tuple[int, int, str]] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def _file_digest(path: Path) -> str:
+    try:
+        stat = path.stat()
+    except OSError:
+        return 'missing'
+    key = str(path.resolve())
+    with _file_hashes_lock:
+        cached = _file_hashes.get(key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    with _file_hashes_lock:
+        _file_hashes[key] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _input_files(path: Path) -> Iterable[Path]:
+    """O próprio arquivo ou, para diretórios, todos os arquivos dentro dele (em ordem)."""
+    if not path.is_dir():
+        return [path]
+    return sorted(p for p in path.rglob('*') if p.is_file())
+
+
+def task_fingerprint(task) -> str:
+    """Impressão digital (SHA-256) das entradas da tarefa."""
+    digest = hashlib.sha256()
+    digest.update(b'script\0' + _file_digest(Path(task.script_path)).encode())
+    for declared in sorted(task.inputs):
+        for path in _input_files(Path(declared)):
+            digest.update(f'\0input\0{path}\0{_file_digest(path)}'.encode())
+    digest.update(b'\0params\0' + json.dumps(task.params, sort_keys=True, default=str).encode())
+    digest.update(b'\0env\0' + env_key(task.requirements).encode())
+    return digest.hexdigest()
+
+
+def task_cache_enabled(task) -> bool:
+    return task.cache and os.getenv('TASK_CACHE', 'true').lower() == 'true'
+
+
+def task_cache_ttl(task) -> float:
+    """Validade (segundos) dos resultados da tarefa; 0 = sem expiração."""
+    if task.cache_ttl is not None:
+        return task.cache_ttl
+    return float(os.getenv('TASK_CACHE_TTL', '0'))
+
+
+def lookup_cached_result(task_id: int, fingerprint: str, ttl: float = 0,
+                         now: Optional[datetime] = None) -> Optional[TaskCacheModel]:
+    """Entrada do cache para a impressão digital, se existir e estiver dentro do TTL."""
+    query = select(TaskCacheModel).where(TaskCacheModel.task_id == task_id,
+                                         TaskCacheModel.fingerprint == fingerprint)
+    if ttl:
+        query = query.where(TaskCacheModel.created_at >= (now or datetime.utcnow()) - timedelta(seconds=ttl))
+    session = get_session()
+    try:
+        entry = session.scalars(query).first()
+        if entry is not None:
+            session.expunge(entry)
+        return entry
+    finally:
+        session.close()
+
+
+def store_cached_result(task_id: int, fingerprint: str, execution_key: str, now: Optional[datetime] = None):
+    """Registra a execução bem-sucedida como resultado da impressão digital (substitui a anterior)."""
+    session = get_session()
+    try:
+        session.execute(delete(TaskCacheModel).where(TaskCacheModel.task_id == task_id,
+                                                     TaskCacheModel.fingerprint == fingerprint))
+        session.add(TaskCacheModel(task_id=task_id, fingerprint=fingerprint, execution_key=execution_key,
+                                   created_at=now or datetime.utcnow()))
+        session.commit()
+    except IntegrityError:
+        # Outro run gravou a mesma impressão digital ao mesmo tempo
+        session.rollback()
+    except Exception as e:
+        session.rollback()
+        logger.warning("Erro ao gravar o cache da execução %s: %s", execution_key, e)
+    finally:
+        session.close()
+
+
+def invalidate_task_cache(dag_name: str, task_names: Optional[Iterable[str]] = None) -> int:
+    """Apaga o cache da DAG (ou só das tarefas indicadas) e retorna quantas entradas foram removidas."""
+    task_ids = select(TaskModel.id).join(DAGModel, TaskModel.dag_id == DAGModel.id).where(DAGModel.name == dag_name)
+    if task_names is not None:
+        task_ids = task_ids.where(TaskModel.name.in_(list(task_names)))
+    session = get_session()
+    try:
+        removed = session.execute(delete(TaskCacheModel).where(TaskCacheModel.task_id.in_(task_ids))).rowcount
+        session.commit()
+    finally:
+        session.close()
+    logger.info("Cache da DAG '%s' invalidado: %s entrada(s) removida(s).", dag_name, removed)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Invalida o cache de resultados das tarefas de uma DAG.")
+    parser.add_argument('dag', help="Nome da DAG.")
+    parser.add_argument('--task', action='append', default=None, help="Tarefa (pode ser repetido; padrão: todas).")
+    args = parser.parse_args(argv)
+    configure_logging()
+    print(f"{invalidate_task_cache(args.dag, args.task)} entrada(s) removida(s).")
+
+
+if __name__ == '__main__':
+    main()
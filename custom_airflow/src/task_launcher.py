@@ -0,0 +1,51 @@
+"""
+Inicializador das tarefas com limites de CPU e memória (``ProcessLimits``).
+
+Roda com o Python do ambiente virtual da tarefa, antes do script: entra no
+cgroup preparado pelo scheduler, aplica os ``setrlimit`` e então substitui a si
+mesmo pelo script com ``os.execv``. Assim os limites valem desde o primeiro
+byte alocado e para todos os processos filhos do script, sem ``preexec_fn``
+(inseguro no scheduler, que tem várias threads). Só usa a biblioteca padrão::
+
+    python task_launcher.py [--memory-bytes N] [--cpu-seconds N] [--cgroup DIR] -- script.py [args...]
+"""
+import argparse
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--memory-bytes', type=int, default=0)
+    parser.add_argument('--cpu-seconds', type=int, default=0)
+    parser.add_argument('--cgroup', default=None)
+    parser.add_argument('command', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        parser.error("script da tarefa não informado")
+
+    if args.cgroup:
+        try:
+            with open(os.path.join(args.cgroup, 'cgroup.procs'), 'w') as procs:
+                procs.write(str(os.getpid()))
+        except OSError as e:
+            print(f"task_launcher: não foi possível entrar no cgroup {args.cgroup}: {e}", file=sys.stderr)
+    if resource is not None:
+        if args.memory_bytes:
+            resource.setrlimit(resource.RLIMIT_AS, (args.memory_bytes, args.memory_bytes))
+        if args.cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (args.cpu_seconds, args.cpu_seconds + 5))
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + command)
+
+
+if __name__ == '__main__':
+    main()
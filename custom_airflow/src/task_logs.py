@@ -0,0 +1,238 @@
+"""
+Logs por execução das tarefas (stdout + stderr do script).
+
+A saída é copiada em blocos, sem acumular em memória, para
+``<TASK_LOG_DIR>/<dag>/<tarefa>/<execution_key>.log``. Esse caminho (gravado em
+``executions.log_path``) é o prefixo dos segmentos do log:
+
+- ``<prefixo>.<início>``: segmento em escrita, texto puro;
+- ``<prefixo>.<início>.gz``: segmento fechado (rotacionado ou final), comprimido.
+
+``<início>`` é o offset, em bytes, do primeiro byte do segmento na saída completa
+da execução, de modo que ``read_log``/``follow_log`` trabalham sempre com offsets
+absolutos, mesmo depois de rotações e da remoção dos segmentos mais antigos.
+"""
+import gzip
+import os
+import re
+import select
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+OFFSET_DIGITS = 12
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def get_task_log_dir() -> Path:
+    return Path(os.getenv('TASK_LOG_DIR', 'logs'))
+
+
+def task_log_path(dag_name: str, task_name: str, execution_key: str) -> Path:
+    """Prefixo do log de uma execução."""
+    return get_task_log_dir() / dag_name / task_name / f'{execution_key}.log'
+
+
+def _segment_path(path: Path, start: int, compressed: bool = False) -> Path:
+    name = f'{path.name}.{start:0{OFFSET_DIGITS}d}'
+    return path.with_name(name + '.gz' if compressed else name)
+
+
+def _list_segments(path: Path) -> List[Tuple[int, Path, bool]]:
+    """Segmentos ``(início, caminho, comprimido)`` em ordem; o texto puro prevalece durante a compressão."""
+    pattern = re.compile(re.escape(path.name) + r'\.(\d{%d})(\.gz)?$' % OFFSET_DIGITS)
+    segments = {}
+    for candidate in path.parent.glob(path.name + '.*') if path.parent.exists() else []:
+        match = pattern.match(candidate.name)
+        if match:
+            start, compressed = int(match.group(1)), bool(match.group(2))
+            if start not in segments or not compressed:
+                segments[start] = (start, candidate, compressed)
+    return [segments[start] for start in sorted(segments)]
+
+
+class TaskLogWriter:
+    """Grava a saída de uma execução com limite de tamanho, rotação e compressão.
+
+    - ``max_bytes``: total gravado por execução; o excedente é descartado e uma
+      linha de aviso é adicionada (0 = sem limite);
+    - ``rotate_bytes``: tamanho de cada segmento antes de rotacionar (0 = não rotaciona);
+    - ``backup_count``: segmentos comprimidos mantidos (0 = todos);
+    - ``compress``: comprime os segmentos fechados, inclusive o último em ``close``.
+    """
+
+    def __init__(self, path, max_bytes: Optional[int] = None, rotate_bytes: Optional[int] = None,
+                 backup_count: Optional[int] = None, compress: Optional[bool] = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('TASK_LOG_MAX_MB', '100')) * 1024 * 1024
+        self.rotate_bytes = (rotate_bytes if rotate_bytes is not None
+                             else int(os.getenv('TASK_LOG_ROTATE_MB', '10')) * 1024 * 1024)
+        self.backup_count = backup_count if backup_count is not None else int(os.getenv('TASK_LOG_BACKUP_COUNT', '5'))
+        self.compress = compress if compress is not None else os.getenv('TASK_LOG_COMPRESS', 'true').lower() == 'true'
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self._lock = threading.Lock()
+        self._segment_start = 0
+        self._segment_size = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(_segment_path(self.path, 0), 'wb')
+
+    def write(self, data: bytes):
+        with self._lock:
+            if self._file is None:
+                return
+            if self.max_bytes:
+                allowed = max(0, self.max_bytes - self.bytes_written)
+                if len(data) > allowed:
+                    if not self.bytes_dropped:
+                        self._write(data[:allowed])
+                        self._write(f'\n[log truncado: limite de {self.max_bytes} bytes atingido]\n'.encode())
+                    self.bytes_dropped += len(data) - allowed
+                    return
+            self._write(data)
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            segment = _segment_path(self.path, self._segment_start)
+            if self._segment_size == 0 and self._segment_start > 0:
+                segment.unlink()
+            elif self.compress:
+                self._compress(segment)
+
+    def _write(self, data: bytes):
+        while data:
+            if self.rotate_bytes and self._segment_size >= self.rotate_bytes:
+                self._rotate()
+            room = self.rotate_bytes - self._segment_size if self.rotate_bytes else len(data)
+            piece, data = data[:room], data[room:]
+            self._file.write(piece)
+            self._file.flush()
+            self._segment_size += len(piece)
+            self.bytes_written += len(piece)
+
+    def _rotate(self):
+        self._file.close()
+        closed = _segment_path(self.path, self._segment_start)
+        self._segment_start += self._segment_size
+        self._segment_size = 0
+        self._file = open(_segment_path(self.path, self._segment_start), 'wb')
+        if self.compress:
+            self._compress(closed)
+        if self.backup_count:
+            old = [s for s in _list_segments(self.path) if s[0] < self._segment_start]
+            for _, segment, _ in old[:-self.backup_count]:
+                segment.unlink(missing_ok=True)
+
+    def _compress(self, segment: Path):
+        # Comprime em um temporário e renomeia: leitores nunca veem um .gz pela metade
+        target = segment.with_name(segment.name + '.gz')
+        tmp = segment.with_name('.' + target.name + '.tmp')
+        with open(segment, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst, READ_CHUNK_SIZE)
+        os.replace(tmp, target)
+        segment.unlink()
+
+
+def output_grace_seconds() -> float:
+    """Tempo para copiar a saída que sobra no pipe depois que o script termina."""
+    return float(os.getenv('TASK_OUTPUT_GRACE_SECONDS', '5'))
+
+
+def copy_stream(stream: BinaryIO, log: TaskLogWriter, stop: Optional[threading.Event] = None,
+                grace: Optional[float] = None):
+    """
+    Copia ``stream`` para o log em blocos até o fim do arquivo.
+
+    Com ``stop`` (somente POSIX: usa ``select`` no pipe), depois que o evento é
+    sinalizado copia só o que ainda está no pipe, por até ``grace`` segundos, e
+    retorna mesmo que um processo que escapou do grupo da tarefa mantenha o pipe aberto.
+    """
+    if stop is None:
+        while True:
+            chunk = stream.read1(READ_CHUNK_SIZE) if hasattr(stream, 'read1') else stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            log.write(chunk)
+    fd = stream.fileno()
+    deadline = None
+    while True:
+        if deadline is None and stop.is_set():
+            deadline = time.monotonic() + (output_grace_seconds() if grace is None else grace)
+        readable, _, _ = select.select([fd], [], [], 0 if deadline is not None else 0.1)
+        if not readable:
+            if deadline is not None:
+                return
+            continue
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        chunk = os.read(fd, READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        log.write(chunk)
+
+
+def read_log(path, offset: int = 0, max_bytes: int = READ_CHUNK_SIZE) -> Tuple[bytes, int]:
+    """
+    Lê até ``max_bytes`` do log a partir do offset absoluto ``offset``.
+
+    Se ``offset`` aponta para um segmento já removido pela rotação, a leitura
+    continua do segmento mais antigo disponível.
+
+    :return: ``(dados, próximo_offset)``; ``dados`` vazio quando não há nada novo.
+    """
+    segments = _list_segments(Path(path))
+    if not segments:
+        return b'', offset
+    offset = max(offset, segments[0][0])
+    for index, (start, segment, compressed) in enumerate(segments):
+        next_start = segments[index + 1][0] if index + 1 < len(segments) else None
+        if offset < start or (next_start is not None and offset >= next_start):
+            continue
+        try:
+            with (gzip.open(segment, 'rb') if compressed else open(segment, 'rb')) as f:
+                f.seek(offset - start)
+                data = f.read(max_bytes)
+        except FileNotFoundError:
+            # Rotação/compressão concorrente: a próxima leitura encontra o novo arquivo
+            return b'', offset
+        return data, offset + len(data)
+    return b'', offset
+
+
+def log_finished(path) -> bool:
+    """O log foi fechado (apenas segmentos comprimidos restantes)."""
+    segments = _list_segments(Path(path))
+    return bool(segments) and all(compressed for _, _, compressed in segments)
+
+
+def follow_log(path, offset: int = 0, poll_interval: float = 0.5, until: Optional[Callable[[], bool]] = None,
+               timeout: Optional[float] = None) -> Iterator[Tuple[bytes, int]]:
+    """
+    Acompanha o log (como ``tail -f``), produzindo ``(dados, próximo_offset)``.
+
+    Termina quando ``until()`` é verdadeiro (padrão: ``log_finished``, que exige
+    ``TASK_LOG_COMPRESS``) e não há mais dados, ou após ``timeout`` segundos.
+    """
+    until = until or (lambda: log_finished(path))
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        finished = until()
+        data, offset = read_log(path, offset)
+        if data:
+            yield data, offset
+            continue
+        if finished or (deadline is not None and time.monotonic() >= deadline):
+            return
+        time.sleep(poll_interval)
+
+
+def delete_log(path):
+    """Remove todos os segmentos do log."""
+    for _, segment, _ in _list_segments(Path(path)):
+        segment.unlink(missing_ok=True)
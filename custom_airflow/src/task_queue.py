@@ -0,0 +1,314 @@
+"""
+Fila distribuída de tarefas no banco (``EXECUTOR_BACKEND=queue``).
+
+O scheduler enfileira cada tentativa em ``task_queue`` e workers em qualquer
+número de máquinas (``python -m custom_airflow.src.worker``) as reivindicam:
+
+- PostgreSQL: ``SELECT ... FOR UPDATE SKIP LOCKED``, então workers concorrentes
+  pegam linhas diferentes sem esperar uns pelos outros;
+- SQLite: não há locks de linha; um único ``UPDATE ... WHERE id IN (SELECT ...)``
+  com um ``claim_token`` aleatório é atômico sob o lock de escrita do banco, e
+  cada worker lê de volta só as linhas com o seu token.
+
+Os workers enviam heartbeats (``WORKER_HEARTBEAT_INTERVAL``); tentativas cujo
+heartbeat parou há mais de ``WORKER_HEARTBEAT_TIMEOUT`` segundos voltam para a
+fila com uma nova ``execution_key`` (a execução antiga é marcada como falha),
+até ``WORKER_MAX_REQUEUES`` vezes.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select, update
+
+from .models import ExecutionModel, TaskQueueModel, TaskStatus, WorkerModel, get_session
+from .state_writer import new_execution_key
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+
+# Limite de ids por cláusula IN
+_CHUNK_SIZE = 500
+
+
+def _chunks(ids: List[int]):
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        yield ids[start:start + _CHUNK_SIZE]
+
+
+def enqueue_task(dag_name: str, dag_id: int, task_id: int, dag_run_id: Optional[int], task, attempt: int = 1,
+                 priority: int = 0) -> int:
+    """Enfileira uma tentativa da tarefa e retorna o id do job."""
+    session = get_session()
+    try:
+        job = TaskQueueModel(dag_name=dag_name, dag_id=dag_id, task_id=task_id, dag_run_id=dag_run_id,
+                             attempt=attempt, execution_key=new_execution_key(), payload=json.dumps(task.to_dict()),
+                             priority=priority, state=QUEUED, requeues=0, queued_at=datetime.utcnow())
+        session.add(job)
+        session.commit()
+        return job.id
+    finally:
+        session.close()
+
+
+def claim_jobs(worker_id: str, limit: int = 1, now: Optional[datetime] = None) -> List[TaskQueueModel]:
+    """Reivindica até ``limit`` jobs da fila (maior prioridade primeiro) para o worker."""
+    now = now or datetime.utcnow()
+    token = uuid.uuid4().hex
+    table = TaskQueueModel
+    candidates = (select(table.id).where(table.state == QUEUED)
+                  .order_by(table.priority.desc(), table.id).limit(limit))
+    claim = dict(state=RUNNING, worker_id=worker_id, claim_token=token, claimed_at=now, heartbeat_at=now)
+    session = get_session()
+    try:
+        if session.get_bind().dialect.name == 'postgresql':
+            ids = session.scalars(candidates.with_for_update(skip_locked=True)).all()
+            if ids:
+                session.execute(update(table).where(table.id.in_(ids)).values(**claim)
+                                .execution_options(synchronize_session=False))
+        else:
+            # Subconsulta e atualização no mesmo comando: atômico no SQLite
+            session.execute(update(table).where(table.id.in_(candidates), table.state == QUEUED).values(**claim)
+                            .execution_options(synchronize_session=False))
+        session.commit()
+        jobs = session.scalars(select(table).where(table.claim_token == token).order_by(table.id)).all()
+        session.expunge_all()
+        return jobs
+    finally:
+        session.close()
+
+
+def complete_job(job_id: int, worker_id: str, status: TaskStatus, now: Optional[datetime] = None) -> bool:
+    """
+    Grava o resultado do job.
+
+    :return: False se o job não pertence mais ao worker (voltou para a fila por falta de heartbeat).
+    """
+    session = get_session()
+    try:
+        updated = session.execute(
+            update(TaskQueueModel)
+            .where(TaskQueueModel.id == job_id, TaskQueueModel.worker_id == worker_id,
+                   TaskQueueModel.state == RUNNING)
+            .values(state=DONE, result=status.value, finished_at=now or datetime.utcnow())
+            .execution_options(synchronize_session=False)).rowcount
+        session.commit()
+    finally:
+        session.close()
+    if not updated:
+        logger.warning("Job %s não pertence mais ao worker %s; resultado descartado.", job_id, worker_id)
+    return bool(updated)
+
+
+def cancel_jobs(job_ids: Iterable[int]) -> int:
+    """Cancela os jobs ainda não reivindicados por nenhum worker."""
+    ids = list(job_ids)
+    cancelled = 0
+    session = get_session()
+    try:
+        for chunk in _chunks(ids):
+            cancelled += session.execute(
+                update(TaskQueueModel).where(TaskQueueModel.id.in_(chunk), TaskQueueModel.state == QUEUED)
+                .values(state=CANCELLED, finished_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)).rowcount
+        session.commit()
+    finally:
+        session.close()
+    return cancelled
+
+
+def job_results(job_ids: Iterable[int]) -> Dict[int, TaskStatus]:
+    """Resultado dos jobs já concluídos entre ``job_ids``."""
+    ids = list(job_ids)
+    results = {}
+    session = get_session()
+    try:
+        for chunk in _chunks(ids):
+            for job_id, result in session.execute(
+                    select(TaskQueueModel.id, TaskQueueModel.result)
+                    .where(TaskQueueModel.id.in_(chunk), TaskQueueModel.state == DONE)):
+                results[job_id] = TaskStatus(result)
+    finally:
+        session.close()
+    return results
+
+
+def register_worker(worker_id: str, hostname: str, pid: int, now: Optional[datetime] = None):
+    now = now or datetime.utcnow()
+    session = get_session()
+    try:
+        session.merge(WorkerModel(id=worker_id, hostname=hostname, pid=pid, state='running', started_at=now,
+                                  heartbeat_at=now))
+        session.commit()
+    finally:
+        session.close()
+
+
+def heartbeat(worker_id: str, job_ids: Iterable[int], now: Optional[datetime] = None):
+    """
+    Renova o heartbeat do worker e dos jobs ``job_ids`` que ele ainda acompanha.
+
+    Jobs do worker fora de ``job_ids`` (perdidos por um erro) deixam de ser
+    renovados e voltam para a fila por ``requeue_dead_jobs``.
+    """
+    now = now or datetime.utcnow()
+    ids = list(job_ids)
+    session = get_session()
+    try:
+        session.execute(update(WorkerModel).where(WorkerModel.id == worker_id).values(heartbeat_at=now)
+                        .execution_options(synchronize_session=False))
+        for chunk in _chunks(ids):
+            session.execute(update(TaskQueueModel)
+                            .where(TaskQueueModel.id.in_(chunk), TaskQueueModel.worker_id == worker_id,
+                                   TaskQueueModel.state == RUNNING)
+                            .values(heartbeat_at=now).execution_options(synchronize_session=False))
+        session.commit()
+    finally:
+        session.close()
+
+
+def stop_worker(worker_id: str):
+    session = get_session()
+    try:
+        session.execute(update(WorkerModel).where(WorkerModel.id == worker_id).values(state='stopped')
+                        .execution_options(synchronize_session=False))
+        session.commit()
+    finally:
+        session.close()
+
+
+def requeue_dead_jobs(timeout: Optional[float] = None, max_requeues: Optional[int] = None,
+                      now: Optional[datetime] = None) -> int:
+    """
+    Devolve à fila os jobs de workers sem heartbeat há mais de ``timeout`` segundos.
+
+    A execução interrompida é marcada como falha e o job ganha uma nova
+    ``execution_key``; depois de ``max_requeues`` devoluções o job é concluído como falha.
+
+    :return: Quantidade de jobs devolvidos ou encerrados.
+    """
+    timeout = timeout if timeout is not None else float(os.getenv('WORKER_HEARTBEAT_TIMEOUT', '30'))
+    max_requeues = max_requeues if max_requeues is not None else int(os.getenv('WORKER_MAX_REQUEUES', '3'))
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=timeout)
+    table = TaskQueueModel
+    handled = 0
+    session = get_session()
+    try:
+        stale = session.execute(select(table.id, table.execution_key, table.requeues, table.worker_id)
+                                .where(table.state == RUNNING, table.heartbeat_at < cutoff)).all()
+        for job_id, execution_key, requeues, worker_id in stale:
+            if (requeues or 0) >= max_requeues:
+                values = dict(state=DONE, result=TaskStatus.failed.value, finished_at=now)
+            else:
+                values = dict(state=QUEUED, worker_id=None, claim_token=None, claimed_at=None, heartbeat_at=None,
+                              execution_key=new_execution_key(), requeues=(requeues or 0) + 1)
+            # Condicional: outro worker pode ter feito o mesmo ao mesmo tempo
+            if not session.execute(update(table).where(table.id == job_id, table.state == RUNNING,
+                                                       table.heartbeat_at < cutoff).values(**values)
+                                   .execution_options(synchronize_session=False)).rowcount:
+                continue
+            session.execute(update(ExecutionModel)
+                            .where(ExecutionModel.execution_key == execution_key,
+                                   ExecutionModel.status == TaskStatus.running)
+                            .values(status=TaskStatus.failed, end_time=now)
+                            .execution_options(synchronize_session=False))
+            handled += 1
+            logger.warning("Job %s do worker %s sem heartbeat desde antes de %s: %s.", job_id, worker_id, cutoff,
+                           'devolvido à fila' if values['state'] == QUEUED else 'encerrado como falha')
+        session.execute(update(WorkerModel).where(WorkerModel.state == 'running', WorkerModel.heartbeat_at < cutoff)
+                        .values(state='lost').execution_options(synchronize_session=False))
+        session.commit()
+    finally:
+        session.close()
+    return handled
+
+
+def purge_finished_jobs(older_than: timedelta, now: Optional[datetime] = None) -> int:
+    """Apaga os jobs concluídos ou cancelados há mais de ``older_than``."""
+    cutoff = (now or datetime.utcnow()) - older_than
+    session = get_session()
+    try:
+        removed = session.execute(delete(TaskQueueModel)
+                                  .where(TaskQueueModel.state.in_((DONE, CANCELLED)),
+                                         TaskQueueModel.finished_at < cutoff)
+                                  .execution_options(synchronize_session=False)).rowcount
+        session.commit()
+    finally:
+        session.close()
+    return removed
+
+
+class QueueResultWatcher:
+    """Consulta periodicamente os jobs enfileirados pelo processo e completa os futures correspondentes."""
+
+    def __init__(self, poll_interval: Optional[float] = None):
+        self.poll_interval = poll_interval or float(os.getenv('QUEUE_POLL_INTERVAL', '0.5'))
+        self._futures: Dict[int, Future] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def watch(self, job_id: int) -> Future:
+        future = Future()
+        with self._cond:
+            self._futures[job_id] = future
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='queue-results', daemon=True)
+                self._thread.start()
+            if len(self._futures) == 1:
+                self._cond.notify_all()
+        return future
+
+    def forget(self, job_ids: Iterable[int]):
+        with self._cond:
+            for job_id in job_ids:
+                self._futures.pop(job_id, None)
+
+    def poll(self):
+        """Completa os futures dos jobs concluídos."""
+        with self._cond:
+            pending = list(self._futures)
+        if not pending:
+            return
+        try:
+            results = job_results(pending)
+        except Exception as e:
+            logger.error("Erro ao consultar a fila de tarefas: %s", e)
+            return
+        for job_id, status in results.items():
+            with self._cond:
+                future = self._futures.pop(job_id, None)
+            if future is not None and not future.done():
+                future.set_result(status)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._futures:
+                    self._cond.wait()
+            self.poll()
+            with self._cond:
+                self._cond.wait(self.poll_interval)
+
+
+_queue_watcher = None
+_queue_watcher_lock = threading.Lock()
+
+
+def get_queue_watcher() -> QueueResultWatcher:
+    """Observador de resultados da fila compartilhado pelo processo."""
+    global _queue_watcher
+    if _queue_watcher is None:
+        with _queue_watcher_lock:
+            if _queue_watcher is None:
+                _queue_watcher = QueueResultWatcher()
+    return _queue_watcher
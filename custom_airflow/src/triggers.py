@@ -0,0 +1,207 @@
+"""
+Serviço de triggers das tarefas adiáveis (sensores, ``Task(trigger=...)``).
+
+Uma tarefa com ``trigger`` não ocupa thread, processo nem slot do run enquanto
+espera: o run entrega a condição a este serviço, que verifica todas as
+condições pendentes de todas as DAGs em um único loop asyncio (cada uma a cada
+``poke_interval`` segundos), e a tarefa só volta para a fila de prontas quando
+a condição dispara. Condições disponíveis:
+
+- ``{'type': 'file', 'path': '/dados/2025-01-01/*.parquet'}``: algum arquivo casa com o caminho/padrão;
+- ``{'type': 'time', 'seconds': 300}`` ou ``{'type': 'time', 'at': '2025-01-01T06:00:00+00:00'}``;
+- ``{'type': 'command', 'command': ['psql', '-c', '...']}``: o comando termina com código 0.
+
+Outros tipos podem ser registrados com ``@register_trigger('nome')``: a classe
+recebe os demais campos da condição no construtor e implementa ``async poll()``.
+"""
+import asyncio
+import concurrent.futures
+import glob
+import logging
+import os
+import random
+import shlex
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .async_executor import AsyncTaskRunner
+from .metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+DEFERRED_TASKS = gauge('deferred_tasks', 'Tarefas aguardando a condição no serviço de triggers.')
+TRIGGER_EVENTS = counter('trigger_events_total', 'Esperas encerradas no serviço de triggers.', ('result',))
+
+TRIGGER_TYPES: Dict[str, type] = {}
+
+
+def register_trigger(name: str):
+    """Registra uma classe de condição para ``{'type': name, ...}``."""
+    def decorator(cls):
+        TRIGGER_TYPES[name] = cls
+        return cls
+    return decorator
+
+
+class TriggerTimeout(TimeoutError):
+    pass
+
+
+class BaseTrigger:
+    async def poll(self) -> bool:
+        raise NotImplementedError
+
+    def next_delay(self, poke_interval: float) -> float:
+        """Espera até a próxima verificação."""
+        return poke_interval
+
+
+@register_trigger('file')
+class FileTrigger(BaseTrigger):
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.pattern = glob.has_magic(self.path)
+
+    async def poll(self) -> bool:
+        # Fora do loop: um glob em diretório grande ou um stat em NFS lento
+        # travariam a verificação de todas as outras condições
+        return await asyncio.to_thread(self._exists)
+
+    def _exists(self) -> bool:
+        if self.pattern:
+            return next(glob.iglob(self.path), None) is not None
+        return os.path.exists(self.path)
+
+
+@register_trigger('time')
+class TimeTrigger(BaseTrigger):
+    def __init__(self, seconds: float = None, at: str = None):
+        if (seconds is None) == (at is None):
+            raise ValueError("Condição 'time' requer 'seconds' ou 'at'.")
+        if at is not None:
+            moment = datetime.fromisoformat(at)
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            self.deadline = moment.timestamp()
+        else:
+            self.deadline = time.time() + float(seconds)
+
+    async def poll(self) -> bool:
+        return time.time() >= self.deadline
+
+    def next_delay(self, poke_interval: float) -> float:
+        # Acorda no horário, sem verificações intermediárias
+        return max(0.0, self.deadline - time.time())
+
+
+@register_trigger('command')
+class CommandTrigger(BaseTrigger):
+    def __init__(self, command, timeout: float = None):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        if not self.command:
+            raise ValueError("Condição 'command' requer um comando.")
+        self.timeout = timeout or float(os.getenv('TRIGGER_COMMAND_TIMEOUT', '30'))
+
+    async def poll(self) -> bool:
+        process = await asyncio.create_subprocess_exec(*self.command, stdout=subprocess.DEVNULL,
+                                                       stderr=subprocess.DEVNULL)
+        try:
+            return await asyncio.wait_for(process.wait(), self.timeout) == 0
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+
+def build_trigger(spec: dict) -> BaseTrigger:
+    """
+    Instancia a condição descrita por ``spec``.
+
+    :raises ValueError: Se o tipo não existir ou os campos forem inválidos.
+    """
+    if not isinstance(spec, dict) or 'type' not in spec:
+        raise ValueError(f"Condição inválida: {spec!r} (esperado um dicionário com 'type').")
+    fields = dict(spec)
+    kind = fields.pop('type')
+    if kind not in TRIGGER_TYPES:
+        raise ValueError(f"Tipo de condição desconhecido: '{kind}'.")
+    try:
+        return TRIGGER_TYPES[kind](**fields)
+    except TypeError as e:
+        raise ValueError(f"Campos inválidos para a condição '{kind}': {e}") from e
+
+
+class TriggerService:
+    """Verifica as condições das tarefas adiadas em um loop asyncio próprio."""
+
+    def __init__(self, runner: Optional[AsyncTaskRunner] = None, poke_interval: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        # Semáforo do runner: verificações simultâneas (principalmente processos de 'command')
+        self.runner = runner or AsyncTaskRunner(int(os.getenv('TRIGGER_MAX_CONCURRENT_CHECKS', '64')))
+        self.poke_interval = poke_interval or float(os.getenv('TRIGGER_POKE_INTERVAL', '5'))
+        self.timeout = timeout if timeout is not None else float(os.getenv('TRIGGER_TIMEOUT', '86400'))
+
+    def defer(self, spec: dict, poke_interval: Optional[float] = None,
+              timeout: Optional[float] = None) -> concurrent.futures.Future:
+        """
+        Entrega a condição ao serviço.
+
+        :return: Future concluído quando a condição dispara, ou com ``TriggerTimeout``
+            depois de ``timeout`` segundos (0 = sem limite). Cancelá-lo encerra a espera.
+        """
+        trigger = build_trigger(spec)
+        return self.runner.submit(self._wait(trigger, poke_interval or self.poke_interval,
+                                             self.timeout if timeout is None else timeout))
+
+    def waiting(self) -> int:
+        """Quantidade de condições pendentes."""
+        return int(DEFERRED_TASKS.value())
+
+    async def _wait(self, trigger: BaseTrigger, poke_interval: float, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        DEFERRED_TASKS.inc()
+        try:
+            # Espalha a primeira verificação de muitas condições adiadas ao mesmo tempo
+            await asyncio.sleep(random.uniform(0, min(poke_interval, 1.0)))
+            failed = False
+            while True:
+                async with self.runner.semaphore:
+                    try:
+                        if await trigger.poll():
+                            TRIGGER_EVENTS.inc(result='fired')
+                            return True
+                    except Exception as e:
+                        # Erro na verificação conta como condição ainda não atendida
+                        if not failed:
+                            logger.warning("Erro ao verificar a condição %s: %s", type(trigger).__name__, e)
+                            failed = True
+                delay = trigger.next_delay(poke_interval)
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        TRIGGER_EVENTS.inc(result='timeout')
+                        raise TriggerTimeout(f"Condição não atendida em {timeout}s.")
+                    delay = min(delay, remaining)
+                await asyncio.sleep(delay)
+        finally:
+            DEFERRED_TASKS.dec()
+
+
+_trigger_service = None
+_trigger_service_lock = threading.Lock()
+
+
+def get_trigger_service() -> TriggerService:
+    """Serviço de triggers compartilhado pelo processo."""
+    global _trigger_service
+    if _trigger_service is None:
+        with _trigger_service_lock:
+            if _trigger_service is None:
+                _trigger_service = TriggerService()
+    return _trigger_service
@@ -0,0 +1,250 @@
+import hashlib
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from filelock import FileLock, Timeout
+
+logger = logging.getLogger(__name__)
+
+READY_MARKER = '.ready'
+LAST_USED_MARKER = '.last_used'
+
+
+def env_key(requirements: Optional[Iterable[str]] = None) -> str:
+    """Chave do ambiente: hash dos requisitos normalizados e da versão do Python."""
+    normalized = sorted({req.strip() for req in (requirements or []) if req and req.strip()})
+    digest = hashlib.sha256()
+    digest.update(f"{platform.python_implementation()}-{platform.python_version()}".encode())
+    for req in normalized:
+        digest.update(b'\0' + req.encode())
+    return digest.hexdigest()[:16]
+
+
+def venv_python(env_dir: Path) -> Path:
+    if os.name == 'nt':
+        return env_dir / 'Scripts' / 'python.exe'
+    return env_dir / 'bin' / 'python'
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class VenvCache:
+    """Cache de ambientes virtuais compartilhados, endereçados pelo conteúdo.
+
+    Tarefas com os mesmos requisitos (e mesma versão do Python) usam o mesmo
+    ambiente em ``<root>/<chave>``. Os ambientes são construídos em segundo plano
+    (``prebuild``) assim que a DAG é carregada, protegidos por um lock de arquivo
+    para que processos concorrentes não construam o mesmo ambiente duas vezes, e
+    removidos por LRU quando o cache excede ``max_envs`` ou ``max_bytes``. Um
+    ambiente em uso (``in_use``/``acquire``) nunca é removido.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_envs: Optional[int] = None,
+                 max_bytes: Optional[int] = None, build_workers: Optional[int] = None):
+        self.root = Path(root or os.getenv('VENV_CACHE_DIR', 'venvs'))
+        self.max_envs = max_envs if max_envs is not None else int(os.getenv('VENV_CACHE_MAX_ENVS', '20'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('VENV_CACHE_MAX_MB', '0')) * 1024 * 1024
+        # Ambientes usados há menos tempo que isso nunca são removidos (podem estar em uso)
+        self.min_idle_seconds = float(os.getenv('VENV_CACHE_MIN_IDLE', '600'))
+        self._builder = ThreadPoolExecutor(
+            max_workers=build_workers or int(os.getenv('VENV_BUILD_WORKERS', '2')),
+            thread_name_prefix='venv-build')
+        self._building: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Ambientes em uso neste processo -> quantidade de usuários
+        self._in_use: Dict[Path, int] = {}
+        self._refresher = None
+        self._stopped = threading.Event()
+
+    def env_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def is_ready(self, key: str) -> bool:
+        return (self.env_dir(key) / READY_MARKER).exists()
+
+    def prebuild(self, requirements: Optional[Iterable[str]] = None) -> Future:
+        """Agenda a construção do ambiente em segundo plano (não bloqueia)."""
+        requirements = list(requirements or [])
+        key = env_key(requirements)
+        with self._lock:
+            future = self._building.get(key)
+            if future is None:
+                if self.is_ready(key):
+                    future = Future()
+                    future.set_result(self.env_dir(key))
+                    return future
+                future = self._builder.submit(self._build, key, requirements)
+                self._building[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+            return future
+
+    def prebuild_for_dag(self, dag) -> List[Future]:
+        """Agenda os ambientes de todas as tarefas da DAG."""
+        return [self.prebuild(requirements)
+                for requirements in {tuple(sorted(task.requirements or [])) for task in dag.tasks.values()}]
+
+    def ensure(self, requirements: Optional[Iterable[str]] = None) -> Path:
+        """Retorna o diretório do ambiente pronto, construindo-o se necessário."""
+        key = env_key(requirements)
+        env_dir = self.env_dir(key)
+        if not self.is_ready(key):
+            env_dir = self.prebuild(requirements).result()
+        self._touch(env_dir)
+        return env_dir
+
+    def evict(self):
+        """Remove os ambientes menos usados recentemente além dos limites do cache."""
+        envs = []
+        for env_dir in self.root.iterdir() if self.root.exists() else []:
+            if (env_dir / READY_MARKER).exists():
+                envs.append((self._last_used(env_dir), env_dir))
+        envs.sort()
+        sizes = {env_dir: _dir_size(env_dir) for _, env_dir in envs} if self.max_bytes else {}
+        total = sum(sizes.values())
+        count = len(envs)
+        for last_used, env_dir in envs:
+            too_many = self.max_envs and count > self.max_envs
+            too_big = self.max_bytes and total > self.max_bytes
+            if not (too_many or too_big):
+                break
+            if time.time() - last_used < self.min_idle_seconds:
+                break
+            if self._in_use.get(env_dir):
+                continue
+            lock = FileLock(str(env_dir) + '.lock')
+            try:
+                with lock.acquire(timeout=0):
+                    # Sob o lock: outro processo pode ter usado o ambiente depois da listagem
+                    if time.time() - self._last_used(env_dir) < self.min_idle_seconds:
+                        continue
+                    # Sem o marcador, quem chegar agora reconstrói em vez de usar um ambiente pela metade
+                    (env_dir / READY_MARKER).unlink(missing_ok=True)
+                    shutil.rmtree(env_dir, ignore_errors=True)
+            except Timeout:
+                continue
+            count -= 1
+            total -= sizes.get(env_dir, 0)
+            logger.info("Ambiente virtual '%s' removido do cache (LRU).", env_dir.name)
+
+    def acquire(self, env_dir: Path):
+        """
+        Marca o ambiente como em uso (tarefa em execução, worker pré-aquecido).
+
+        Ambientes em uso não são removidos por este processo, e o ``.last_used``
+        deles é renovado em segundo plano para que os demais processos também os preservem.
+        """
+        env_dir = Path(env_dir)
+        with self._lock:
+            self._in_use[env_dir] = self._in_use.get(env_dir, 0) + 1
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name='venv-in-use', daemon=True)
+                self._refresher.start()
+        self._touch(env_dir)
+
+    def release(self, env_dir: Path):
+        env_dir = Path(env_dir)
+        with self._lock:
+            remaining = self._in_use.get(env_dir, 0) - 1
+            if remaining > 0:
+                self._in_use[env_dir] = remaining
+            else:
+                self._in_use.pop(env_dir, None)
+        self._touch(env_dir)
+
+    @contextmanager
+    def in_use(self, env_dir: Path):
+        self.acquire(env_dir)
+        try:
+            yield env_dir
+        finally:
+            self.release(env_dir)
+
+    def shutdown(self, wait: bool = True):
+        self._stopped.set()
+        self._builder.shutdown(wait=wait)
+
+    def _forget(self, key):
+        with self._lock:
+            self._building.pop(key, None)
+
+    def _touch(self, env_dir: Path):
+        # Só ambientes do cache: o interpretador do sistema também pode ser "usado"
+        if not (env_dir / READY_MARKER).exists():
+            return
+        try:
+            (env_dir / LAST_USED_MARKER).touch()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _last_used(env_dir: Path) -> float:
+        try:
+            return (env_dir / LAST_USED_MARKER).stat().st_mtime
+        except OSError:
+            return 0.0
+
+    def _refresh_loop(self):
+        # Bem antes de ``min_idle_seconds``: o ambiente nunca parece ocioso enquanto está em uso
+        while not self._stopped.wait(max(1.0, self.min_idle_seconds / 4)):
+            with self._lock:
+                env_dirs = list(self._in_use)
+            for env_dir in env_dirs:
+                self._touch(env_dir)
+
+    def _build(self, key: str, requirements: List[str]) -> Path:
+        env_dir = self.env_dir(key)
+        self.root.mkdir(parents=True, exist_ok=True)
+        with FileLock(str(env_dir) + '.lock'):
+            if self.is_ready(key):
+                return env_dir
+            started = time.monotonic()
+            logger.info("Construindo ambiente virtual '%s' para os requisitos %s.", key, requirements or '[]')
+            # Constrói no diretório final (o venv grava o próprio caminho em bin/pip, nos
+            # shebangs e no activate) e só publica com o marcador, criado por último: um
+            # ambiente pela metade, de uma construção interrompida, é descartado aqui.
+            shutil.rmtree(env_dir, ignore_errors=True)
+            command = [sys.executable, '-m', 'venv', str(env_dir)]
+            if not requirements:
+                command.insert(3, '--without-pip')
+            subprocess.check_call(command)
+            if requirements:
+                subprocess.check_call([str(venv_python(env_dir)), '-m', 'pip', 'install', '--quiet', *requirements])
+                (env_dir / 'requirements.txt').write_text('\n'.join(requirements) + '\n', encoding='utf-8')
+            (env_dir / READY_MARKER).touch()
+            self._touch(env_dir)
+            logger.info("Ambiente virtual '%s' pronto em %.1fs.", key, time.monotonic() - started)
+        self.evict()
+        return env_dir
+
+
+_venv_cache = None
+_venv_cache_lock = threading.Lock()
+
+
+def get_venv_cache() -> VenvCache:
+    """Cache de ambientes compartilhado pelo processo."""
+    global _venv_cache
+    if _venv_cache is None:
+        with _venv_cache_lock:
+            if _venv_cache is None:
+                _venv_cache = VenvCache()
+    return _venv_cache
@@ -0,0 +1,69 @@
+"""
+Processo de trabalho "quente" executado pelo Python do ambiente virtual.
+
+Lê do descritor ``argv[1]`` uma requisição JSON por linha
+(``{"script": "<caminho>"}``), executa o script com ``runpy`` como se fosse
+``python <script>`` e responde no descritor ``argv[2]``. Usa apenas a
+biblioteca padrão, pois roda dentro do venv da tarefa.
+"""
+import importlib
+import json
+import os
+import runpy
+import sys
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _max_rss_kb():
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _run_script(script):
+    old_argv, old_path = sys.argv, list(sys.path)
+    sys.argv = [script]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    try:
+        runpy.run_path(script, run_name='__main__')
+        return True, None
+    except SystemExit as e:
+        if e.code in (None, 0):
+            return True, None
+        if not isinstance(e.code, int):
+            # Como o interpretador: a mensagem de sys.exit('...') vai para o stderr
+            print(e.code, file=sys.stderr)
+        return False, f'SystemExit: {e.code}'
+    except BaseException:
+        # O stderr do worker é a saída da execução (log): o traceback fica junto da saída do script
+        error = traceback.format_exc()
+        sys.stderr.write(error)
+        return False, error
+    finally:
+        sys.argv, sys.path[:] = old_argv, old_path
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def main():
+    requests = os.fdopen(int(sys.argv[1]), 'r', encoding='utf-8')
+    response = os.fdopen(int(sys.argv[2]), 'w', buffering=1, encoding='utf-8')
+    for module in filter(None, os.getenv('WARM_WORKER_PRELOAD', '').split(',')):
+        try:
+            importlib.import_module(module.strip())
+        except ImportError:
+            pass
+    for line in requests:
+        request = json.loads(line)
+        ok, error = _run_script(request['script'])
+        response.write(json.dumps({'ok': ok, 'error': error, 'max_rss_kb': _max_rss_kb()}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Worker da fila distribuída (``task_queue``).
+
+Reivindica tentativas enfileiradas pelo scheduler com ``EXECUTOR_BACKEND=queue``,
+executa até ``WORKER_CONCURRENCY`` ao mesmo tempo com ``DAG.execute_task`` (mesmo
+registro de execuções, logs, cache e recursos do modo local) e grava o resultado
+no job. Pode rodar em qualquer número de máquinas apontando para o mesmo banco::
+
+    python -m custom_airflow.src.worker --concurrency 8
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from .dag_parser import DAG, Task
+from .logging_config import configure_logging, log_context
+from .models import TaskStatus
+from .resources import warn_per_process_limits
+from .state_writer import get_state_writer
+from .task_queue import claim_jobs, complete_job, heartbeat, register_worker, requeue_dead_jobs, stop_worker
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, concurrency: Optional[int] = None, poll_interval: Optional[float] = None,
+                 heartbeat_interval: Optional[float] = None, worker_id: Optional[str] = None):
+        self.concurrency = concurrency or int(os.getenv('WORKER_CONCURRENCY', '4'))
+        self.poll_interval = poll_interval or float(os.getenv('QUEUE_POLL_INTERVAL', '0.5'))
+        self.heartbeat_interval = heartbeat_interval or float(os.getenv('WORKER_HEARTBEAT_INTERVAL', '5'))
+        self.hostname = socket.gethostname()
+        self.worker_id = worker_id or f'{self.hostname}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._running = set()
+        # Resultados que não puderam ser gravados (job id -> status), regravados pelo loop principal
+        self._unsaved: Dict[int, TaskStatus] = {}
+        self._lock = threading.Lock()
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Loop principal: heartbeat, recuperação de jobs órfãos e reivindicação de novos jobs até ``stop``."""
+        stop = stop or threading.Event()
+        register_worker(self.worker_id, self.hostname, os.getpid())
+        warn_per_process_limits(f'worker {self.worker_id}')
+        logger.info("Worker %s iniciado (%s tarefa(s) simultânea(s)).", self.worker_id, self.concurrency)
+        last_heartbeat = 0.0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='worker') as pool:
+            while not stop.is_set():
+                claimed = []
+                try:
+                    self._save_results()
+                    if time.monotonic() - last_heartbeat >= self.heartbeat_interval:
+                        heartbeat(self.worker_id, self._running_jobs())
+                        requeue_dead_jobs()
+                        last_heartbeat = time.monotonic()
+                    with self._lock:
+                        free = self.concurrency - len(self._running)
+                    if free > 0:
+                        claimed = claim_jobs(self.worker_id, free)
+                except Exception as e:
+                    logger.error("Erro no worker %s ao acessar a fila: %s", self.worker_id, e)
+                for job in claimed:
+                    with self._lock:
+                        self._running.add(job.id)
+                    pool.submit(self._run_job, job)
+                if not claimed:
+                    stop.wait(self.poll_interval)
+            logger.info("Worker %s encerrando; aguardando %s tarefa(s) em andamento.",
+                        self.worker_id, len(self._running))
+            # Mantém o heartbeat enquanto as tarefas em andamento terminam
+            while True:
+                with self._lock:
+                    if not self._running:
+                        break
+                try:
+                    self._save_results()
+                    if time.monotonic() - last_heartbeat >= self.heartbeat_interval:
+                        heartbeat(self.worker_id, self._running_jobs())
+                        last_heartbeat = time.monotonic()
+                except Exception as e:
+                    logger.error("Erro no worker %s ao acessar a fila: %s", self.worker_id, e)
+                time.sleep(min(self.poll_interval, 0.1))
+        stop_worker(self.worker_id)
+        logger.info("Worker %s encerrado.", self.worker_id)
+
+    def _run_job(self, job):
+        status = TaskStatus.failed
+        try:
+            with log_context(worker=self.worker_id):
+                task = Task.from_dict(json.loads(job.payload))
+                # DAG mínima: a tarefa e os ids já registrados pelo scheduler
+                dag = DAG(job.dag_name, schedule_interval='@once')
+                dag.tasks[task.name] = task
+                dag._dag_id, dag._task_ids = job.dag_id, {task.name: job.task_id}
+                status = dag.execute_task(task, job.attempt, job.dag_run_id, execution_key=job.execution_key)
+        except Exception as e:
+            logger.error("Erro ao executar o job %s: %s", job.id, e)
+        finally:
+            try:
+                # A execução precisa estar gravada antes de o scheduler ver o resultado
+                get_state_writer().flush()
+            except Exception as e:
+                logger.error("Erro ao gravar as execuções do job %s: %s", job.id, e)
+            self._complete(job.id, status)
+
+    def _running_jobs(self):
+        with self._lock:
+            return list(self._running)
+
+    def _complete(self, job_id: int, status: TaskStatus):
+        """
+        Grava o resultado do job e o libera.
+
+        Se a gravação falhar, o job continua com o worker (e com heartbeat) e o
+        resultado é regravado pelo loop principal, em vez de ficar órfão.
+        """
+        try:
+            complete_job(job_id, self.worker_id, status)
+        except Exception as e:
+            logger.error("Erro ao concluir o job %s; nova tentativa em seguida: %s", job_id, e)
+            with self._lock:
+                self._unsaved[job_id] = status
+            return
+        with self._lock:
+            self._unsaved.pop(job_id, None)
+            self._running.discard(job_id)
+
+    def _save_results(self):
+        with self._lock:
+            unsaved = list(self._unsaved.items())
+        for job_id, status in unsaved:
+            self._complete(job_id, status)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa tarefas da fila distribuída (EXECUTOR_BACKEND=queue).")
+    parser.add_argument('--concurrency', type=int, default=None, help="Tarefas simultâneas (WORKER_CONCURRENCY).")
+    parser.add_argument('--worker-id', default=None, help="Identificador do worker (padrão: host-pid-aleatório).")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    Worker(args.concurrency, worker_id=args.worker_id).run(stop)
+
+
+if __name__ == '__main__':
+    main()
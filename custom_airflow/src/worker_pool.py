@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .venv_cache import get_venv_cache
+
+logger = logging.getLogger(__name__)
+
+WARM_WORKER_SCRIPT = Path(__file__).resolve().parent / 'warm_worker.py'
+
+
+class WarmWorker:
+    """Um interpretador de longa duração de um ambiente virtual (``warm_worker.py``)."""
+
+    def __init__(self, python_executable: str):
+        self.python_executable = str(python_executable)
+        # O interpretador do worker vive no ambiente: ele não sai do cache enquanto o worker existir
+        self.env_dir = Path(self.python_executable).parent.parent
+        # Canais próprios para requisições e respostas: stdin/stdout ficam livres para o script
+        request_read, request_write = os.pipe()
+        response_read, response_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [self.python_executable, str(WARM_WORKER_SCRIPT), str(request_read), str(response_write)],
+                stdin=subprocess.DEVNULL,
+                # stdout e stderr dos scripts são lidos por ``run`` e enviados ao log da execução
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                pass_fds=(request_read, response_write),
+            )
+        except Exception:
+            os.close(request_write)
+            os.close(response_read)
+            raise
+        finally:
+            os.close(request_read)
+            os.close(response_write)
+        get_venv_cache().acquire(self.env_dir)
+        self._requests = os.fdopen(request_write, 'wb')
+        self._response_fd = response_read
+        self._output_fd = self.process.stdout.fileno()
+        os.set_blocking(self._output_fd, False)
+        self._buffer = b''
+        self.tasks_run = 0
+        self.max_rss_kb = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, script_path: str, timeout: Optional[float] = None, log=None):
+        """
+        Executa o script no worker, enviando a saída para ``log`` (ou para o stdout do processo).
+
+        Levanta as mesmas exceções de ``subprocess.run(check=True, timeout=...)``:
+        ``TimeoutExpired`` (o worker é encerrado) ou ``CalledProcessError``.
+        """
+        command = [self.python_executable, script_path]
+        try:
+            self._requests.write((json.dumps({'script': script_path}) + '\n').encode('utf-8'))
+            self._requests.flush()
+        except BrokenPipeError:
+            self.close()
+            raise subprocess.CalledProcessError(self.process.returncode, command)
+        self.tasks_run += 1
+
+        response = self._read_response(time.monotonic() + timeout if timeout else None, log)
+        if response is None:
+            self.close()
+            raise subprocess.TimeoutExpired(command, timeout)
+        if response is EOFError:
+            returncode = self.process.wait()
+            self.close()
+            raise subprocess.CalledProcessError(returncode, command)
+        self.max_rss_kb = response.get('max_rss_kb', 0)
+        if not response['ok']:
+            raise subprocess.CalledProcessError(1, command, output=response.get('error'))
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process.stdout.close()
+        try:
+            self._requests.close()
+        except BrokenPipeError:
+            pass
+        if self._response_fd is not None:
+            os.close(self._response_fd)
+            self._response_fd = None
+            get_venv_cache().release(self.env_dir)
+
+    def _read_response(self, deadline, log=None):
+        fds = [self._response_fd, self._output_fd]
+        while b'\n' not in self._buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            ready, _, _ = select.select(fds, [], [], remaining)
+            if not ready:
+                return None
+            if self._output_fd in ready and not self._copy_output(log):
+                fds = [self._response_fd]
+            if self._response_fd in ready:
+                chunk = os.read(self._response_fd, 65536)
+                if not chunk:
+                    return EOFError
+                self._buffer += chunk
+        # O worker esvazia stdout/stderr antes de responder: o restante da saída já está no pipe
+        self._copy_output(log)
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def _copy_output(self, log) -> bool:
+        """Copia a saída disponível sem bloquear; retorna False no fim do arquivo."""
+        while True:
+            try:
+                chunk = os.read(self._output_fd, 65536)
+            except BlockingIOError:
+                return True
+            if not chunk:
+                return False
+            if log is not None:
+                log.write(chunk)
+            elif hasattr(sys.stdout, 'buffer'):
+                sys.stdout.buffer.write(chunk)
+                sys.stdout.flush()
+            else:
+                sys.stdout.write(chunk.decode('utf-8', errors='replace'))
+
+
+class WarmWorkerPool:
+    """Pool de interpretadores pré-aquecidos, separados por ambiente virtual.
+
+    Cada worker executa uma tarefa por vez via ``runpy``, evitando a partida do
+    interpretador e as importações a cada execução. Um worker é descartado após
+    qualquer falha ou timeout (isolamento igual ao de um subprocesso novo) e
+    reciclado após ``max_tasks`` execuções ou ao passar de ``max_memory_mb``.
+    """
+
+    def __init__(self, max_tasks: Optional[int] = None, max_memory_mb: Optional[int] = None,
+                 max_idle: Optional[int] = None):
+        self.max_tasks = max_tasks or int(os.getenv('WARM_WORKER_MAX_TASKS', '100'))
+        self.max_memory_mb = max_memory_mb or int(os.getenv('WARM_WORKER_MAX_MEMORY_MB', '512'))
+        self.max_idle = max_idle or int(os.getenv('WARM_WORKER_MAX_IDLE', '4'))
+        self._idle: Dict[str, List[WarmWorker]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supported() -> bool:
+        return os.name == 'posix'
+
+    def run(self, python_executable, script_path: str, timeout: Optional[float] = None, log=None):
+        worker = self._acquire(str(python_executable))
+        try:
+            worker.run(script_path, timeout, log)
+        except BaseException:
+            worker.close()
+            raise
+        self._release(worker)
+
+    def prewarm(self, python_executable, count: int = 1):
+        """Inicia workers ociosos para o ambiente, até ``count``."""
+        python_executable = str(python_executable)
+        with self._lock:
+            missing = max(0, min(count, self.max_idle) - len(self._idle.get(python_executable, [])))
+        for _ in range(missing):
+            self._release(WarmWorker(python_executable))
+
+    def shutdown(self):
+        with self._lock:
+            workers = [w for idle in self._idle.values() for w in idle]
+            self._idle.clear()
+        for worker in workers:
+            worker.close()
+
+    def _acquire(self, python_executable):
+        with self._lock:
+            idle = self._idle.get(python_executable, [])
+            while idle:
+                worker = idle.pop()
+                if worker.alive:
+                    return worker
+                worker.close()
+        return WarmWorker(python_executable)
+
+    def _release(self, worker):
+        if not worker.alive or worker.tasks_run >= self.max_tasks or worker.max_rss_kb > self.max_memory_mb * 1024:
+            logger.debug("Reciclando worker %s após %s tarefa(s).", worker.process.pid, worker.tasks_run)
+            worker.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(worker.python_executable, [])
+            if len(idle) < self.max_idle:
+                idle.append(worker)
+                return
+        worker.close()
+
+
+_warm_worker_pool = None
+_warm_worker_pool_lock = threading.Lock()
+
+
+def get_warm_worker_pool() -> WarmWorkerPool:
+    """Pool de workers compartilhado pelo processo."""
+    global _warm_worker_pool
+    if _warm_worker_pool is None:
+        with _warm_worker_pool_lock:
+            if _warm_worker_pool is None:
+                _warm_worker_pool = WarmWorkerPool()
+    return _warm_worker_pool
@@ -6,3 +6,18 @@ import os
 # Obter o diretório raiz do projeto
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
+
+import pytest
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Aponta o engine compartilhado para um banco SQLite temporário com as tabelas criadas."""
+    from custom_airflow.src import models
+
+    monkeypatch.setenv('ENV', 'development')
+    monkeypatch.setenv('SQLITE_DB', str(tmp_path / 'test.db'))
+    models.dispose_engine()
+    models.Base.metadata.create_all(models.get_engine())
+    yield models.get_engine()
+    models.dispose_engine()
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from custom_airflow.src.async_executor import AsyncExecutor, AsyncTaskRunner
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.models import DagRunState, ExecutionModel, TaskStatus, get_session
+from custom_airflow.src.task_logs import read_log
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    async def python_executable(self):
+        return sys.executable
+
+    monkeypatch.setattr(AsyncExecutor, 'python_executable', python_executable)
+    runner = AsyncTaskRunner(max_concurrency=4)
+    yield runner
+    runner.shutdown()
+
+
+def _executor(runner, script, timeout=10, log_path=None):
+    task = SimpleNamespace(name=script.stem, script_path=str(script), requirements=None, status=None)
+    return AsyncExecutor(task, timeout=timeout, log_path=log_path, runner=runner)
+
+
+def test_runs_script_and_captures_output(runner, tmp_path):
+    script = tmp_path / 'ok.py'
+    script.write_text("print('assíncrono')\n")
+    executor = _executor(runner, script, log_path=tmp_path / 'ok.log')
+
+    runner.submit(executor.run()).result(timeout=10)
+
+    assert executor.task.status == 'success'
+    assert read_log(tmp_path / 'ok.log')[0] == 'assíncrono\n'.encode()
+
+
+def test_log_writes_and_compression_run_off_the_loop(runner, tmp_path, monkeypatch):
+    from custom_airflow.src.task_logs import TaskLogWriter
+
+    threads = []
+    for name in ('write', 'close'):
+        original = getattr(TaskLogWriter, name)
+
+        def traced(self, *args, _original=original, _name=name):
+            threads.append((_name, threading.current_thread().name))
+            return _original(self, *args)
+
+        monkeypatch.setattr(TaskLogWriter, name, traced)
+    script = tmp_path / 'chatty.py'
+    script.write_text("print('x' * 1000)\n")
+
+    runner.submit(_executor(runner, script, log_path=tmp_path / 'chatty.log').run()).result(timeout=10)
+
+    assert {name for name, _ in threads} == {'write', 'close'}
+    assert all(thread.startswith('task-logs') for _, thread in threads)
+
+
+def test_failure_and_timeout_raise_subprocess_errors(runner, tmp_path):
+    failing = tmp_path / 'fail.py'
+    failing.write_text('raise SystemExit(4)\n')
+    slow = tmp_path / 'slow.py'
+    slow.write_text('import time\ntime.sleep(30)\n')
+
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        runner.submit(_executor(runner, failing).run()).result(timeout=10)
+    assert error.value.returncode == 4
+    with pytest.raises(subprocess.TimeoutExpired):
+        runner.submit(_executor(runner, slow, timeout=0.5).run()).result(timeout=10)
+
+
+def test_background_child_does_not_time_out_the_task(runner, tmp_path, monkeypatch):
+    monkeypatch.setenv('TASK_OUTPUT_GRACE_SECONDS', '0.5')
+    script = tmp_path / 'daemon.py'
+    script.write_text("import subprocess\n"
+                      "subprocess.Popen(['sleep', '30'])\n"
+                      "subprocess.Popen(['sleep', '5'], start_new_session=True)\n"  # Escapa do grupo da tarefa
+                      "print('pai terminou', flush=True)\n")
+    executor = _executor(runner, script, timeout=4, log_path=tmp_path / 'daemon.log')
+
+    started = time.monotonic()
+    runner.submit(executor.run()).result(timeout=10)
+
+    assert time.monotonic() - started < 3
+    assert executor.task.status == 'success'
+    assert read_log(tmp_path / 'daemon.log')[0] == b'pai terminou\n'
+
+
+def test_cancel_kills_the_process(runner, tmp_path):
+    pid_file = tmp_path / 'pid'
+    script = tmp_path / 'slow.py'
+    script.write_text(f"import os, time\nopen({str(pid_file)!r}, 'w').write(str(os.getpid()))\ntime.sleep(30)\n")
+    future = runner.submit(_executor(runner, script, timeout=60).run())
+    deadline = time.monotonic() + 10
+    while not (pid_file.exists() and pid_file.read_text()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    future.cancel()
+    pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail('processo da tarefa continua em execução após o cancelamento')
+
+
+def test_dag_execute_with_asyncio_backend(sqlite_db, runner, tmp_path, monkeypatch):
+    monkeypatch.setenv('EXECUTOR_BACKEND', 'asyncio')
+    monkeypatch.setenv('TASK_LOG_DIR', str(tmp_path / 'logs'))
+    monkeypatch.setattr('custom_airflow.src.async_executor.get_async_runner', lambda: runner)
+    monkeypatch.setattr('custom_airflow.src.dag_parser.get_async_runner', lambda: runner)
+    ok = tmp_path / 'ok.py'
+    ok.write_text("print('ok')\n")
+    fail = tmp_path / 'fail.py'
+    fail.write_text('raise SystemExit(1)\n')
+    dag = DAG('async_dag', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path=str(ok)))
+    dag.add_task(Task(name='b', script_path=str(fail), dependencies=['a'], retries=2, retry_delay=0))
+
+    assert dag.execute() == DagRunState.failed
+
+    session = get_session()
+    statuses = sorted((e.task_id, e.attempt, e.status) for e in session.query(ExecutionModel))
+    session.close()
+    assert [s for _, _, s in statuses] == [TaskStatus.success, TaskStatus.failed, TaskStatus.failed]
+
+
+def test_cached_task_is_skipped_with_asyncio_backend(sqlite_db, runner, tmp_path, monkeypatch):
+    monkeypatch.setenv('EXECUTOR_BACKEND', 'asyncio')
+    monkeypatch.setenv('TASK_LOG_DIR', str(tmp_path / 'logs'))
+    monkeypatch.setattr('custom_airflow.src.dag_parser.get_async_runner', lambda: runner)
+    ok = tmp_path / 'ok.py'
+    ok.write_text("print('ok')\n")
+    dag = DAG('async_cached_dag', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path=str(ok), cache=True))
+
+    assert dag.execute() == DagRunState.success
+    assert dag.execute() == DagRunState.success
+
+    session = get_session()
+    statuses = [e.status for e in session.query(ExecutionModel).order_by(ExecutionModel.id)]
+    session.close()
+    assert statuses == [TaskStatus.success, TaskStatus.skipped]
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from custom_airflow.src.backfill import backfill, catchup, logical_dates, missed_logical_dates
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.dag_runs import latest_dag_run
+from custom_airflow.src.dispatcher import DagRunDispatcher
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.models import DagRunModel, DagRunState, get_session
+
+UTC = timezone.utc
+
+
+def _dag(name='backfill_dag'):
+    dag = DAG(name, schedule_interval='0 0 * * *')
+    dag.add_task(Task(name='a', script_path='a.py', retries=1))
+    return dag
+
+
+def test_logical_dates_are_inclusive():
+    dates = logical_dates('0 0 * * *', datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 1, 3, tzinfo=UTC))
+    assert [d.day for d in dates] == [1, 2, 3]
+
+
+def test_backfill_runs_each_date_once(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Executor, 'run', lambda self: None)
+    dag = _dag()
+    start, end = datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 1, 4, tzinfo=UTC)
+
+    first = backfill(dag, start, end, max_active_runs=2)
+    second = backfill(dag, start, end, max_active_runs=2)
+
+    assert list(first.values()) == [DagRunState.success] * 4
+    assert list(second.values()) == [None] * 4
+    session = get_session()
+    assert session.query(DagRunModel).count() == 4
+    assert {r.run_type for r in session.query(DagRunModel)} == {'backfill'}
+    session.close()
+
+
+def test_rerun_failed_reopens_only_failed_runs(sqlite_db, monkeypatch):
+    calls = []
+
+    def run(self):
+        calls.append(self.task.name)
+        if len(calls) == 1:
+            raise RuntimeError('falha')
+
+    monkeypatch.setattr(Executor, 'run', run)
+    dag = _dag()
+    start, end = datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 1, 2, tzinfo=UTC)
+    first = backfill(dag, start, end, max_active_runs=1)
+    assert sorted(s.value for s in first.values()) == ['failed', 'success']
+
+    rerun = backfill(dag, start, end, rerun_failed=True)
+
+    assert sorted(s.value if s else 'pulado' for s in rerun.values()) == ['pulado', 'success']
+    session = get_session()
+    assert [r.state for r in session.query(DagRunModel)] == [DagRunState.success] * 2
+    session.close()
+
+
+def test_catchup_runs_intervals_missed_since_last_run(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Executor, 'run', lambda self: None)
+    dag = _dag('catchup_dag')
+    assert missed_logical_dates(dag, now=datetime(2025, 1, 5, tzinfo=UTC)) == []
+
+    dag.execute(logical_date=datetime(2025, 1, 1, tzinfo=UTC))
+    now = datetime(2025, 1, 4, 12, tzinfo=UTC)
+    assert [d.day for d in missed_logical_dates(dag, now=now)] == [2, 3, 4]
+    assert [d.day for d in missed_logical_dates(dag, now=now, max_runs=1)] == [4]
+
+    results = catchup(dag, now=now)
+
+    assert list(results.values()) == [DagRunState.success] * 3
+    assert latest_dag_run('catchup_dag').logical_date == datetime(2025, 1, 4)
+
+
+def test_catchup_respects_max_active_runs_of_the_dag(sqlite_db, monkeypatch):
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def run(self):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    monkeypatch.setattr(Executor, 'run', run)
+    dag = _dag('serial_catchup')
+    dag.execute(logical_date=datetime(2025, 1, 1, tzinfo=UTC))
+    peak[0] = 0
+    dispatcher = DagRunDispatcher(max_active_runs=4)
+
+    # Um run agendado segura o único slot da DAG: o catchup espera por ele
+    with dispatcher.slot(dag):
+        assert dispatcher.submit(dag) is None
+        done = ThreadPoolExecutor(1).submit(catchup, dag, datetime(2025, 1, 5, tzinfo=UTC), dispatcher)
+        time.sleep(0.2)
+        assert peak == [0] and not done.done()
+
+    assert list(done.result(timeout=5).values()) == [DagRunState.success] * 4
+    assert peak == [1]
+    dispatcher.shutdown()
@@ -0,0 +1,54 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from custom_airflow.benchmarks import suite
+from custom_airflow.benchmarks.generators import build_dag, chain, fan_out, random_dag, write_dag_files
+
+
+def test_generators_build_the_requested_shapes():
+    assert fan_out(5).tasks['t4'].dependencies == ['t0']
+    assert chain(3).tasks['t2'].dependencies == ['t1']
+    dag = random_dag(200, seed=1)
+    assert len(dag.tasks) == 200
+    assert all(int(d[1:]) < int(name[1:]) for name, task in dag.tasks.items() for d in task.dependencies)
+    assert [t.dependencies for t in random_dag(50, seed=1).tasks.values()] == \
+        [t.dependencies for t in random_dag(50, seed=1).tasks.values()]
+    with pytest.raises(ValueError):
+        build_dag('star', 3)
+
+
+def test_write_dag_files_are_importable(tmp_path):
+    from custom_airflow.src.dag_processor import load_dag_file
+
+    path, = write_dag_files(tmp_path, 1, tasks_per_dag=4)
+    dag = load_dag_file(path)
+    assert dag.name == 'bench_file_dag_0' and len(dag.tasks) == 4
+
+
+def test_suite_writes_comparable_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(suite, '_prepare_workspace', lambda workdir: None)
+    args = SimpleNamespace(suites='execute', shapes='chain', sizes=[5], task_mode='noop', sleep=0.0,
+                           backends='thread', parallelism=4, workdir=str(tmp_path))
+    monkeypatch.setattr(suite, 'bench_execute', lambda *a: {'benchmark': 'dag_execute', 'shape': a[1],
+                                                            'tasks': a[2], 'seconds': 0.5})
+    report = suite.run_suite(args)
+    assert report['meta']['python'] and report['results'][0]['tasks'] == 5
+
+    old, new = tmp_path / 'old.json', tmp_path / 'new.json'
+    old.write_text(json.dumps(report))
+    report['results'][0]['seconds'] = 0.25
+    new.write_text(json.dumps(report))
+    rows = suite.compare(old, new)
+    assert rows[0]['ratio'] == 0.5
+
+    report['results'][0]['seconds'] = 0.0
+    old.write_text(json.dumps(report))
+    assert suite.compare(old, new)[0]['ratio'] is None
+
+
+def test_execute_benchmark_on_sqlite(sqlite_db, tmp_path):
+    result = suite.bench_execute(tmp_path, 'random', 30, 'noop', 'thread', 0.0, 8)
+    assert result['state'] == 'success'
+    assert result['tasks_per_second'] > 0
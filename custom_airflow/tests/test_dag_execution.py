@@ -0,0 +1,87 @@
+import threading
+import time
+
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.models import ExecutionModel, TaskStatus, get_session
+
+
+def _record_runs(monkeypatch, delay=0.0):
+    runs, active, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    def fake_execute_task(self, task, attempt=1, dag_run_id=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            runs.append(task.name)
+        time.sleep(delay)
+        with lock:
+            active[0] -= 1
+        return TaskStatus.success
+
+    monkeypatch.setattr(DAG, 'execute_task', fake_execute_task)
+    return runs, peak
+
+
+def test_execute_respects_dependencies_and_parallelism(sqlite_db, monkeypatch):
+    runs, peak = _record_runs(monkeypatch, delay=0.02)
+    dag = DAG('wide', schedule_interval='@daily', parallelism=3)
+    dag.add_task(Task(name='root', script_path='root.py'))
+    for i in range(8):
+        dag.add_task(Task(name=f'leaf{i}', script_path='leaf.py', dependencies=['root']))
+
+    dag.execute()
+
+    assert runs[0] == 'root'
+    assert sorted(runs[1:]) == sorted(f'leaf{i}' for i in range(8))
+    assert peak[0] == 3
+
+
+def test_execute_runs_critical_path_first(sqlite_db, monkeypatch):
+    runs, _ = _record_runs(monkeypatch)
+    dag = DAG('critical', schedule_interval='@daily', parallelism=1)
+    dag.add_task(Task(name='short', script_path='s.py'))
+    dag.add_task(Task(name='long1', script_path='l.py'))
+    dag.add_task(Task(name='long2', script_path='l.py', dependencies=['long1']))
+    dag.add_task(Task(name='long3', script_path='l.py', dependencies=['long2']))
+
+    dag.execute()
+
+    # A cadeia longa começa antes; no empate entre 'short' e 'long3' vale a ordem de inclusão
+    assert runs == ['long1', 'long2', 'short', 'long3']
+
+
+def test_failed_attempts_are_retried_as_separate_executions(sqlite_db, monkeypatch):
+    calls = []
+
+    def flaky_run(self):
+        calls.append(self.task.name)
+        if self.task.name == 'flaky' and calls.count('flaky') < 3:
+            raise RuntimeError('falha temporária')
+
+    monkeypatch.setattr(Executor, 'run', flaky_run)
+    dag = DAG('retry_dag', schedule_interval='@daily', parallelism=1)
+    dag.add_task(Task(name='flaky', script_path='f.py', retries=3, retry_delay=0.01))
+    dag.add_task(Task(name='other', script_path='o.py'))
+    dag.add_task(Task(name='after', script_path='a.py', dependencies=['flaky']))
+
+    dag.execute()
+
+    # O slot fica livre durante o backoff: 'other' roda entre as tentativas
+    assert calls.index('other') < len(calls) - 2
+    assert calls[-1] == 'after'
+    session = get_session()
+    attempts = [(e.attempt, e.status) for e in session.query(ExecutionModel).order_by(ExecutionModel.id)
+                if e.task.name == 'flaky']
+    session.close()
+    assert attempts == [(1, TaskStatus.failed), (2, TaskStatus.failed), (3, TaskStatus.success)]
+
+
+def test_retry_delay_uses_exponential_backoff_with_jitter():
+    task = Task(name='t', script_path='t.py', retry_delay=2, max_retry_delay=10)
+    assert 1 <= task.get_retry_delay(1) <= 2
+    assert 4 <= task.get_retry_delay(3) <= 8
+    assert 5 <= task.get_retry_delay(10) <= 10
+    assert Task(name='t', script_path='t.py', retry_delay=2,
+                retry_exponential_backoff=False).get_retry_delay(5) == 2
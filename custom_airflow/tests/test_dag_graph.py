@@ -0,0 +1,50 @@
+import pytest
+
+from custom_airflow.src.dag_graph import compile_dag
+from custom_airflow.src.dag_parser import DAG, Task
+
+
+def _dag(edges):
+    dag = DAG('graph', schedule_interval='@daily')
+    for name, dependencies in edges:
+        dag.add_task(Task(name=name, script_path=f'{name}.py', dependencies=dependencies))
+    return dag
+
+
+def test_compile_builds_levels_and_critical_path():
+    dag = _dag([('a', []), ('b', ['a']), ('c', ['a']), ('d', ['b', 'c']), ('e', [])])
+    graph = dag.compile()
+
+    assert list(graph.roots) == [0, 4]
+    assert sorted(graph.dependents(0)) == [1, 2]
+    assert graph.levels() == [['a', 'e'], ['b', 'c'], ['d']]
+    assert [r.priority for r in graph.records] == [3, 2, 2, 1, 1]
+    assert dag.critical_path() == ['a', 'b', 'd']
+
+
+def test_compiled_graph_is_cached_until_the_dag_changes():
+    dag = _dag([('a', []), ('b', ['a'])])
+    graph = dag.compile()
+    assert dag.compile() is graph
+
+    dag.add_task(Task(name='c', script_path='c.py', dependencies=['b']))
+    assert dag.compile() is not graph
+    assert dag.critical_path() == ['a', 'b', 'c']
+
+
+def test_cycles_and_blocked_tasks_are_reported():
+    tasks = {name: Task(name=name, script_path='x.py', dependencies=deps)
+             for name, deps in [('a', ['c']), ('b', ['a']), ('c', ['b']), ('d', ['c']), ('e', [])]}
+
+    with pytest.raises(ValueError) as error:
+        compile_dag(tasks)
+
+    message = str(error.value)
+    assert 'a -> b -> c -> a' in message or 'b -> c -> a -> b' in message or 'c -> a -> b -> c' in message
+    assert 'nunca ficariam prontas: d' in message
+
+
+def test_task_dependencies_default_is_not_shared():
+    first, second = Task(name='a', script_path='a.py'), Task(name='b', script_path='b.py')
+    first.dependencies.append('x')
+    assert second.dependencies == []
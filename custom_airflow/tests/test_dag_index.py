@@ -0,0 +1,98 @@
+import errno
+import os
+import threading
+
+import pytest
+
+from custom_airflow.src.dag_index import DagFileIndex, InotifyWatcher
+
+
+def _accept(index, changed):
+    for entry in changed:
+        entry.dag_name = entry.path.stem
+        index.update(entry)
+
+
+def test_scan_skips_unchanged_and_touched_files(tmp_path):
+    dag_file = tmp_path / 'my_dag.py'
+    dag_file.write_text('dag = None\n')
+    (tmp_path / '__init__.py').write_text('')
+    index = DagFileIndex(tmp_path)
+
+    changed, deleted = index.scan()
+    assert [e.path for e in changed] == [dag_file] and deleted == []
+    _accept(index, changed)
+
+    assert index.scan() == ([], [])
+    # Apenas o mtime muda: o hash é o mesmo, então não reimporta
+    st = dag_file.stat()
+    os.utime(dag_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert index.scan() == ([], [])
+
+
+def test_scan_detects_modified_and_deleted_files(tmp_path):
+    dag_a, dag_b = tmp_path / 'a.py', tmp_path / 'b.py'
+    dag_a.write_text('dag = 1\n')
+    dag_b.write_text('dag = 2\n')
+    index = DagFileIndex(tmp_path)
+    _accept(index, index.scan()[0])
+
+    dag_a.write_text('dag = 10\n')
+    dag_b.unlink()
+    changed, deleted = index.scan()
+
+    assert [e.path for e in changed] == [dag_a]
+    assert changed[0].dag_name == 'a'
+    assert [e.dag_name for e in deleted] == ['b']
+    assert index.get(dag_b) is None
+
+
+def test_scan_with_explicit_paths_only_checks_those_files(tmp_path):
+    dag_a, dag_b = tmp_path / 'a.py', tmp_path / 'b.py'
+    dag_a.write_text('dag = 1\n')
+    dag_b.write_text('dag = 2\n')
+    index = DagFileIndex(tmp_path)
+
+    changed, _ = index.scan([dag_b, tmp_path / 'notes.txt'])
+    assert [e.path for e in changed] == [dag_b]
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify só existe no Linux")
+def test_watcher_collects_changes_and_stops_cleanly(tmp_path):
+    changed = threading.Event()
+    watcher = InotifyWatcher(tmp_path, on_change=changed.set)
+    watcher.start()
+    thread = watcher._thread
+    open_fds = len(os.listdir('/proc/self/fd'))
+
+    (tmp_path / 'new_dag.py').write_text('dag = None\n')
+    assert changed.wait(5)
+    assert watcher.drain() == ({tmp_path / 'new_dag.py'}, False)
+
+    # O leitor está bloqueado esperando eventos: stop o acorda e ele fecha o fd do inotify
+    watcher.stop()
+    assert not thread.is_alive()
+    assert len(os.listdir('/proc/self/fd')) == open_fds - 3
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify só existe no Linux")
+def test_watcher_read_error_requests_full_scan(tmp_path, monkeypatch):
+    read = os.read
+
+    def failing_read(fd, size):
+        if fd == watcher._fd:
+            raise OSError(errno.EIO, 'erro de E/S')
+        return read(fd, size)
+
+    changed = threading.Event()
+    watcher = InotifyWatcher(tmp_path, on_change=changed.set)
+    monkeypatch.setattr(os, 'read', failing_read)
+    watcher.start()
+    (tmp_path / 'new_dag.py').write_text('dag = None\n')
+    assert changed.wait(5)
+    watcher._thread.join(5)
+
+    assert not watcher.alive()
+    assert watcher.drain() == (set(), True)
+    # O leitor já fechou a ponta de leitura do pipe: stop não pode falhar
+    watcher.stop()
@@ -0,0 +1,36 @@
+from custom_airflow.src.dag_parser import DAG
+from custom_airflow.src.dag_processor import DagProcessor
+
+DAG_SOURCE = """
+from custom_airflow.src.dag_parser import DAG, Task
+dag = DAG('processed_dag', schedule_interval='@daily')
+dag.add_task(Task(name='a', script_path='a.py'))
+dag.add_task(Task(name='b', script_path='b.py', dependencies=['a'], retries=1))
+"""
+
+
+def test_process_files_returns_serialized_dags_and_errors(tmp_path):
+    good = tmp_path / 'good.py'
+    good.write_text(DAG_SOURCE)
+    broken = tmp_path / 'broken.py'
+    broken.write_text('raise RuntimeError("boom")\n')
+    empty = tmp_path / 'empty.py'
+    empty.write_text('x = 1\n')
+
+    results = DagProcessor(max_processes=2, timeout=30).process_files([good, broken, empty])
+
+    dag = DAG.from_dict(results[good].dag_data)
+    assert dag.name == 'processed_dag'
+    assert dag.tasks['b'].dependencies == ['a'] and dag.tasks['b'].retries == 1
+    assert not results[broken].ok and 'boom' in results[broken].error
+    assert results[empty].ok and results[empty].dag_data is None
+
+
+def test_process_files_kills_file_over_timeout(tmp_path):
+    slow = tmp_path / 'slow.py'
+    slow.write_text('import time\ntime.sleep(30)\n')
+
+    result = DagProcessor(max_processes=1, timeout=0.5).process_files([slow])[slow]
+
+    assert result.timed_out and not result.ok
+    assert result.duration < 10
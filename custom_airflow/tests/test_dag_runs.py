@@ -0,0 +1,64 @@
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import inspect
+
+from custom_airflow.src import models
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.dag_runs import latest_dag_run
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.migrate import run_migrations
+from custom_airflow.src.models import DagRunState, ExecutionModel, get_session
+
+
+def test_execute_creates_one_dag_run_per_logical_date(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Executor, 'run', lambda self: None)
+    dag = DAG('run_dag', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path='a.py'))
+    logical_date = datetime(2025, 1, 1)
+
+    assert dag.execute(logical_date=logical_date) == DagRunState.success
+    assert dag.execute(logical_date=logical_date) is None
+
+    dag_run = latest_dag_run('run_dag')
+    assert dag_run.logical_date == logical_date and dag_run.state == DagRunState.success
+    session = get_session()
+    assert [e.dag_run_id for e in session.query(ExecutionModel)] == [dag_run.id]
+    session.close()
+
+
+def test_dag_run_fails_when_a_task_fails(sqlite_db, monkeypatch):
+    def fail(self):
+        raise RuntimeError('erro')
+
+    monkeypatch.setattr(Executor, 'run', fail)
+    dag = DAG('failing_dag', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path='a.py', retries=1))
+
+    assert dag.execute() == DagRunState.failed
+    assert latest_dag_run('failing_dag').state == DagRunState.failed
+
+
+def test_run_migrations_upgrades_legacy_database(tmp_path, monkeypatch):
+    db_path = tmp_path / 'legacy.db'
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE dags (id INTEGER PRIMARY KEY, name VARCHAR UNIQUE);
+        CREATE TABLE tasks (id INTEGER PRIMARY KEY, name VARCHAR, script_path VARCHAR, dependencies VARCHAR,
+                            status VARCHAR(7), dag_id INTEGER REFERENCES dags (id));
+        CREATE TABLE executions (id INTEGER PRIMARY KEY, dag_id INTEGER, task_id INTEGER, start_time DATETIME,
+                                 end_time DATETIME, status VARCHAR(7));
+        INSERT INTO dags (name) VALUES ('old_dag');
+    """)
+    conn.close()
+    monkeypatch.setenv('SQLITE_DB', str(db_path))
+    models.dispose_engine()
+
+    run_migrations()
+    run_migrations()  # idempotente
+
+    inspector = inspect(models.get_engine())
+    assert {'attempt', 'execution_key', 'dag_run_id'} <= {c['name'] for c in inspector.get_columns('executions')}
+    assert 'ix_executions_dag_id_start_time' in {i['name'] for i in inspector.get_indexes('executions')}
+    assert 'dag_runs' in inspector.get_table_names()
+    models.dispose_engine()
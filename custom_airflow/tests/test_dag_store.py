@@ -0,0 +1,31 @@
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.dag_store import delete_dag, load_serialized_dags, read_dag, write_dag
+
+
+def _build_dag(retries=3):
+    dag = DAG('stored_dag', schedule_interval='*/5 * * * *', max_active_runs=2)
+    dag.add_task(Task(name='extract', script_path='extract.py', retries=retries, timeout=30))
+    dag.add_task(Task(name='load', script_path='load.py', dependencies=['extract']))
+    return dag
+
+
+def test_write_and_read_dag_roundtrip(sqlite_db):
+    assert write_dag(_build_dag(), '/dags/stored.py', 'abc') is True
+    assert write_dag(_build_dag(), '/dags/stored.py', 'abc') is False
+
+    dag = read_dag('stored_dag')
+    assert dag.to_dict() == _build_dag().to_dict()
+    [stored] = load_serialized_dags()
+    assert stored.fileloc == '/dags/stored.py' and stored.file_hash == 'abc'
+
+
+def test_write_dag_updates_hash_when_dag_changes(sqlite_db):
+    write_dag(_build_dag(), '/dags/stored.py', 'abc')
+    old_hash = load_serialized_dags()[0].dag_hash
+
+    assert write_dag(_build_dag(retries=1), '/dags/stored.py', 'def') is True
+    assert load_serialized_dags()[0].dag_hash != old_hash
+    assert read_dag('stored_dag').tasks['extract'].retries == 1
+
+    delete_dag('stored_dag')
+    assert read_dag('stored_dag') is None
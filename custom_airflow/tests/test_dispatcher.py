@@ -0,0 +1,40 @@
+import threading
+
+from custom_airflow.src.dag_parser import DAG
+from custom_airflow.src.dispatcher import DagRunDispatcher
+
+
+class BlockingDAG(DAG):
+    def __init__(self, name, max_active_runs=1):
+        super().__init__(name, schedule_interval='* * * * *', max_active_runs=max_active_runs)
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def execute(self, logical_date=None):
+        self.started.set()
+        self.release.wait(5)
+
+
+def test_runs_different_dags_concurrently():
+    dispatcher = DagRunDispatcher(max_active_runs=2)
+    dag_a, dag_b = BlockingDAG('a'), BlockingDAG('b')
+    futures = [dispatcher.submit(dag_a), dispatcher.submit(dag_b)]
+    assert dag_a.started.wait(2) and dag_b.started.wait(2)
+    assert dispatcher.active_runs() == 2
+    dag_a.release.set()
+    dag_b.release.set()
+    for future in futures:
+        future.result(timeout=2)
+    dispatcher.shutdown()
+    assert dispatcher.active_runs() == 0
+
+
+def test_rejects_run_over_max_active_runs():
+    dispatcher = DagRunDispatcher(max_active_runs=4)
+    dag = BlockingDAG('single')
+    future = dispatcher.submit(dag)
+    assert dispatcher.submit(dag) is None
+    dag.release.set()
+    future.result(timeout=2)
+    dispatcher.shutdown()
+    assert dispatcher.active_runs('single') == 0
@@ -0,0 +1,54 @@
+import json
+import logging
+import threading
+
+import pytest
+
+from custom_airflow.src.logging_config import configure_logging, log_context, shutdown_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_records_are_written_as_json_with_context(tmp_path, restore_root_logger):
+    log_file = tmp_path / 'scheduler.log'
+    configure_logging(level='INFO', log_file=str(log_file), fmt='json')
+    logger = logging.getLogger('custom_airflow.test')
+
+    with log_context(dag='etl', task='extract', execution_key='abc', attempt=2):
+        logger.info("Tarefa '%s' concluída.", 'extract')
+    logger.info('fora do contexto')
+    shutdown_logging()
+
+    first, second = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+    assert first['message'] == "Tarefa 'extract' concluída."
+    assert (first['dag'], first['task'], first['execution_key'], first['attempt']) == ('etl', 'extract', 'abc', 2)
+    assert 'dag' not in second
+
+
+def test_message_is_formatted_on_the_listener_thread(tmp_path, restore_root_logger):
+    configure_logging(level='INFO', log_file=str(tmp_path / 'scheduler.log'), fmt='text')
+    formatted_on = []
+
+    class Arg:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return 'arg'
+
+    logging.getLogger('custom_airflow.test').info('valor %s', Arg())
+    shutdown_logging()
+
+    assert formatted_on and threading.current_thread() not in formatted_on
+
+
+def test_configure_is_idempotent(tmp_path, restore_root_logger):
+    first = configure_logging(log_file=str(tmp_path / 'a.log'))
+    assert configure_logging(log_file=str(tmp_path / 'b.log')) is first
+    assert len(logging.getLogger().handlers) == 1
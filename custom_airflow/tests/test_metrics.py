@@ -0,0 +1,69 @@
+import socket
+import urllib.request
+
+import pytest
+
+from custom_airflow.src.dag_parser import DAG, DAG_RUNS, TASK_QUEUE_WAIT_SECONDS, Task
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.metrics import MetricsRegistry, start_metrics_server
+from custom_airflow.src.models import DB_COMMIT_SECONDS, DAGModel, get_session
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    runs = registry.counter('runs_total', 'Runs.', ('dag', 'state'))
+    queued = registry.gauge('queued', 'Fila.')
+    latency = registry.histogram('latency_seconds', 'Latência.', buckets=(0.1, 1.0))
+
+    runs.inc(dag='etl', state='success')
+    runs.inc(2, dag='etl', state='success')
+    queued.set(3)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert '# TYPE custom_airflow_runs_total counter' in text
+    assert 'custom_airflow_runs_total{dag="etl",state="success"} 3.0' in text
+    assert 'custom_airflow_queued 3.0' in text
+    assert 'custom_airflow_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'custom_airflow_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'custom_airflow_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'custom_airflow_latency_seconds_count 3' in text
+    with pytest.raises(ValueError):
+        runs.inc(dag='etl')
+    assert registry.counter('runs_total', 'Runs.', ('dag', 'state')) is runs
+
+
+def test_http_endpoint_serves_metrics():
+    registry = MetricsRegistry()
+    registry.counter('hits_total', 'Acessos.').inc()
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = start_metrics_server(port=port, host='127.0.0.1', registry=registry)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as response:
+            body = response.read().decode()
+            assert response.headers['Content-Type'].startswith('text/plain')
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'custom_airflow_hits_total 1.0' in body
+    assert start_metrics_server(port=0) is None
+
+
+def test_commits_and_dag_runs_are_instrumented(sqlite_db, monkeypatch):
+    commits = DB_COMMIT_SECONDS.count()
+    session = get_session()
+    session.add(DAGModel(name='metrics_dag'))
+    session.commit()
+    session.close()
+    assert DB_COMMIT_SECONDS.count() == commits + 1
+
+    monkeypatch.setattr(Executor, 'run', lambda self: None)
+    dag = DAG('metrics_run_dag', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path='a.py'))
+    dag.execute()
+    assert DAG_RUNS.value(dag='metrics_run_dag', state='success') == 1
+    assert TASK_QUEUE_WAIT_SECONDS.count(dag='metrics_run_dag') == 1
@@ -0,0 +1,36 @@
+from custom_airflow.src import models
+from custom_airflow.src.models import DAGModel
+
+
+def test_get_session_reuses_shared_engine(sqlite_db):
+    session_a = models.get_session()
+    session_b = models.get_session()
+    assert session_a is not session_b
+    assert session_a.bind is session_b.bind is sqlite_db
+    session_a.close()
+    session_b.close()
+
+
+def test_scoped_session_is_per_thread(sqlite_db):
+    session = models.get_scoped_session()
+    assert models.get_scoped_session() is session
+    session.add(DAGModel(name='scoped_dag'))
+    session.commit()
+    models.remove_scoped_session()
+    assert models.get_scoped_session() is not session
+    assert models.get_session().query(DAGModel).filter_by(name='scoped_dag').count() == 1
+
+
+def test_reset_engine_after_fork_creates_new_engine(sqlite_db):
+    models.reset_engine_after_fork()
+    assert models.get_engine() is not sqlite_db
+
+
+def test_pool_options_from_environment(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '12')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '3')
+    options = models._engine_options('postgresql://u:p@localhost/db')
+    assert options['pool_size'] == 12
+    assert options['max_overflow'] == 3
+    assert options['pool_pre_ping'] is True
+    assert 'connect_args' not in options
@@ -0,0 +1,183 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.resources import ProcessLimits, ResourceManager, parse_pools
+
+
+def _task(name='t', **kwargs):
+    values = dict(name=name, pool=None, pool_slots=1, cpus=None, memory_mb=None, priority_weight=1)
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+
+def _acquire_in_thread(manager, task, order, dag=''):
+    acquired = threading.Event()
+    done = threading.Event()
+
+    def run():
+        with manager.lease(task, dag=dag):
+            order.append(task.name)
+            acquired.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, acquired, done
+
+
+def _wait_for_waiters(manager, count):
+    deadline = time.monotonic() + 5
+    while manager.usage()['waiting'] < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_parse_pools():
+    assert parse_pools('db_heavy=2, api=5') == {'db_heavy': 2, 'api': 5}
+    with pytest.raises(ValueError):
+        parse_pools('db_heavy')
+
+
+def test_higher_priority_is_admitted_first(monkeypatch):
+    manager = ResourceManager(pools={}, max_active_tasks=1, cpus=4, memory_mb=1024)
+    order = []
+    first, first_acquired, release_first = _acquire_in_thread(manager, _task('first'), order)
+    first_acquired.wait(5)
+    low, low_acquired, release_low = _acquire_in_thread(manager, _task('low', priority_weight=1), order)
+    _wait_for_waiters(manager, 1)
+    high, high_acquired, release_high = _acquire_in_thread(manager, _task('high', priority_weight=10), order)
+    _wait_for_waiters(manager, 2)
+
+    release_first.set()
+    high_acquired.wait(5)
+    release_high.set()
+    low_acquired.wait(5)
+    release_low.set()
+    for thread in (first, low, high):
+        thread.join(5)
+
+    assert order == ['first', 'high', 'low']
+    assert manager.usage()['active'] == 0
+
+
+def test_waiting_large_request_is_not_starved():
+    manager = ResourceManager(pools={}, max_active_tasks=0, cpus=4, memory_mb=1024)
+    order = []
+    holder, holder_acquired, release_holder = _acquire_in_thread(manager, _task('holder', cpus=3), order)
+    holder_acquired.wait(5)
+    big, big_acquired, release_big = _acquire_in_thread(manager, _task('big', cpus=4, priority_weight=5), order)
+    _wait_for_waiters(manager, 1)
+    small, small_acquired, release_small = _acquire_in_thread(manager, _task('small', cpus=1), order)
+    _wait_for_waiters(manager, 2)
+
+    # Uma CPU está livre, mas 'small' não passa à frente de 'big'
+    assert not small_acquired.wait(0.1)
+    # Tarefas sem pedido de CPU não são afetadas pela reserva
+    with manager.lease(_task('no_cpu')):
+        pass
+
+    release_holder.set()
+    big_acquired.wait(5)
+    release_big.set()
+    small_acquired.wait(5)
+    release_small.set()
+    for thread in (holder, big, small):
+        thread.join(5)
+    assert order == ['holder', 'big', 'small']
+
+
+def test_invalid_requests_fail_immediately():
+    manager = ResourceManager(pools={'db_heavy': 2}, cpus=2, memory_mb=1024)
+    with pytest.raises(ValueError):
+        with manager.lease(_task(pool='missing')):
+            pass
+    with pytest.raises(ValueError):
+        with manager.lease(_task(pool='db_heavy', pool_slots=3)):
+            pass
+    with pytest.raises(ValueError):
+        with manager.lease(_task(cpus=8)):
+            pass
+
+
+def test_cancelled_async_wait_leaves_the_queue():
+    manager = ResourceManager(pools={'db_heavy': 1}, cpus=2, memory_mb=1024)
+
+    async def scenario():
+        async with manager.lease_async(_task('holder', pool='db_heavy')):
+            waiting = asyncio.ensure_future(manager.lease_async(_task('waiter', pool='db_heavy')).__aenter__())
+            await asyncio.sleep(0.01)
+            assert manager.usage()['waiting'] == 1
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+        return manager.usage()
+
+    usage = asyncio.run(scenario())
+    assert usage['waiting'] == 0 and usage['pools'] == {'db_heavy': 0}
+
+
+def test_pool_limits_tasks_across_the_dag(sqlite_db, monkeypatch):
+    manager = ResourceManager(pools={'db_heavy': 2}, cpus=4, memory_mb=1024)
+    monkeypatch.setattr('custom_airflow.src.dag_parser.get_resource_manager', lambda: manager)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_run(self):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    monkeypatch.setattr(Executor, 'run', fake_run)
+    dag = DAG('pooled', schedule_interval='@daily', parallelism=6)
+    for i in range(6):
+        dag.add_task(Task(name=f't{i}', script_path='t.py', pool='db_heavy', retries=1))
+
+    dag.execute()
+
+    assert peak[0] == 2
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='RLIMIT_AS')
+def test_memory_limit_is_applied_to_the_process(tmp_path):
+    script = tmp_path / 'hog.py'
+    script.write_text('data = bytearray(1024 * 1024 * 1024)\n')
+    task = SimpleNamespace(name='hog', script_path=str(script), requirements=None, status=None, cpus=None,
+                           memory_mb=256)
+    executor = Executor(task, timeout=30)
+    assert isinstance(executor.limits, ProcessLimits)
+
+    with pytest.raises(Exception) as error:
+        executor._run_process([sys.executable, str(script)])
+    assert error.value.returncode != 0
+
+
+def test_per_worker_limits_are_warned(monkeypatch, caplog):
+    from custom_airflow.src.resources import warn_per_process_limits
+
+    monkeypatch.setenv('TASK_POOLS', 'db_heavy=2')
+    monkeypatch.setenv('MAX_ACTIVE_TASKS', '0')
+    with caplog.at_level('WARNING'):
+        warn_per_process_limits('worker w1')
+    assert 'TASK_POOLS' in caplog.text and 'MAX_ACTIVE_TASKS' not in caplog.text
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='cgroup v2')
+def test_process_joins_the_cgroup_before_the_script_runs(tmp_path):
+    # Diretório comum no lugar do cgroupfs: basta ver o pid gravado antes do script
+    script = tmp_path / 'pid.py'
+    script.write_text(f"import os\nopen({str(tmp_path / 'script.pid')!r}, 'w').write(str(os.getpid()))\n")
+    limits = ProcessLimits(cpus=1, memory_mb=512, timeout=30, cgroup_root=str(tmp_path))
+
+    subprocess.run(limits.wrap([sys.executable, str(script)]), check=True, timeout=30)
+
+    assert (limits.cgroup / 'cgroup.procs').read_text() == (tmp_path / 'script.pid').read_text()
+    assert (limits.cgroup / 'memory.max').read_text() == str(512 * 1024 * 1024)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from custom_airflow.src.models import DAGModel, ExecutionModel, TaskModel, TaskStatus, get_session
+from custom_airflow.src.retention import (archive_executions, compact_archive, query_executions,
+                                          read_archived_executions)
+
+NOW = datetime(2025, 3, 1, 12, 0)
+
+
+def _seed(days_ago):
+    session = get_session()
+    dag = DAGModel(name='retention_dag')
+    session.add(dag)
+    session.flush()
+    task = TaskModel(name='a', script_path='a.py', dependencies='', status=TaskStatus.pending, dag_id=dag.id)
+    session.add(task)
+    session.flush()
+    for i, days in enumerate(days_ago):
+        start = NOW - timedelta(days=days)
+        session.add(ExecutionModel(dag_id=dag.id, task_id=task.id, start_time=start,
+                                   end_time=start + timedelta(minutes=1), status=TaskStatus.success,
+                                   execution_key=f'key{i}'))
+    session.commit()
+    dag_id = dag.id
+    session.close()
+    return dag_id
+
+
+def test_archive_moves_old_executions_in_batches(sqlite_db, tmp_path):
+    dag_id = _seed([40, 40, 35, 31, 5, 1])
+    archived = archive_executions(30, archive_dir=tmp_path, batch_size=2, now=NOW)
+
+    assert archived == 4
+    session = get_session()
+    assert session.query(ExecutionModel).count() == 2
+    session.close()
+    partitions = sorted(p.name for p in (tmp_path / 'executions').iterdir())
+    assert partitions == ['dt=2025-01-20', 'dt=2025-01-25', 'dt=2025-01-29']
+
+    records = list(read_archived_executions(archive_dir=tmp_path, dag_id=dag_id))
+    assert len(records) == 4
+    assert records[0]['status'] == 'success' and isinstance(records[0]['start_time'], datetime)
+    assert archive_executions(30, archive_dir=tmp_path, now=NOW) == 0
+
+
+def test_read_prunes_by_range_and_query_merges_hot_and_archived(sqlite_db, tmp_path, monkeypatch):
+    _seed([40, 35, 5])
+    archive_executions(30, archive_dir=tmp_path, now=NOW)
+
+    in_range = list(read_archived_executions(NOW - timedelta(days=36), NOW, archive_dir=tmp_path))
+    assert len(in_range) == 1
+
+    monkeypatch.setenv('ARCHIVE_DIR', str(tmp_path))
+    merged = query_executions(NOW - timedelta(days=50), NOW)
+    assert [r['execution_key'] for r in merged] == ['key0', 'key1', 'key2']
+    assert len(query_executions(NOW - timedelta(days=50), NOW, include_archive=False)) == 1
+
+
+def test_compact_merges_parts_without_duplicates(sqlite_db, tmp_path):
+    _seed([40, 40, 40])
+    archive_executions(30, archive_dir=tmp_path, batch_size=1, now=NOW)
+    partition = tmp_path / 'executions' / 'dt=2025-01-20'
+    assert len(list(partition.glob('part-*'))) == 3
+
+    assert compact_archive(tmp_path) == 1
+    assert len(list(partition.glob('part-*'))) == 1
+    assert len(list(read_archived_executions(archive_dir=tmp_path))) == 3
+
+
+def test_archive_deletes_logs_of_archived_executions(sqlite_db, tmp_path):
+    from custom_airflow.src.task_logs import TaskLogWriter, read_log
+
+    _seed([40, 1])
+    logs = {}
+    session = get_session()
+    for execution in session.query(ExecutionModel):
+        execution.log_path = str(tmp_path / 'logs' / f'{execution.execution_key}.log')
+        writer = TaskLogWriter(execution.log_path, compress=True)
+        writer.write(b'saida\n')
+        writer.close()
+        logs[execution.execution_key] = execution.log_path
+    session.commit()
+    session.close()
+
+    archive_executions(30, archive_dir=tmp_path / 'archive', now=NOW)
+
+    assert read_log(logs['key0']) == (b'', 0)
+    assert read_log(logs['key1'])[0] == b'saida\n'
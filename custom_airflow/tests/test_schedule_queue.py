@@ -0,0 +1,39 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from custom_airflow.src.schedule_queue import ScheduleQueue
+
+
+def test_pop_due_returns_only_due_dags_in_order():
+    queue = ScheduleQueue()
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    queue.schedule('late', now + timedelta(minutes=5))
+    queue.schedule('b', now - timedelta(seconds=10))
+    queue.schedule('a', now - timedelta(seconds=30))
+
+    due = queue.pop_due(now)
+
+    assert [name for name, _ in due] == ['a', 'b']
+    assert 'late' in queue and 'a' not in queue
+    assert queue.stats()['lag_max_seconds'] == 30
+
+
+def test_reschedule_and_remove_discard_stale_entries():
+    queue = ScheduleQueue()
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    queue.schedule('dag', now - timedelta(minutes=1))
+    queue.schedule('dag', now + timedelta(minutes=1))
+    queue.schedule('gone', now - timedelta(minutes=1))
+    queue.remove('gone')
+
+    assert queue.pop_due(now) == []
+    assert queue.peek() == ('dag', now + timedelta(minutes=1))
+
+
+def test_wait_wakes_up_when_queue_changes():
+    queue = ScheduleQueue()
+    queue.wait(timeout=0)  # consome o aviso de alteração inicial
+    waker = threading.Timer(0.05, queue.schedule, args=('dag', datetime.now(timezone.utc) + timedelta(hours=1)))
+    waker.start()
+    assert queue.wait(timeout=5) is True
+    waker.join()
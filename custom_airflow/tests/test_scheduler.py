@@ -0,0 +1,30 @@
+from custom_airflow.src import scheduler
+from custom_airflow.src.dag_index import DagFileIndex
+from custom_airflow.src.dag_parser import DAG
+from custom_airflow.src.schedule_queue import ScheduleQueue
+
+
+def test_failed_import_is_retried_on_the_next_scan(sqlite_db, tmp_path, monkeypatch):
+    dag_file = tmp_path / 'flaky.py'
+    dag_file.write_text('dag = None\n')
+    # A primeira importação falha (ex.: timeout do DagProcessor); a segunda funciona
+    results = [None, DAG('flaky', schedule_interval='@daily')]
+    imported = []
+
+    def load_dags(paths):
+        imported.extend(paths)
+        return {path: results.pop(0) for path in paths}
+
+    monkeypatch.setattr(scheduler, 'load_dags', load_dags)
+    monkeypatch.setattr(scheduler, 'dag_file_index', DagFileIndex(tmp_path))
+    monkeypatch.setattr(scheduler, 'dag_schedule', {})
+    monkeypatch.setattr(scheduler, 'schedule_queue', ScheduleQueue())
+
+    scheduler.scan_for_new_dags()
+    assert 'flaky' not in scheduler.dag_schedule
+
+    scheduler.scan_for_new_dags()
+    assert 'flaky' in scheduler.dag_schedule
+
+    scheduler.scan_for_new_dags()
+    assert imported == [dag_file, dag_file]
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from custom_airflow.src.scheduler_ha import HashRing, SchedulerCoordinator, sync_leases
+
+DAG_NAMES = [f'dag_{i}' for i in range(40)]
+
+
+def test_hash_ring_only_moves_keys_of_removed_node():
+    before = HashRing(['a', 'b', 'c'])
+    after = HashRing(['a', 'b'])
+    owners = {key: before.owner(key) for key in DAG_NAMES}
+
+    assert set(owners.values()) == {'a', 'b', 'c'}
+    assert all(after.owner(key) == owner for key, owner in owners.items() if owner != 'c')
+    assert HashRing([]).owner('dag') is None
+
+
+def test_schedulers_split_dags_and_take_over_a_dead_peer(sqlite_db):
+    a = SchedulerCoordinator('sched-a', heartbeat_interval=2, timeout=10)
+    b = SchedulerCoordinator('sched-b', heartbeat_interval=2, timeout=10)
+    a.start()
+    a.sync(DAG_NAMES)
+    assert all(a.owns(name) for name in DAG_NAMES)
+
+    # b entra: só recebe as DAGs depois que a as libera no próximo heartbeat
+    b.start()
+    b.sync(DAG_NAMES)
+    assert not any(b.owns(name) for name in DAG_NAMES)
+    a.sync(DAG_NAMES)
+    b.sync(DAG_NAMES)
+    owned_a = {name for name in DAG_NAMES if a.owns(name)}
+    owned_b = {name for name in DAG_NAMES if b.owns(name)}
+    assert owned_a and owned_b
+    assert owned_a.isdisjoint(owned_b) and owned_a | owned_b == set(DAG_NAMES)
+
+    # b para de enviar heartbeats: a assume as DAGs dele quando os leases expiram
+    now = datetime.utcnow()
+    a.sync(DAG_NAMES, now=now + timedelta(seconds=6))
+    acquired = a.sync(DAG_NAMES, now=now + timedelta(seconds=11))
+    assert set(acquired) == owned_b
+    assert all(a.owns(name) for name in DAG_NAMES)
+
+
+def test_expired_lease_is_taken_over_by_only_one_scheduler(sqlite_db):
+    now = datetime.utcnow()
+    sync_leases('dead', ['dag'], 10, now)
+    later = now + timedelta(seconds=30)
+
+    held_a, acquired_a = sync_leases('a', ['dag'], 10, later)
+    held_b, acquired_b = sync_leases('b', ['dag'], 10, later)
+
+    assert (held_a, held_b) == ({'dag'}, set())
+    assert acquired_a == {'dag': now} and acquired_b == {}
+
+
+def test_stopped_scheduler_releases_its_dags(sqlite_db):
+    a = SchedulerCoordinator('sched-a', heartbeat_interval=2, timeout=10)
+    b = SchedulerCoordinator('sched-b', heartbeat_interval=2, timeout=10)
+    a.start()
+    b.start()
+    a.sync(DAG_NAMES)
+    b.sync(DAG_NAMES)
+
+    b.stop()
+    acquired = a.sync(DAG_NAMES)
+    assert all(a.owns(name) for name in DAG_NAMES)
+    # Troca recente: os horários vencidos a partir da liberação são verificados
+    assert acquired and all(since <= datetime.utcnow() for since in acquired.values())
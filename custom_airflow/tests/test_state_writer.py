@@ -0,0 +1,92 @@
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.models import ExecutionModel, TaskModel, TaskStatus, get_session
+from custom_airflow.src.state_writer import StateWriter, register_dag
+
+
+def _dag(script='a.py'):
+    dag = DAG('writer_dag', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path=script))
+    dag.add_task(Task(name='b', script_path='b.py', dependencies=['a']))
+    return dag
+
+
+def test_register_dag_is_idempotent_and_updates_changed_tasks(sqlite_db):
+    dag_id, task_ids = register_dag(_dag())
+    assert set(task_ids) == {'a', 'b'}
+    assert register_dag(_dag()) == (dag_id, task_ids)
+
+    register_dag(_dag(script='a_v2.py'))
+    session = get_session()
+    assert session.query(TaskModel).count() == 2
+    assert session.get(TaskModel, task_ids['a']).script_path == 'a_v2.py'
+    session.close()
+
+
+def test_start_and_end_in_same_batch_insert_final_row(sqlite_db):
+    dag_id, task_ids = register_dag(_dag())
+    writer = StateWriter(flush_interval=60)
+    key = writer.record_execution_start(dag_id, task_ids['a'], attempt=2)
+    writer.record_execution_end(key, TaskStatus.success)
+    assert writer.pending() == 1
+
+    writer.flush()
+
+    session = get_session()
+    [execution] = session.query(ExecutionModel).all()
+    assert (execution.execution_key, execution.attempt, execution.status) == (key, 2, TaskStatus.success)
+    assert execution.end_time is not None
+    session.close()
+    writer.close()
+
+
+def test_end_after_flush_becomes_batched_update(sqlite_db):
+    dag_id, task_ids = register_dag(_dag())
+    writer = StateWriter(flush_interval=60)
+    keys = [writer.record_execution_start(dag_id, task_ids['b']) for _ in range(3)]
+    writer.flush()
+    for key in keys:
+        writer.record_execution_end(key, TaskStatus.failed)
+    writer.flush()
+
+    session = get_session()
+    assert {e.status for e in session.query(ExecutionModel)} == {TaskStatus.failed}
+    session.close()
+    writer.close()
+
+
+def test_rejected_row_is_dropped_without_blocking_the_batch(sqlite_db):
+    dag_id, task_ids = register_dag(_dag())
+    writer = StateWriter(flush_interval=60)
+    duplicate = writer.record_execution_start(dag_id, task_ids['a'])
+    writer.flush()
+
+    # A mesma execution_key viola o índice único; as demais linhas do lote são gravadas
+    writer.record_execution_start(dag_id, task_ids['a'], execution_key=duplicate)
+    good = writer.record_execution_start(dag_id, task_ids['b'])
+    writer.flush()
+
+    assert writer.pending() == 0
+    session = get_session()
+    assert {e.execution_key for e in session.query(ExecutionModel)} == {duplicate, good}
+    session.close()
+    writer.close()
+
+
+def test_transient_errors_are_retried_up_to_the_limit(sqlite_db, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    dag_id, task_ids = register_dag(_dag())
+    monkeypatch.setenv('STATE_MAX_RETRIES', '2')
+    writer = StateWriter(flush_interval=60)
+    writer.record_execution_start(dag_id, task_ids['a'])
+
+    def unavailable(inserts, updates):
+        raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(writer, '_write', unavailable)
+    writer.flush()
+    writer.flush()
+    assert writer.pending() == 1
+    writer.flush()
+    assert writer.pending() == 0
+    writer.close()
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect
+
+from custom_airflow.src import models
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.migrate import run_migrations
+from custom_airflow.src.models import ExecutionModel, TaskStatus, get_session
+from custom_airflow.src.task_cache import (invalidate_task_cache, lookup_cached_result, store_cached_result,
+                                           task_fingerprint)
+
+
+def _task(tmp_path, **kwargs):
+    script = tmp_path / 'job.py'
+    if not script.exists():
+        script.write_text('print(1)\n')
+    return Task(name='job', script_path=str(script), cache=True, **kwargs)
+
+
+def test_fingerprint_covers_script_inputs_params_and_environment(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    (data / 'a.csv').write_text('1')
+    base = task_fingerprint(_task(tmp_path, inputs=[str(data)], params={'n': 1}))
+    assert task_fingerprint(_task(tmp_path, inputs=[str(data)], params={'n': 1})) == base
+
+    assert task_fingerprint(_task(tmp_path, inputs=[str(data)], params={'n': 2})) != base
+    assert task_fingerprint(_task(tmp_path, inputs=[str(data)], params={'n': 1}, requirements=['x'])) != base
+    (data / 'a.csv').write_text('22')
+    changed_input = task_fingerprint(_task(tmp_path, inputs=[str(data)], params={'n': 1}))
+    assert changed_input != base
+    (tmp_path / 'job.py').write_text('print(2)\n')
+    assert task_fingerprint(_task(tmp_path, inputs=[str(data)], params={'n': 1})) != changed_input
+
+
+def test_unchanged_task_is_skipped_on_the_next_run(sqlite_db, tmp_path, monkeypatch):
+    runs = []
+    monkeypatch.setattr(Executor, 'run', lambda self: runs.append(self.task.name))
+    dag = DAG('cached_dag', schedule_interval='@daily')
+    dag.add_task(_task(tmp_path, retries=1))
+    dag.add_task(Task(name='after', script_path='after.py', dependencies=['job'], retries=1))
+
+    dag.execute(logical_date=datetime(2025, 1, 1))
+    dag.execute(logical_date=datetime(2025, 1, 2))
+
+    assert runs == ['job', 'after', 'after']
+    session = get_session()
+    statuses = [(e.task.name, e.status) for e in session.query(ExecutionModel).order_by(ExecutionModel.id)]
+    session.close()
+    assert statuses[-2:] == [('job', TaskStatus.skipped), ('after', TaskStatus.success)]
+
+    assert invalidate_task_cache('cached_dag', ['job']) == 1
+    dag.execute(logical_date=datetime(2025, 1, 3))
+    assert runs[-2:] == ['job', 'after']
+
+
+def test_cache_can_be_disabled_globally(sqlite_db, tmp_path, monkeypatch):
+    runs = []
+    monkeypatch.setattr(Executor, 'run', lambda self: runs.append(self.task.name))
+    monkeypatch.setenv('TASK_CACHE', 'false')
+    dag = DAG('uncached_dag', schedule_interval='@daily')
+    dag.add_task(_task(tmp_path, retries=1))
+
+    dag.execute(logical_date=datetime(2025, 1, 1))
+    dag.execute(logical_date=datetime(2025, 1, 2))
+
+    assert runs == ['job', 'job']
+
+
+def test_expired_entries_are_ignored(sqlite_db, tmp_path):
+    dag = DAG('ttl_dag', schedule_interval='@daily')
+    dag.add_task(_task(tmp_path))
+    task_id = dag.register()['job']
+    now = datetime(2025, 1, 1, 12)
+    store_cached_result(task_id, 'f' * 64, 'abc', now=now - timedelta(hours=2))
+    store_cached_result(task_id, 'f' * 64, 'def', now=now - timedelta(minutes=30))
+
+    assert lookup_cached_result(task_id, 'f' * 64, ttl=3600, now=now).execution_key == 'def'
+    assert lookup_cached_result(task_id, 'f' * 64, ttl=600, now=now) is None
+    assert lookup_cached_result(task_id, 'f' * 64).execution_key == 'def'
+
+
+def test_migration_creates_task_cache_table(tmp_path, monkeypatch):
+    monkeypatch.setenv('ENV', 'development')
+    monkeypatch.setenv('SQLITE_DB', str(tmp_path / 'migrated.db'))
+    models.dispose_engine()
+
+    run_migrations()
+
+    assert 'task_cache' in inspect(models.get_engine()).get_table_names()
+    models.dispose_engine()
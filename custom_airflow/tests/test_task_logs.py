@@ -0,0 +1,142 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.task_logs import TaskLogWriter, follow_log, log_finished, read_log
+from custom_airflow.src.worker_pool import WarmWorkerPool
+
+
+def _read_all(path, offset=0):
+    chunks = []
+    while True:
+        data, offset = read_log(path, offset, max_bytes=7)
+        if not data:
+            return b''.join(chunks), offset
+        chunks.append(data)
+
+
+def test_rotation_compresses_segments_and_keeps_absolute_offsets(tmp_path):
+    path = tmp_path / 'exec.log'
+    log = TaskLogWriter(path, max_bytes=0, rotate_bytes=10, backup_count=0, compress=True)
+    log.write(b'0123456789abcdefghij')
+    log.write(b'KLMNO')
+    log.close()
+
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ['exec.log.000000000000.gz', 'exec.log.000000000010.gz', 'exec.log.000000000020.gz']
+    assert log_finished(path)
+    assert _read_all(path) == (b'0123456789abcdefghijKLMNO', 25)
+    assert read_log(path, 12, max_bytes=4) == (b'cdef', 16)
+
+
+def test_backup_count_drops_oldest_segments(tmp_path):
+    path = tmp_path / 'exec.log'
+    log = TaskLogWriter(path, max_bytes=0, rotate_bytes=5, backup_count=1, compress=False)
+    log.write(b'aaaaabbbbbccccc')
+
+    # O segmento de 'a' foi removido: a leitura recomeça no mais antigo disponível
+    assert read_log(path, 0) == (b'bbbbb', 10)
+    log.close()
+
+
+def test_size_cap_truncates_with_marker(tmp_path):
+    path = tmp_path / 'exec.log'
+    log = TaskLogWriter(path, max_bytes=8, rotate_bytes=0, compress=False)
+    log.write(b'12345')
+    log.write(b'6789')
+    log.write(b'more')
+    log.close()
+
+    data, _ = _read_all(path)
+    assert data.startswith(b'12345678\n[log truncado')
+    assert log.bytes_dropped == 5
+
+
+def test_follow_yields_until_log_closed(tmp_path):
+    path = tmp_path / 'exec.log'
+    log = TaskLogWriter(path, max_bytes=0, rotate_bytes=0, compress=True)
+    log.write(b'linha 1\n')
+    log.close()
+
+    assert list(follow_log(path, poll_interval=0.01)) == [(b'linha 1\n', 8)]
+
+
+def test_executor_captures_stdout_and_stderr(tmp_path):
+    script = tmp_path / 'task.py'
+    script.write_text("import sys\nprint('saida')\nsys.stdout.flush()\nprint('erro', file=sys.stderr)\n")
+    path = tmp_path / 'logs' / 'task.log'
+    log = TaskLogWriter(path, compress=True)
+    executor = Executor(type('T', (), {'name': 't', 'script_path': str(script)})(), timeout=10)
+
+    executor._run_process([sys.executable, str(script)], log)
+    log.close()
+
+    assert _read_all(path)[0].split() == [b'saida', b'erro']
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='grupo de processos exige POSIX')
+def test_background_child_does_not_hold_the_task(tmp_path):
+    script = tmp_path / 'daemon.py'
+    pid_file = tmp_path / 'child.pid'
+    script.write_text("import subprocess\n"
+                      f"child = subprocess.Popen(['sleep', '30'])\n"
+                      f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+                      "print('pai terminou', flush=True)\n")
+    log = TaskLogWriter(tmp_path / 'daemon.log', compress=False)
+    executor = Executor(type('T', (), {'name': 't', 'script_path': str(script)})(), timeout=20)
+
+    started = time.monotonic()
+    executor._run_process([sys.executable, str(script)], log)
+    log.close()
+
+    assert time.monotonic() - started < 5
+    assert _read_all(tmp_path / 'daemon.log')[0] == b'pai terminou\n'
+    # O filho em segundo plano morreu com o grupo da tarefa
+    child = int(pid_file.read_text())
+    try:
+        os.kill(child, 0)
+        with open(f'/proc/{child}/stat') as stat:
+            assert stat.read().split()[2] == 'Z'
+    except ProcessLookupError:
+        pass
+
+
+@pytest.mark.skipif(not WarmWorkerPool.supported(), reason='workers quentes exigem POSIX')
+def test_warm_worker_output_goes_to_execution_log(tmp_path):
+    script = tmp_path / 'task.py'
+    script.write_text("print('quente')\n")
+    failing = tmp_path / 'fail.py'
+    failing.write_text("print('antes')\nraise SystemExit(2)\n")
+    pool = WarmWorkerPool()
+
+    first = TaskLogWriter(tmp_path / 'a.log', compress=False)
+    pool.run(sys.executable, str(script), timeout=10, log=first)
+    second = TaskLogWriter(tmp_path / 'b.log', compress=False)
+    with pytest.raises(subprocess.CalledProcessError):
+        pool.run(sys.executable, str(failing), timeout=10, log=second)
+    first.close()
+    second.close()
+    pool.shutdown()
+
+    assert _read_all(tmp_path / 'a.log')[0] == b'quente\n'
+    assert _read_all(tmp_path / 'b.log')[0] == b'antes\n'
+
+
+def test_warm_worker_traceback_goes_to_execution_log(tmp_path):
+    failing = tmp_path / 'boom.py'
+    failing.write_text("print('antes')\nraise ValueError('quebrou')\n")
+    pool = WarmWorkerPool()
+
+    log = TaskLogWriter(tmp_path / 'c.log', compress=False)
+    with pytest.raises(subprocess.CalledProcessError):
+        pool.run(sys.executable, str(failing), timeout=10, log=log)
+    log.close()
+    pool.shutdown()
+
+    output = _read_all(tmp_path / 'c.log')[0].decode()
+    assert output.startswith('antes\n')
+    assert 'Traceback' in output and "ValueError: quebrou" in output
@@ -0,0 +1,161 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from custom_airflow.src.dag_parser import DAG, Task
+from custom_airflow.src.executor import Executor
+from custom_airflow.src.models import DagRunState, ExecutionModel, TaskQueueModel, TaskStatus, get_session
+from custom_airflow.src.task_queue import (DONE, QUEUED, QueueResultWatcher, claim_jobs, complete_job,
+                                           enqueue_task, heartbeat, requeue_dead_jobs)
+from custom_airflow.src.state_writer import get_state_writer
+from custom_airflow.src.worker import Worker
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _registered(name='queue_dag', script='job.py'):
+    dag = DAG(name, schedule_interval='@daily')
+    dag.add_task(Task(name='job', script_path=script, retries=1))
+    return dag, dag.register()['job']
+
+
+def test_concurrent_claims_never_share_jobs(sqlite_db):
+    dag, task_id = _registered()
+    for _ in range(10):
+        enqueue_task(dag.name, dag._dag_id, task_id, None, dag.tasks['job'])
+
+    claims = {}
+    threads = [threading.Thread(target=lambda w=w: claims.__setitem__(w, claim_jobs(w, 4))) for w in 'abc']
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [job.id for jobs in claims.values() for job in jobs]
+    assert len(ids) == len(set(ids)) == 10
+    assert claim_jobs('d', 4) == []
+
+
+def test_jobs_of_dead_workers_are_requeued(sqlite_db):
+    dag, task_id = _registered()
+    enqueue_task(dag.name, dag._dag_id, task_id, None, dag.tasks['job'])
+    job, = claim_jobs('dead-worker', 1)
+    get_state_writer().record_execution_start(dag._dag_id, task_id, execution_key=job.execution_key)
+    get_state_writer().flush()
+
+    later = datetime.utcnow() + timedelta(seconds=60)
+    assert requeue_dead_jobs(timeout=30, now=later) == 1
+
+    session = get_session()
+    row = session.get(TaskQueueModel, job.id)
+    execution = session.query(ExecutionModel).filter_by(execution_key=job.execution_key).one()
+    session.close()
+    assert (row.state, row.requeues, row.worker_id) == (QUEUED, 1, None)
+    assert row.execution_key != job.execution_key
+    assert execution.status == TaskStatus.failed
+    # O worker considerado morto não pode mais concluir o job
+    assert not complete_job(job.id, 'dead-worker', TaskStatus.success)
+
+    claim_jobs('other-worker', 1)
+    assert requeue_dead_jobs(timeout=30, max_requeues=1, now=later + timedelta(seconds=60)) == 1
+    session = get_session()
+    row = session.get(TaskQueueModel, job.id)
+    session.close()
+    assert (row.state, row.result) == (DONE, TaskStatus.failed.value)
+
+
+def test_unsaved_results_keep_the_job_alive_until_written(sqlite_db, monkeypatch):
+    dag, task_id = _registered()
+    enqueue_task(dag.name, dag._dag_id, task_id, None, dag.tasks['job'])
+    enqueue_task(dag.name, dag._dag_id, task_id, None, dag.tasks['job'])
+    kept, lost = claim_jobs('w', 2)
+    worker = Worker(worker_id='w')
+    worker._running.add(kept.id)
+
+    def unavailable(*args):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr('custom_airflow.src.worker.complete_job', unavailable)
+    worker._complete(kept.id, TaskStatus.success)
+    assert worker._running_jobs() == [kept.id]
+
+    # Só os jobs acompanhados pelo worker recebem heartbeat; o outro volta para a fila
+    later = datetime.utcnow() + timedelta(seconds=60)
+    heartbeat('w', worker._running_jobs(), now=later)
+    assert requeue_dead_jobs(timeout=30, now=later) == 1
+
+    monkeypatch.setattr('custom_airflow.src.worker.complete_job', complete_job)
+    worker._save_results()
+    assert worker._running_jobs() == []
+    session = get_session()
+    states = {job.id: job.state for job in session.query(TaskQueueModel)}
+    session.close()
+    assert states == {kept.id: DONE, lost.id: QUEUED}
+
+
+def test_dag_execute_with_queue_backend(sqlite_db, monkeypatch):
+    runs = []
+    monkeypatch.setattr(Executor, 'run', lambda self: runs.append(self.task.name))
+    monkeypatch.setenv('EXECUTOR_BACKEND', 'queue')
+    monkeypatch.setattr('custom_airflow.src.dag_parser.get_queue_watcher', lambda: watcher)
+    watcher = QueueResultWatcher(poll_interval=0.02)
+    dag = DAG('distributed', schedule_interval='@daily')
+    dag.add_task(Task(name='a', script_path='a.py', retries=1))
+    dag.add_task(Task(name='b', script_path='b.py', dependencies=['a'], retries=1))
+    dag.add_task(Task(name='c', script_path='c.py', dependencies=['a'], retries=1))
+
+    stop = threading.Event()
+    worker = threading.Thread(target=Worker(concurrency=2, poll_interval=0.02).run, args=(stop,), daemon=True)
+    worker.start()
+    try:
+        assert dag.execute() == DagRunState.success
+    finally:
+        stop.set()
+        worker.join(10)
+
+    assert runs[0] == 'a' and sorted(runs[1:]) == ['b', 'c']
+    session = get_session()
+    assert {e.status for e in session.query(ExecutionModel)} == {TaskStatus.success}
+    session.close()
+
+
+def test_several_worker_processes_share_the_queue(sqlite_db, tmp_path):
+    output = tmp_path / 'out.txt'
+    script = tmp_path / 'append.py'
+    script.write_text(f"import os\nwith open({str(output)!r}, 'a') as f:\n    f.write(f'{{os.getpid()}}\\n')\n")
+    dag, task_id = _registered(script=str(script))
+    job_ids = [enqueue_task(dag.name, dag._dag_id, task_id, None, dag.tasks['job']) for _ in range(12)]
+
+    env = {**os.environ, 'PYTHONPATH': str(PROJECT_ROOT), 'VENV_CACHE_DIR': str(tmp_path / 'venvs'),
+           'TASK_LOG_CAPTURE': 'false', 'LOG_FILE': '', 'QUEUE_POLL_INTERVAL': '0.05',
+           'WORKER_CONCURRENCY': '2'}
+    workers = [subprocess.Popen([sys.executable, '-m', 'custom_airflow.src.worker'], env=env, cwd=tmp_path,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for _ in range(3)]
+    try:
+        deadline = time.monotonic() + 90
+        while time.monotonic() < deadline:
+            session = get_session()
+            done = session.query(TaskQueueModel).filter(TaskQueueModel.id.in_(job_ids),
+                                                        TaskQueueModel.state == DONE).count()
+            session.close()
+            if done == len(job_ids):
+                break
+            time.sleep(0.2)
+    finally:
+        for process in workers:
+            process.send_signal(signal.SIGTERM)
+        for process in workers:
+            process.wait(30)
+
+    session = get_session()
+    jobs = session.query(TaskQueueModel).filter(TaskQueueModel.id.in_(job_ids)).all()
+    session.close()
+    assert {job.result for job in jobs} == {TaskStatus.success.value}
+    # Cada job executou exatamente uma vez
+    assert len(output.read_text().splitlines()) == len(job_ids)
+    assert len({job.worker_id for job in jobs}) >= 2
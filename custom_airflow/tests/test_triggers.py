@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from custom_airflow.src.dag_parser import DAG, Sensor, Task
+from custom_airflow.src.models import DagRunState, ExecutionModel, TaskStatus, get_session
+from custom_airflow.src.triggers import FileTrigger, TriggerService, TriggerTimeout, build_trigger
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = TriggerService(poke_interval=0.05)
+    yield service
+    service.runner.shutdown()
+
+
+def test_invalid_conditions_are_rejected_when_the_dag_is_defined():
+    with pytest.raises(ValueError):
+        build_trigger({'type': 'partition'})
+    with pytest.raises(ValueError):
+        Sensor('wait', trigger={'type': 'file'})
+    with pytest.raises(ValueError):
+        Task('nothing')
+
+
+def test_file_condition_fires_when_the_file_appears(service, tmp_path):
+    future = service.defer({'type': 'file', 'path': str(tmp_path / 'part-*.csv')})
+    time.sleep(0.2)
+    assert not future.done()
+
+    (tmp_path / 'part-0.csv').write_text('x')
+    assert future.result(timeout=5) is True
+
+
+def test_slow_file_check_does_not_block_other_conditions(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(FileTrigger, '_exists', lambda self: time.sleep(1) or False)
+    slow = service.defer({'type': 'file', 'path': str(tmp_path / 'nfs.done')}, poke_interval=0.01)
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    assert service.defer({'type': 'time', 'seconds': 0.05}).result(timeout=5) is True
+    assert time.monotonic() - started < 0.8
+    slow.cancel()
+
+
+def test_command_and_time_conditions(service):
+    assert service.defer({'type': 'command', 'command': 'true'}).result(timeout=5) is True
+    assert service.defer({'type': 'time', 'seconds': 0.1}).result(timeout=5) is True
+    with pytest.raises(TriggerTimeout):
+        service.defer({'type': 'command', 'command': ['false']}, timeout=0.3).result(timeout=5)
+
+
+def test_thousands_of_waiting_conditions_share_one_loop(service, tmp_path):
+    futures = [service.defer({'type': 'file', 'path': str(tmp_path / f'{i}.done')}, poke_interval=0.2)
+               for i in range(2000)]
+    time.sleep(0.3)
+    assert service.waiting() >= 2000
+    assert threading.active_count() < 50
+
+    for future in futures:
+        future.cancel()
+
+
+def test_sensor_waits_without_holding_a_slot(sqlite_db, tmp_path, monkeypatch):
+    flag = tmp_path / 'partition.ready'
+    runs = []
+
+    def fake_execute_task(self, task, attempt=1, dag_run_id=None):
+        runs.append(task.name)
+        if task.name == 'land_partition':
+            flag.write_text('ok')
+        return TaskStatus.success
+
+    monkeypatch.setattr(DAG, 'execute_task', fake_execute_task)
+    # Com um único slot, o sensor travaria o run se ocupasse o slot durante a espera
+    dag = DAG('sensors', schedule_interval='@daily', parallelism=1)
+    dag.add_task(Sensor('wait_partition', trigger={'type': 'file', 'path': str(flag)},
+                       poke_interval=0.05, trigger_timeout=10))
+    dag.add_task(Task('land_partition', script_path='land.py'))
+    dag.add_task(Task('process', script_path='process.py', dependencies=['wait_partition']))
+
+    assert dag.execute() == DagRunState.success
+    assert runs == ['land_partition', 'process']
+
+    session = get_session()
+    sensor_runs = session.query(ExecutionModel).filter_by(task_id=dag.register()['wait_partition']).all()
+    session.close()
+    assert [execution.status for execution in sensor_runs] == [TaskStatus.success]
+
+
+def test_deferred_task_runs_its_script_after_the_condition_fires(sqlite_db, monkeypatch):
+    runs = []
+    monkeypatch.setattr(DAG, 'execute_task',
+                        lambda self, task, attempt=1, dag_run_id=None: runs.append(task.name) or TaskStatus.success)
+    dag = DAG('deferred', schedule_interval='@daily')
+    dag.add_task(Task('load', script_path='load.py', trigger={'type': 'time', 'seconds': 0.1}))
+
+    assert dag.execute() == DagRunState.success
+    assert runs == ['load']
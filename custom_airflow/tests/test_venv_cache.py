@@ -0,0 +1,74 @@
+import os
+import time
+
+from custom_airflow.src.venv_cache import VenvCache, env_key, venv_python
+
+
+def test_env_key_is_shared_for_same_requirements():
+    assert env_key(['requests==2.0', 'six']) == env_key(['six', ' requests==2.0'])
+    assert env_key([]) == env_key(None)
+    assert env_key(['six']) != env_key([])
+
+
+def test_ensure_builds_once_and_reuses_environment(tmp_path):
+    cache = VenvCache(root=tmp_path, max_envs=5)
+    env_dir = cache.ensure([])
+    assert venv_python(env_dir).exists()
+    assert cache.is_ready(env_key([]))
+    assert cache.ensure(None) == env_dir
+    cache.shutdown()
+
+
+def test_evict_removes_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setenv('VENV_CACHE_MIN_IDLE', '0')
+    cache = VenvCache(root=tmp_path, max_envs=1)
+    for key, last_used in (('old', 100), ('new', 200)):
+        env_dir = tmp_path / key
+        env_dir.mkdir()
+        (env_dir / '.ready').touch()
+        (env_dir / '.last_used').touch()
+        os.utime(env_dir / '.last_used', (last_used, last_used))
+
+    cache.evict()
+
+    assert not (tmp_path / 'old').exists()
+    assert (tmp_path / 'new').exists()
+    cache.shutdown()
+
+
+def test_environment_is_built_in_place_and_published_by_marker(tmp_path):
+    cache = VenvCache(root=tmp_path, max_envs=5)
+    key = env_key([])
+    # Sobra de uma construção interrompida: sem o marcador, não conta como pronta
+    (tmp_path / key).mkdir()
+    (tmp_path / key / 'leftover').touch()
+    assert not cache.is_ready(key)
+
+    env_dir = cache.ensure([])
+    assert not (env_dir / 'leftover').exists()
+    # Os scripts do venv apontam para o diretório final
+    assert str(env_dir.resolve()) in (env_dir / 'bin' / 'activate').read_text()
+    assert not list(tmp_path.glob('.*.tmp'))
+    cache.shutdown()
+
+
+def test_environment_in_use_is_kept_and_refreshed(tmp_path, monkeypatch):
+    monkeypatch.setenv('VENV_CACHE_MIN_IDLE', '4')
+    cache = VenvCache(root=tmp_path, max_envs=1)
+    for key in ('busy', 'idle'):
+        env_dir = tmp_path / key
+        env_dir.mkdir()
+        (env_dir / '.ready').touch()
+        (env_dir / '.last_used').touch()
+        os.utime(env_dir / '.last_used', (100, 100))
+
+    # Tarefa longa ou worker pré-aquecido: o .last_used é renovado enquanto o ambiente está em uso
+    with cache.in_use(tmp_path / 'busy'):
+        os.utime(tmp_path / 'busy' / '.last_used', (100, 100))
+        time.sleep(1.5)
+        assert time.time() - (tmp_path / 'busy' / '.last_used').stat().st_mtime < 2
+        monkeypatch.setattr(cache, 'min_idle_seconds', 0)
+        cache.evict()
+        assert (tmp_path / 'busy' / '.ready').exists()
+        assert not (tmp_path / 'idle').exists()
+    cache.shutdown()
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+from custom_airflow.src.worker_pool import WarmWorkerPool
+
+pytestmark = pytest.mark.skipif(not WarmWorkerPool.supported(), reason='workers quentes exigem POSIX')
+
+
+def test_worker_is_reused_between_tasks(tmp_path):
+    script = tmp_path / 'ok.py'
+    out = tmp_path / 'out.txt'
+    script.write_text(f"import os\nopen({str(out)!r}, 'a').write(str(os.getpid()) + '\\n')\n")
+    pool = WarmWorkerPool(max_tasks=10)
+
+    pool.run(sys.executable, str(script), timeout=10)
+    pool.run(sys.executable, str(script), timeout=10)
+
+    pids = out.read_text().split()
+    assert len(pids) == 2 and pids[0] == pids[1]
+    pool.shutdown()
+
+
+def test_failure_discards_worker_and_raises(tmp_path):
+    failing = tmp_path / 'fail.py'
+    failing.write_text('raise SystemExit(3)\n')
+    pool = WarmWorkerPool()
+
+    with pytest.raises(subprocess.CalledProcessError):
+        pool.run(sys.executable, str(failing), timeout=10)
+    assert not any(pool._idle.values())
+    pool.shutdown()
+
+
+def test_timeout_kills_worker(tmp_path):
+    slow = tmp_path / 'slow.py'
+    slow.write_text('import time\ntime.sleep(30)\n')
+    pool = WarmWorkerPool()
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        pool.run(sys.executable, str(slow), timeout=0.5)
+    pool.shutdown()
+
+
+def test_worker_recycled_after_max_tasks(tmp_path):
+    script = tmp_path / 'noop.py'
+    script.write_text('pass\n')
+    pool = WarmWorkerPool(max_tasks=1)
+
+    pool.run(sys.executable, str(script), timeout=10)
+    assert not any(pool._idle.values())
+    pool.shutdown()